@@ -1,20 +1,57 @@
-from flask import Flask, Response, jsonify, render_template_string
-import cv2
-import serial
+from flask import Flask, Response, jsonify, render_template_string, request
+import argparse
 import time
 import imutils
 import threading
+import collections
 import numpy as np
 import os # Adicionado para garantir compatibilidade
+from protocolo_captura import CONTENT_TYPE_LOTE, encode_capture, encode_capture_batch
+from serie_temporal import SensorRingBuffer, aggregate_buckets
+from transmissor_mjpeg import BOUNDARY, MJPEGBroadcaster
+from aquisicao_camera import CameraPipeline
+from inspecao_automatica import AutoInspector, SceneChangeDetector
+from triagem import VEREDITOS, EdgeScreener
+from contadores import PROMETHEUS_CONTENT_TYPE, StageCounters, prometheus_text
+from leitor_serial import SerialReader
 
 # =================================================================
 # CONFIGURAÇÕES RASPBERRY PI
 # =================================================================
-ARDUINO_PORT = '/dev/ttyACM0'  # VERIFIQUE: Sua porta serial correta
+ARDUINO_PORT = os.environ.get("FUNGOEYE_ARDUINO_PORT", '/dev/ttyACM0')  # VERIFIQUE: Sua porta serial correta
 ARDUINO_BAUDRATE = 9600
+SERIAL_BACKOFF_MIN, SERIAL_BACKOFF_MAX = 1, 30  # Espera (s) entre tentativas de reconectar ao Arduino
 CAMERA_INDEX = 0               # Geralmente 0 para webcam USB
 IMAGE_WIDTH = 128              # Deve corresponder ao modelo CNN
 IMAGE_HEIGHT = 128
+CAMERA_FPS_ACTIVE = 20         # FPS de leitura com alguém assistindo o /video_feed
+CAMERA_FPS_IDLE = 2            # FPS de leitura sem espectadores (economiza CPU e energia)
+STREAM_WIDTH = 640             # Largura máxima do /video_feed (None = resolução nativa da câmera)
+# Resolução das capturas enviadas ao PC: 'modelo' (IMAGE_WIDTH x IMAGE_HEIGHT)
+# ou 'nativa' (resolução cheia da câmera, para arquivamento; o PC redimensiona)
+CAPTURE_RESOLUTION = 'modelo'
+STREAM_JPEG_QUALITY = 95       # Qualidade do JPEG do /video_feed (codificado uma vez por frame)
+LONG_POLL_MAX_WAIT = 30        # Tempo máximo (s) que o PC pode ficar esperando uma nova captura
+CAPTURE_QUEUE_MAX_ITEMS = 256  # Capturas pendentes guardadas para o PC (as mais antigas são descartadas)
+CAPTURE_QUEUE_MAX_BYTES = 32 * 1024 * 1024  # Limite de memória da fila de capturas
+SENSOR_HISTORY_CAPACITY = 200_000  # Amostras de sensor guardadas em memória (~3 MB)
+SENSOR_HISTORY_RETENTION = 24 * 3600  # Idade máxima (s) das amostras consultáveis no histórico
+SENSOR_HISTORY_MAX_BUCKETS = 2000  # Limite de buckets por resposta de /api/sensor/history
+# Inspeção automática (salas sem operador). Com as duas opções desligadas,
+# só o botão de captura manual dispara capturas.
+AUTO_CAPTURE_INTERVAL = None   # Segundos entre capturas automáticas (None = desligado)
+AUTO_CAPTURE_ON_CHANGE = False # Captura quando a cena muda (diferença entre frames)
+AUTO_CHANGE_THRESHOLD = 12.0   # Diferença média (0-255) na miniatura que conta como mudança
+AUTO_MIN_INTERVAL = 2.0        # Intervalo mínimo (s) entre duas capturas automáticas
+AUTO_MAX_PENDING = 2           # Capturas automáticas ainda não processadas pelo PC (backpressure)
+# Triagem na borda (triagem.py): na inspeção automática, capturas claramente
+# saudáveis não vão para o PC; ambíguas e suspeitas vão com a pontuação.
+# Limiares de `python triagem.py --calibrar Data/treino` (100% das imagens
+# com fungo de Data/treino enviadas, 38% das saudáveis descartadas).
+SCREENING_ENABLED = os.environ.get("FUNGOEYE_TRIAGEM", "0") == "1"
+SCREENING_HEALTHY_MAX = float(os.environ.get("FUNGOEYE_TRIAGEM_SAUDAVEL", 0.0838))  # Abaixo: não envia
+SCREENING_SUSPECT_MIN = float(os.environ.get("FUNGOEYE_TRIAGEM_SUSPEITA", 0.6769))  # A partir daqui: suspeita
+SCREENING_MODEL = os.environ.get("FUNGOEYE_TRIAGEM_MODELO")  # .tflite minúsculo no lugar do HSV (opcional)
 
 # =================================================================
 # INICIALIZAÇÃO DO FLASK E VARIÁVEIS GLOBAIS
@@ -26,78 +63,133 @@ app = Flask(__name__)
 # Variável para armazenar o ultimo dado lido do sensor
 sensor_data = {"temperature": None, "humidity": None, "timestamp": None}
 sensor_lock = threading.Lock() 
+# Histórico recente das leituras (buffer circular NumPy, com lock próprio)
+sensor_history = SensorRingBuffer(SENSOR_HISTORY_CAPACITY, SENSOR_HISTORY_RETENTION)
 
 # Variáveis da Câmera
-last_frame = None 
-last_frame_lock = threading.Lock() 
+# Codifica cada frame uma única vez para todos os clientes do /video_feed
+broadcaster = MJPEGBroadcaster(STREAM_JPEG_QUALITY)
+# Frame nativo em buffer pré-alocado; versões do modelo/stream geradas sob demanda
+camera = CameraPipeline(
+    CAMERA_INDEX,
+    model_size=(IMAGE_WIDTH, IMAGE_HEIGHT),
+    stream_width=STREAM_WIDTH,
+    fps_active=CAMERA_FPS_ACTIVE,
+    fps_idle=CAMERA_FPS_IDLE,
+    demand=lambda: broadcaster.subscriber_count > 0,
+)
 
-# Armazena a última imagem e dados do sensor CONGELADOS pela ação manual
-captured_data = {"image_data": None, "temperature": None, "humidity": None, "timestamp": None}
+# Armazena a última imagem e dados do sensor CONGELADOS (botão manual ou inspeção automática)
+captured_data = {"image_data": None, "temperature": None, "humidity": None, "timestamp": None, "capture_id": 0,
+                 "trigger": None, "screening": None, "screening_verdict": None}
 capture_lock = threading.Lock()
+# Acordada a cada nova captura (usada pelo long-poll do PC)
+capture_cond = threading.Condition(capture_lock)
+# Identifica esta execução do servidor: o ETag muda mesmo se a RPi reiniciar e o ID voltar a 1
+BOOT_ID = int(time.time())
+
+# Fila circular com as últimas capturas (protegida por capture_lock). Permite
+# que várias capturas feitas entre duas buscas do PC não se percam.
+capture_queue = collections.deque()
+capture_queue_stats = {"bytes": 0, "dropped": 0}
+
+# Vazão de cada etapa (câmera, capturas, entregas ao PC...) em /api/pipeline/stats
+pipeline_counters = StageCounters()
 
 # =================================================================
 # THREADS DE LEITURA (Serial e Câmera)
 # =================================================================
 
+def on_sensor_samples(samples):
+    """Recebe as amostras (timestamp, temperatura, umidade) lidas de uma vez
+    da serial: todas vão para o histórico e a mais recente para sensor_data."""
+    with pipeline_counters.timed('sensor', len(samples)):
+        for now, temp, hum in samples:
+            sensor_history.append(now, temp, hum)
+        now, temp, hum = max(samples)
+        with sensor_lock:
+            sensor_data.update({
+                "temperature": temp,
+                "humidity": hum,
+                "timestamp": now
+            })
+
+# Leitura do Arduino em blocos (texto ou binário com checksum), com reconexão
+serial_reader = SerialReader(ARDUINO_PORT, ARDUINO_BAUDRATE, on_sensor_samples,
+                             backoff_min=SERIAL_BACKOFF_MIN, backoff_max=SERIAL_BACKOFF_MAX)
+
 def get_arduino_data():
-    """Lê continuamente os dados do Arduino e atualiza a variável global."""
-    try:
-        ser = serial.Serial(ARDUINO_PORT, ARDUINO_BAUDRATE, timeout=5)
-        time.sleep(2) 
-        ser.flushInput()
-        print("Thread Serial: Conectada ao Arduino.")
-
-        while True:
-            try:
-                line_bytes = ser.readline()
-                line = line_bytes.decode('utf-8').strip()
-                
-                if "Temp:" in line and "Hum:" in line:
-                    parts = line.split(',')
-                    temp = float(parts[0].split(':')[1])
-                    hum = float(parts[1].split(':')[1])
-                    
-                    with sensor_lock:
-                        sensor_data.update({
-                            "temperature": temp,
-                            "humidity": hum,
-                            "timestamp": time.time()
-                        })
-                
-            except Exception as e:
-                # Trata erros temporários de leitura/decodificação
-                time.sleep(0.1) 
-            
-    except serial.SerialException as e:
-        print(f"Erro Crítico Serial: {e}. Verifique se a porta está correta.")
-    except Exception as e:
-        print(f"Erro na thread serial: {e}")
+    """Lê continuamente os dados do Arduino e atualiza a variável global.
+    Se a porta cair, reconecta (a thread nunca termina)."""
+    serial_reader.run()
 
 def camera_thread_loop():
-    """Lê a câmera continuamente e armazena o último frame para o stream."""
-    global last_frame
-    cap = cv2.VideoCapture(CAMERA_INDEX)
-    if not cap.isOpened():
-        print("Erro Câmera: Não foi possível abrir a webcam.")
-        return
-        
-    print("Thread Câmera: Câmera iniciada.")
-    while True:
-        ret, frame = cap.read()
-        if ret:
-            frame = cv2.resize(frame, (IMAGE_WIDTH, IMAGE_HEIGHT))
-            with last_frame_lock:
-                last_frame = frame.copy()
-        
-        time.sleep(0.05)
-    
-    cap.release()
+    """Lê a câmera continuamente (FPS cheio só com espectadores no stream)."""
+    @pipeline_counters.timed('camera')
+    def on_frame(pipeline):
+        # Só redimensiona/codifica para o stream se alguém estiver assistindo
+        if broadcaster.subscriber_count > 0:
+            inicio = time.perf_counter()
+            broadcaster.publish(pipeline.stream_frame())
+            pipeline_counters.record('stream', 1, time.perf_counter() - inicio)
+        auto_inspector.on_frame(pipeline)
+
+    camera.run(on_frame)
+
+def take_capture(trigger='manual', screening=None):
+    """Congela o frame atual e os dados do sensor como uma nova captura.
+    screening: (pontuação, veredito) já calculados pela inspeção automática;
+    nas capturas manuais a triagem só anota a pontuação (sempre envia).
+    Retorna o ID da captura ou None se câmera/sensor ainda não têm dados."""
+    inicio = time.perf_counter()
+    frame = camera.native_frame() if CAPTURE_RESOLUTION == 'nativa' else camera.model_frame()
+    if screening is None and screener is not None and frame is not None:
+        screening = screener.evaluate(camera.model_frame())
+    with sensor_lock, capture_lock:
+        if frame is None or sensor_data["temperature"] is None:
+            return None
+        # CONGELA os dados no momento exato (array numpy; a serialização
+        # acontece só na entrega, em formato binário por padrão)
+        capture_id = push_capture(frame, sensor_data["temperature"], sensor_data["humidity"], trigger, screening)
+    pipeline_counters.record('captura', 1, time.perf_counter() - inicio)
+    return capture_id
+
+# Triagem das capturas na borda (desligada por padrão)
+screener = EdgeScreener(SCREENING_HEALTHY_MAX, SCREENING_SUSPECT_MIN, SCREENING_MODEL,
+                        counters=pipeline_counters) if SCREENING_ENABLED else None
+
+# Capturas automáticas disparadas pela thread da câmera (desligadas por padrão)
+auto_inspector = AutoInspector(
+    take_capture,
+    interval=AUTO_CAPTURE_INTERVAL,
+    detector=SceneChangeDetector(AUTO_CHANGE_THRESHOLD) if AUTO_CAPTURE_ON_CHANGE else None,
+    min_interval=AUTO_MIN_INTERVAL,
+    max_pending=AUTO_MAX_PENDING,
+    counters=pipeline_counters,
+    screener=screener,
+)
+
+# Threads de hardware (serial e câmera): iniciadas por create_app(), não no
+# import, para que scripts e testes possam importar este módulo sem hardware
+hardware_threads = []
+hardware_lock = threading.Lock()
+
+def start_hardware_threads():
+    """Inicia as threads da serial e da câmera (uma única vez)."""
+    with hardware_lock:
+        if hardware_threads:
+            return hardware_threads
+        for target, name in ((get_arduino_data, "Serial"), (camera_thread_loop, "Camera")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            hardware_threads.append(thread)
+    return hardware_threads
 
-# Inicia as threads
-sensor_thread = threading.Thread(target=get_arduino_data, daemon=True)
-sensor_thread.start()
-camera_thread = threading.Thread(target=camera_thread_loop, daemon=True)
-camera_thread.start()
+def create_app(start_hardware=True):
+    """Fábrica do app: inicia as threads de hardware e devolve o app Flask."""
+    if start_hardware:
+        start_hardware_threads()
+    return app
 
 
 # =================================================================
@@ -105,21 +197,12 @@ camera_thread.start()
 # =================================================================
 
 def generate_frames():
-    """Gera frames JPEG do stream para visualização ao vivo."""
-    while True:
-        with last_frame_lock:
-            frame = last_frame
-        
-        if frame is None:
-            time.sleep(0.1)
-            continue
-            
-        (flag, encodedImage) = cv2.imencode(".jpg", frame)
-        if not flag:
-            continue
+    """Gera frames JPEG do stream para visualização ao vivo.
 
-        yield(b'--frame\r\n' b'Content-Type: image/jpeg\r\n\r\n' + bytearray(encodedImage) + b'\r\n')
-        time.sleep(0.05)
+    O JPEG é codificado uma única vez pela thread da câmera (broadcaster) e
+    compartilhado entre todos os clientes; cada cliente só espera o próximo.
+    """
+    yield from broadcaster.subscribe()
 
 @app.route("/")
 def index():
@@ -163,30 +246,176 @@ def index():
     """)
 
 @app.route("/capture")
+@pipeline_counters.timed('http_capture')
 def capture_endpoint():
     """ENDPOINT CHAMADO PELO BOTÃO: Congela o frame e os dados do sensor."""
-    with last_frame_lock, sensor_lock, capture_lock:
-        if last_frame is None or sensor_data["temperature"] is None:
-            return jsonify({"status": "ERROR", "message": "Dados da câmera/sensor indisponíveis."}), 500
-            
-        # CONGELA os dados no momento exato
-        captured_data["image_data"] = last_frame.tolist() 
-        captured_data["temperature"] = sensor_data["temperature"]
-        captured_data["humidity"] = sensor_data["humidity"]
-        captured_data["timestamp"] = time.time()
-        
-        return jsonify({"status": "OK", "message": "Dados congelados."})
+    capture_id = take_capture()
+    if capture_id is None:
+        return jsonify({"status": "ERROR", "message": "Dados da câmera/sensor indisponíveis."}), 500
+    return jsonify({"status": "OK", "message": "Dados congelados.", "capture_id": capture_id})
+
+def push_capture(frame, temperature, humidity, trigger='manual', screening=None):
+    """Registra uma nova captura como a atual e na fila (chamar com capture_lock adquirido).
+
+    Descarta as capturas mais antigas quando a fila passa de
+    CAPTURE_QUEUE_MAX_ITEMS ou CAPTURE_QUEUE_MAX_BYTES. trigger indica a
+    origem: 'manual', 'intervalo' ou 'mudanca'; screening, a (pontuação,
+    veredito) da triagem, quando ligada. Retorna o ID da captura.
+    """
+    captured_data["image_data"] = frame
+    captured_data["temperature"] = temperature
+    captured_data["humidity"] = humidity
+    captured_data["timestamp"] = time.time()
+    captured_data["capture_id"] += 1
+    captured_data["trigger"] = trigger
+    captured_data["screening"], captured_data["screening_verdict"] = screening or (None, None)
+
+    capture_queue.append(captured_data.copy())
+    capture_queue_stats["bytes"] += frame.nbytes
+    while len(capture_queue) > 1 and (
+        len(capture_queue) > CAPTURE_QUEUE_MAX_ITEMS
+        or capture_queue_stats["bytes"] > CAPTURE_QUEUE_MAX_BYTES
+    ):
+        oldest = capture_queue.popleft()
+        capture_queue_stats["bytes"] -= oldest["image_data"].nbytes
+        capture_queue_stats["dropped"] += 1
+        pipeline_counters.record('fila_descartada')
+
+    capture_cond.notify_all()
+    return captured_data["capture_id"]
+
+def capture_etag():
+    """ETag da captura atual (chamar com capture_lock adquirido)."""
+    return f'"{BOOT_ID}-{captured_data["capture_id"]}"'
 
 @app.route("/api/captured_data")
 def captured_data_api():
-    """ENDPOINT CHAMADO PELO PC Servidor: Retorna o frame e dados CONGELADOS."""
-    with capture_lock:
+    """ENDPOINT CHAMADO PELO PC Servidor: Retorna o frame e dados CONGELADOS.
+
+    Por padrão responde em binário (bytes crus + metadados nos cabeçalhos).
+    Use ?format=json para o formato legado com listas aninhadas.
+
+    Cada captura tem um ETag. Com o cabeçalho If-None-Match igual ao ETag
+    atual a resposta é 304 (sem corpo). Com ?wait=<segundos> a requisição
+    fica bloqueada (long-poll) até surgir uma captura nova ou o tempo acabar.
+    """
+    client_etag = request.headers.get("If-None-Match")
+    wait = min(request.args.get("wait", 0, type=float), LONG_POLL_MAX_WAIT)
+
+    with capture_cond:
+        if wait > 0:
+            capture_cond.wait_for(
+                lambda: captured_data["image_data"] is not None and capture_etag() != client_etag,
+                timeout=wait
+            )
+
         if captured_data["image_data"] is None:
             return jsonify({"status": "ERROR", "message": "Nenhuma captura manual realizada."}), 404
+
+        etag = capture_etag()
+        if etag == client_etag:
+            return Response(status=304, headers={"ETag": etag})
         
         # Cria uma cópia para enviar
         data_to_send = captured_data.copy()
-        return jsonify({"status": "OK", "data": data_to_send})
+
+    inicio = time.perf_counter() # Serialização (sem a espera do long-poll)
+    if request.args.get("format") == "json":
+        data_to_send["image_data"] = data_to_send["image_data"].tolist()
+        response = jsonify({"status": "OK", "data": data_to_send})
+        response.headers["ETag"] = etag
+        pipeline_counters.record('serializacao', 1, time.perf_counter() - inicio)
+        return response
+
+    body, headers = encode_capture(
+        data_to_send["image_data"],
+        data_to_send["temperature"],
+        data_to_send["humidity"],
+        data_to_send["timestamp"],
+    )
+    pipeline_counters.record('serializacao', 1, time.perf_counter() - inicio)
+    headers["ETag"] = etag
+    headers["X-Capture-Id"] = str(data_to_send["capture_id"])
+    return Response(body, headers=headers)
+
+@app.route("/api/captures")
+def captures_api():
+    """ENDPOINT CHAMADO PELO PC Servidor: Retorna, em um único lote, todas as
+    capturas da fila com ID maior que ?since=<id>.
+
+    Aceita ?wait=<segundos> (long-poll até existir captura pendente) e
+    ?boot=<id>: se não bater com o BOOT_ID atual (RPi reiniciou), a fila é
+    enviada desde o início. Use ?format=json para listas aninhadas.
+    """
+    since = request.args.get("since", 0, type=int)
+    if request.args.get("boot", BOOT_ID, type=int) != BOOT_ID:
+        since = 0
+    else:
+        # O PC só avança o since depois de inferir: libera novas capturas automáticas
+        auto_inspector.ack(since)
+    wait = min(request.args.get("wait", 0, type=float), LONG_POLL_MAX_WAIT)
+
+    with capture_cond:
+        if wait > 0:
+            capture_cond.wait_for(lambda: captured_data["capture_id"] > since, timeout=wait)
+
+        pending = [c for c in capture_queue if c["capture_id"] > since]
+        # Capturas que saíram da fila antes de o PC buscá-las
+        missed = (pending[0]["capture_id"] - since - 1) if pending else 0
+        info = {
+            "boot_id": BOOT_ID,
+            "last_id": captured_data["capture_id"],
+            "missed": missed,
+            "dropped_total": capture_queue_stats["dropped"],
+        }
+    pipeline_counters.record('entregue', len(pending))
+
+    with pipeline_counters.timed('serializacao', len(pending)):
+        if request.args.get("format") == "json":
+            pending = [{**c, "image_data": c["image_data"].tolist()} for c in pending]
+            return jsonify({"status": "OK", **info, "captures": pending})
+        body = encode_capture_batch(pending, **info)
+    return Response(body, mimetype=CONTENT_TYPE_LOTE)
+
+@app.route("/api/pipeline/stats")
+def pipeline_stats_api():
+    """Vazão por etapa (itens/s e fração de tempo ocupado no último minuto),
+    estado da inspeção automática e da fila de capturas."""
+    with capture_lock:
+        fila = {"items": len(capture_queue), **capture_queue_stats, "last_id": captured_data["capture_id"]}
+    return jsonify({
+        "status": "OK",
+        "stages": pipeline_counters.snapshot(),
+        "bottleneck": pipeline_counters.bottleneck(),
+        "auto": auto_inspector.status(),
+        "queue": fila,
+        "serial": serial_reader.stats(),
+    })
+
+@app.route("/metrics")
+def metrics_api():
+    """Métricas no formato do Prometheus: itens, tempo ocupado e histograma
+    de latência por etapa, mais filas, espectadores e contadores da serial."""
+    with capture_lock:
+        fila = dict(capture_queue_stats, items=len(capture_queue))
+    serial_stats = serial_reader.stats()
+    gauges = {
+        "fila_capturas_itens": fila["items"],
+        "fila_capturas_bytes": fila["bytes"],
+        "fila_capturas_descartadas_total": fila["dropped"],
+        "stream_espectadores": broadcaster.subscriber_count,
+        "camera_frames_total": camera.frames_read,
+        "auto_pendentes": auto_inspector.pending(),
+        "triagem_capturas_total": [({"veredito": v}, n) for v, n in screening_counts().items()],
+        "serial_conectada": int(serial_stats["connected"]),
+        "serial_bytes_total": serial_stats["bytes"],
+        "serial_amostras_total": serial_stats["samples"],
+        "serial_erros_parse_total": serial_stats["parse_errors"],
+        "serial_amostras_perdidas_total": serial_stats["dropped_samples"],
+        "serial_reconexoes_total": serial_stats["reconnects"],
+        "serial_erros_callback_total": serial_stats["callback_errors"],
+    }
+    return Response(prometheus_text(pipeline_counters, 'fungoeye_rpi', gauges), content_type=PROMETHEUS_CONTENT_TYPE)
 
 @app.route("/api/sensor")
 def sensor_api():
@@ -194,11 +423,70 @@ def sensor_api():
     with sensor_lock:
         return jsonify(sensor_data)
 
+@app.route("/api/sensor/history")
+def sensor_history_api():
+    """Histórico das leituras agregado em buckets (min/média/máx).
+
+    Parâmetros: ?from=&to= (epoch em segundos; padrão: última hora) e
+    ?bucket= (segundos por bucket; padrão 60). Se o intervalo gerar mais de
+    SENSOR_HISTORY_MAX_BUCKETS buckets, o bucket é aumentado.
+    """
+    end = request.args.get("to", time.time(), type=float)
+    start = request.args.get("from", end - 3600, type=float)
+    bucket = request.args.get("bucket", 60, type=float)
+    if bucket <= 0 or end < start:
+        return jsonify({"status": "ERROR", "message": "Parâmetros inválidos."}), 400
+    bucket = max(bucket, (end - start) / SENSOR_HISTORY_MAX_BUCKETS)
+
+    t, temp, hum = sensor_history.snapshot(start, end)
+    buckets = aggregate_buckets(t, bucket, temperature=temp, humidity=hum)
+    return jsonify({"status": "OK", "from": start, "to": end, "bucket": bucket, **buckets})
+
 @app.route("/video_feed")
 def video_feed():
     """Rota para o stream de vídeo MJPEG (visualização ao vivo)."""
-    return Response(generate_frames(), mimetype = "multipart/x-mixed-replace; boundary=frame")
+    return Response(generate_frames(), mimetype = f"multipart/x-mixed-replace; boundary={BOUNDARY.decode()}")
+
+def screening_counts():
+    """Capturas automáticas por veredito da triagem (vazio com a triagem desligada)."""
+    if screener is None:
+        return {}
+    stats = screener.stats()
+    return {veredito: stats[veredito] for veredito in VEREDITOS}
+
+def sensor_snapshot():
+    """Cópia da última leitura (resposta do /api/sensor)."""
+    with sensor_lock:
+        return dict(sensor_data)
+
+def main():
+    global serial_reader
+    parser = argparse.ArgumentParser(description="Servidor da RPi: stream da câmera, sensores e capturas.")
+    parser.add_argument('--servidor', choices=('dev', 'producao'), default='dev',
+                        help="dev: servidor do Flask (uma thread por conexão); "
+                             "producao: aiohttp orientado a eventos (requer aiohttp)")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--porta', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=8, help="Threads para as rotas do Flask no modo producao")
+    parser.add_argument('--simulado', action='store_true',
+                        help="Câmera e Arduino simulados (testes de carga sem hardware)")
+    parser.add_argument('--taxa-sensor', type=float, default=1.0, help="Leituras/s do Arduino simulado")
+    args = parser.parse_args()
+
+    if args.simulado:
+        from camera_simulada import VideoCaptureSintetica
+        from arduino_simulado import ArduinoSimulado
+        camera.source = VideoCaptureSintetica(fps=CAMERA_FPS_ACTIVE)
+        arduino = ArduinoSimulado(taxa=args.taxa_sensor).start()
+        serial_reader = SerialReader(arduino.port, ARDUINO_BAUDRATE, on_sensor_samples, settle=0)
+
+    create_app()
+    print(f"\nIniciando servidor ({args.servidor}) na RPi. Acesse http://<IP_RPi>:{args.porta}/ no seu navegador.")
+    if args.servidor == 'producao':
+        from servidor_producao import serve
+        serve(app, broadcaster, sensor_snapshot, args.host, args.porta, args.workers)
+    else:
+        app.run(host=args.host, port=args.porta, threaded=True, use_reloader=False)
 
 if __name__ == '__main__':
-    print("\nIniciando servidor Flask na RPi. Acesse http://<IP_RPi>:8080/ no seu navegador.")
-    app.run(host='0.0.0.0', port=8080, threaded=True, use_reloader=False)
\ No newline at end of file
+    main()
\ No newline at end of file
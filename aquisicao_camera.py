@@ -0,0 +1,129 @@
+import threading
+import time
+import cv2
+
+# =================================================================
+# PIPELINE DE AQUISIÇÃO DA CÂMERA
+# =================================================================
+# Mantém o frame na resolução nativa da câmera em buffers pré-alocados
+# (dois, alternados: a câmera escreve num enquanto os leitores usam o
+# outro). As versões no tamanho do modelo e do stream só são geradas
+# quando alguém pede, no máximo uma vez por frame. Sem demanda (ninguém
+# assistindo o /video_feed) a leitura cai para um FPS ocioso.
+
+
+class CameraPipeline:
+    """Leitura contínua da câmera com taxa ajustada à demanda.
+
+    source: índice ou caminho aceito por cv2.VideoCapture, ou um objeto com a
+    mesma interface (ex.: camera_simulada.VideoCaptureSintetica).
+    model_size: (largura, altura) esperada pela CNN.
+    stream_width: largura do stream (None = nativa); a altura segue a proporção.
+    demand: função sem argumentos que diz se alguém precisa de frames na
+    taxa cheia (fps_active); caso contrário usa fps_idle.
+    """
+
+    def __init__(self, source=0, model_size=(128, 128), stream_width=None,
+                 fps_active=20.0, fps_idle=2.0, demand=None):
+        self.source = source
+        self.model_size = model_size
+        self.stream_width = stream_width
+        self.fps_active = fps_active
+        self.fps_idle = fps_idle
+        self.demand = demand or (lambda: False)
+
+        self._lock = threading.Lock()
+        self._front = None      # Último frame completo (lido pelos consumidores)
+        self._back = None       # Buffer onde a câmera escreve o próximo frame
+        self._seq = 0           # Incrementado a cada frame novo
+        self._views = {}        # nome -> (seq, array) das versões redimensionadas
+        self.frames_read = 0
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def open(self):
+        cap = self.source if hasattr(self.source, 'read') else cv2.VideoCapture(self.source)
+        # Evita que a câmera entregue frames velhos acumulados no FPS ocioso
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def _read_into_back_buffer(self, cap):
+        """Lê um frame no buffer de trás (alocado só no primeiro frame ou se a
+        resolução mudar) e troca os buffers. Retorna True se leu um frame."""
+        if self._back is None:
+            ret, frame = cap.read()
+        else:
+            ret, frame = cap.read(self._back)
+        if not ret or frame is None:
+            return False
+
+        if frame is not self._back:
+            # Primeiro frame (ou resolução nova): aloca o par de buffers
+            self._back = frame
+            with self._lock:
+                self._front = frame.copy()
+        with self._lock:
+            self._front, self._back = self._back, self._front
+            self._seq += 1
+        self.frames_read += 1
+        return True
+
+    def run(self, on_frame=None, stop_event=None):
+        """Loop de leitura (rodar numa thread). on_frame(self) é chamado a cada frame novo."""
+        cap = self.open()
+        if not cap.isOpened():
+            print("Erro Câmera: Não foi possível abrir a webcam.")
+            return
+
+        print("Thread Câmera: Câmera iniciada.")
+        try:
+            while stop_event is None or not stop_event.is_set():
+                inicio = time.perf_counter()
+                if self._read_into_back_buffer(cap) and on_frame is not None:
+                    on_frame(self)
+
+                fps = self.fps_active if self.demand() else self.fps_idle
+                time.sleep(max(0.0, 1.0 / fps - (time.perf_counter() - inicio)))
+        finally:
+            cap.release()
+
+    def _view(self, nome, size):
+        """Versão redimensionada do frame atual, calculada no máximo uma vez por frame.
+        O array devolvido é compartilhado: não deve ser modificado."""
+        with self._lock:
+            if self._front is None:
+                return None
+            cached = self._views.get(nome)
+            if cached is not None and cached[0] == self._seq:
+                return cached[1]
+            altura, largura = self._front.shape[:2]
+            if size is None or size == (largura, altura):
+                view = self._front.copy()
+            else:
+                view = cv2.resize(self._front, size, interpolation=cv2.INTER_AREA)
+            self._views[nome] = (self._seq, view)
+            return view
+
+    def native_frame(self):
+        """Cópia do frame atual na resolução nativa (None se ainda não há frame)."""
+        with self._lock:
+            return None if self._front is None else self._front.copy()
+
+    def model_frame(self):
+        """Frame atual no tamanho do modelo (model_size)."""
+        return self._view('model', self.model_size)
+
+    def small_frame(self, size):
+        """Miniatura do frame atual (ex.: para detectar mudança de cena)."""
+        return self._view('small', size)
+
+    def stream_frame(self):
+        """Frame atual no tamanho do stream (stream_width, mantendo a proporção)."""
+        size = None
+        if self.stream_width is not None and self._front is not None:
+            altura, largura = self._front.shape[:2]
+            if largura > self.stream_width:
+                size = (self.stream_width, round(altura * self.stream_width / largura))
+        return self._view('stream', size)
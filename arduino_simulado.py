@@ -0,0 +1,172 @@
+import argparse
+import os
+import pty
+import random
+import tempfile
+import threading
+import time
+import tty
+
+from leitor_serial import SerialReader, encode_binary_frame
+
+# =================================================================
+# ARDUINO SIMULADO (porta serial falsa via pty, sem hardware)
+# =================================================================
+# Cria um pseudo-terminal e escreve nele as leituras de um DHT falso, no
+# formato de texto do sketch original ou no formato binário em lotes do
+# leitor_serial.py. A porta é um link simbólico estável que aponta para o
+# pty atual: disconnect() fecha o pty (o leitor vê a porta cair) e
+# reconnect() cria outro no mesmo caminho, como um Arduino replugado.
+# Também injeta lixo, quadros corrompidos e quadros perdidos para exercitar
+# os contadores do leitor.
+
+
+class ArduinoSimulado:
+    """Arduino falso numa pty.
+
+    taxa: amostras por segundo.
+    modo: 'texto' ou 'binario'.
+    lote: amostras por quadro binário.
+    ruido: fração de quadros corrompidos (texto truncado ou CRC errado).
+    perda: fração de quadros binários não enviados (salto na sequência).
+    """
+
+    def __init__(self, taxa=1.0, modo='texto', lote=1, ruido=0.0, perda=0.0, seed=0):
+        self.taxa = taxa
+        self.modo = modo
+        self.lote = lote
+        self.ruido = ruido
+        self.perda = perda
+        self._random = random.Random(seed)
+        self._pasta = tempfile.mkdtemp(prefix='arduino_')
+        self.port = os.path.join(self._pasta, 'ttyFAKE')
+        self._lock = threading.Lock()
+        self._master = None
+        self._slave = None
+        self._parar = threading.Event()
+        self.seq = 0
+        self.stats = {"enviadas": 0, "corrompidas": 0, "perdidas": 0, "quadros": 0}
+        self.reconnect()
+
+    def reconnect(self):
+        """(Re)cria o pty e aponta a porta estável para ele."""
+        master, slave = pty.openpty()
+        tty.setraw(slave) # Sem eco nem tradução de fim de linha
+        temporario = self.port + '.novo'
+        os.symlink(os.ttyname(slave), temporario)
+        os.replace(temporario, self.port)
+        with self._lock:
+            self._master, self._slave = master, slave
+
+    def disconnect(self):
+        """Fecha o pty: leituras pendentes no leitor falham como num cabo solto."""
+        with self._lock:
+            master, slave = self._master, self._slave
+            self._master = self._slave = None
+        for fd in (master, slave):
+            if fd is not None:
+                os.close(fd)
+
+    def write(self, data):
+        with self._lock:
+            if self._master is None:
+                return False
+            try:
+                os.write(self._master, data)
+            except OSError:
+                return False
+        return True
+
+    def _leitura(self, t):
+        # Oscilação lenta, como um ambiente real
+        return 25.0 + 3.0 * ((t / 60.0) % 1.0), 60.0 + 10.0 * ((t / 90.0) % 1.0)
+
+    def _quadro(self):
+        agora = time.time()
+        corromper = self._random.random() < self.ruido
+        if self.modo == 'texto':
+            temperatura, umidade = self._leitura(agora)
+            linha = f"Temp:{temperatura:.2f},Hum:{umidade:.2f}\n".encode()
+            return (linha[:5] + b'\n' if corromper else linha), 1, corromper
+        intervalo_ms = 1000.0 / self.taxa
+        amostras = [(*self._leitura(agora), (self.lote - 1 - i) * intervalo_ms) for i in range(self.lote)]
+        quadro = bytearray(encode_binary_frame(self.seq, amostras))
+        if corromper:
+            quadro[-1] ^= 0xFF
+        return bytes(quadro), len(amostras), corromper
+
+    def _enviar(self):
+        periodo = self.lote / self.taxa if self.modo == 'binario' else 1.0 / self.taxa
+        proximo = time.monotonic()
+        while not self._parar.is_set():
+            quadro, n, corrompido = self._quadro()
+            if self.modo == 'binario' and self._random.random() < self.perda:
+                self.stats["perdidas"] += n
+            elif self.write(quadro):
+                self.stats["quadros"] += 1
+                self.stats["corrompidas" if corrompido else "enviadas"] += n
+            self.seq = (self.seq + n) & 0xFFFF
+            proximo += periodo
+            self._parar.wait(max(0.0, proximo - time.monotonic()))
+
+    def start(self):
+        threading.Thread(target=self._enviar, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._parar.set()
+        self.disconnect()
+
+
+def testar(args):
+    """Roda o SerialReader contra o Arduino simulado, com uma queda no meio."""
+    arduino = ArduinoSimulado(args.taxa, args.modo, args.lote, args.ruido, args.perda).start()
+    recebidas = []
+    leitor = SerialReader(arduino.port, 115200, recebidas.extend, settle=0, backoff_min=0.2, backoff_max=1.0)
+    parar = threading.Event()
+    threading.Thread(target=leitor.run, args=(parar,), daemon=True).start()
+
+    time.sleep(args.testar / 2)
+    print("Desconectando o Arduino simulado por 1 s...")
+    arduino.disconnect()
+    time.sleep(1.0)
+    arduino.reconnect()
+    time.sleep(args.testar / 2)
+    parar.set()
+    arduino.stop()
+
+    s = leitor.stats()
+    print(f"Arduino: {arduino.stats['quadros']} quadros, {arduino.stats['enviadas']} amostras válidas, "
+          f"{arduino.stats['corrompidas']} corrompidas, {arduino.stats['perdidas']} não enviadas")
+    print(f"Leitor: {len(recebidas)} amostras em {s['reads']} leituras "
+          f"({len(recebidas) / max(1, s['reads']):.1f} amostras/leitura), {s['bytes']} bytes")
+    print(f"        erros de parse: {s['parse_errors']} | amostras perdidas: {s['dropped_samples']} | "
+          f"reconexões: {s['reconnects']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arduino falso numa pty para testar a leitura serial sem hardware.")
+    parser.add_argument('--taxa', type=float, default=1.0, help="Amostras por segundo")
+    parser.add_argument('--modo', choices=('texto', 'binario'), default='texto')
+    parser.add_argument('--lote', type=int, default=1, help="Amostras por quadro binário")
+    parser.add_argument('--ruido', type=float, default=0.0, help="Fração de quadros corrompidos")
+    parser.add_argument('--perda', type=float, default=0.0, help="Fração de quadros binários perdidos")
+    parser.add_argument('--testar', type=float, metavar='SEGUNDOS',
+                        help="Lê a porta com o SerialReader por N segundos e mostra os contadores")
+    args = parser.parse_args()
+
+    if args.testar:
+        testar(args)
+        return
+    arduino = ArduinoSimulado(args.taxa, args.modo, args.lote, args.ruido, args.perda).start()
+    print(f"Arduino simulado em {arduino.port}. Para usar com a RPi:\n"
+          f"    FUNGOEYE_ARDUINO_PORT={arduino.port} python app_rpi.py")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        arduino.stop()
+
+
+if __name__ == '__main__':
+    main()
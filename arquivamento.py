@@ -0,0 +1,281 @@
+import errno
+import os
+import queue
+import shutil
+import threading
+import time
+
+import cv2
+
+# =================================================================
+# ARQUIVAMENTO DAS CAPTURAS (Imagens_RAW -> Analises_Concluidas)
+# =================================================================
+# Cada captura recebida é salva em Imagens_RAW/ e, depois da predição,
+# movida para Analises_Concluidas/ com o horário e o resultado no nome.
+# Tudo roda num grupo de threads de gravação, fora do caminho da inferência:
+#   - a codificação JPEG e a escrita em disco acontecem nas threads; quem
+#     chama só enfileira (se o disco estiver lento e a fila cheia, a imagem
+#     deixa de ser arquivada em vez de atrasar a predição);
+#   - cada arquivo é escrito num temporário oculto, sincronizado (fsync) e
+#     renomeado para o nome final: um crash nunca deixa um JPEG pela metade
+#     (só temporários, apagados na próxima inicialização);
+#   - a "movimentação" é um rename atômico, não uma segunda escrita;
+#   - as pastas são divididas por data (AAAA/MM/DD) para nenhuma acumular
+#     milhões de arquivos.
+# Uma imagem que ficou em Imagens_RAW/ após um crash é uma captura cuja
+# análise não foi concluída.
+
+SUFIXO_TEMPORARIO = '.tmp'
+
+
+def date_shard(directory, timestamp):
+    """Subpasta AAAA/MM/DD de directory para o timestamp (hora local)."""
+    return os.path.join(directory, time.strftime('%Y/%m/%d', time.localtime(timestamp)))
+
+
+def _nome_seguro(texto):
+    """Nome de nó ('192.168.0.14:8080') em forma segura para arquivo."""
+    return ''.join(c if c.isalnum() or c in '-_.' else '-' for c in str(texto))
+
+
+def _escrever_atomico(path, data):
+    """Grava bytes em path via temporário + fsync + rename (tudo ou nada)."""
+    pasta, nome = os.path.split(path)
+    os.makedirs(pasta, exist_ok=True)
+    temporario = os.path.join(pasta, '.' + nome + SUFIXO_TEMPORARIO)
+    with open(temporario, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, path)
+
+
+def _mover_atomico(origem, destino):
+    """Rename atômico de origem para destino. Se as pastas estiverem em
+    discos diferentes (rename impossível), copia para um temporário no
+    destino, renomeia e só então apaga a origem."""
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    try:
+        os.replace(origem, destino)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        pasta, nome = os.path.split(destino)
+        temporario = os.path.join(pasta, '.' + nome + SUFIXO_TEMPORARIO)
+        with open(origem, 'rb') as fonte, open(temporario, 'wb') as alvo:
+            shutil.copyfileobj(fonte, alvo)
+            alvo.flush()
+            os.fsync(alvo.fileno())
+        os.replace(temporario, destino)
+        os.remove(origem)
+
+
+class ArchiveJob:
+    """Uma captura no arquivamento: arquivo RAW e, após conclude(), o destino final."""
+
+    def __init__(self, frame, raw_path, tag):
+        self.frame = frame            # Liberado assim que o RAW é gravado
+        self.raw_path = raw_path
+        self.tag = tag                # '<nó>_<ID da captura>', repetido no nome final
+        self.final_path = None        # Definido por conclude()
+        self.written = False          # RAW já está no disco
+        self.discarded = False        # discard(): o RAW é apagado em vez de movido
+        self.done = threading.Event() # RAW movido ou apagado (ou erro)
+        self.error = None
+
+
+class Archiver:
+    """Grava as capturas em raw_dir e as move para done_dir, em segundo plano.
+
+    workers: threads de gravação (codificação JPEG + escrita).
+    max_pending: capturas aguardando gravação a partir das quais novas
+    capturas não são arquivadas (limita a memória presa em frames quando o
+    disco não acompanha).
+    counters: StageCounters opcional ('arquivo_raw', 'arquivo_movido',
+    'arquivo_descartado', 'arquivo_cancelado', 'arquivo_erro').
+    """
+
+    def __init__(self, raw_dir='Imagens_RAW', done_dir='Analises_Concluidas', workers=2,
+                 max_pending=64, jpeg_quality=95, counters=None):
+        self.raw_dir = raw_dir
+        self.done_dir = done_dir
+        self.workers = workers
+        self.max_pending = max_pending
+        self.jpeg_quality = jpeg_quality
+        self.counters = counters
+
+        self._queue = queue.Queue() # Limitado por max_pending em save_raw()
+        self._lock = threading.Lock()
+        self._pending_writes = 0
+        self._threads = []
+        self._started = False
+
+    def _record(self, stage, n=1, seconds=0.0):
+        if self.counters is not None:
+            self.counters.record(stage, n, seconds)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        # Apaga os temporários de um crash anterior antes de as threads de
+        # gravação começarem (senão a limpeza poderia apagar um temporário em
+        # uso); as gravações pedidas enquanto isso esperam na fila
+        threading.Thread(target=self._start_workers, name="Archiver-inicio", daemon=True).start()
+
+    def _start_workers(self):
+        try:
+            self.cleanup_partial()
+        except Exception as e:
+            print(f"Erro ao limpar temporários do arquivamento: {e}")
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"Archiver-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    # --- API usada pelo caminho da inferência (não bloqueia) ---
+
+    def save_raw(self, frame, timestamp, node='rpi', capture_id=0):
+        """Enfileira a gravação do frame (BGR) em raw_dir. Retorna o ArchiveJob,
+        ou None se a fila está cheia (a captura não será arquivada)."""
+        self._ensure_started()
+        with self._lock:
+            if self._pending_writes >= self.max_pending:
+                self._record('arquivo_descartado')
+                return None
+            self._pending_writes += 1
+        tag = f"{_nome_seguro(node)}_{capture_id}"
+        nome = f"{time.strftime('%H%M%S', time.localtime(timestamp))}_{tag}.jpg"
+        job = ArchiveJob(frame, os.path.join(date_shard(self.raw_dir, timestamp), nome), tag)
+        self._queue.put(('gravar', job))
+        return job
+
+    def conclude(self, job, timestamp, label, prob):
+        """Define o destino final (horário + resultado no nome) e agenda a
+        movimentação assim que o RAW estiver gravado. Retorna o caminho final,
+        ou None se job é None ou a gravação do RAW já falhou. O arquivo aparece
+        lá em segundo plano: o caminho só é válido depois que job.done estiver
+        setado com job.error None."""
+        if job is None:
+            return None
+        horario = time.strftime('%Y%m%d_%H%M%S', time.localtime(timestamp))
+        nome = f"{horario}_{int(timestamp * 1000) % 1000:03d}_{job.tag}_{label}_{prob:.3f}.jpg"
+        final_path = os.path.join(date_shard(self.done_dir, timestamp), nome)
+        with self._lock:
+            if job.error is not None or job.discarded:
+                return None
+            job.final_path = final_path
+            mover = job.written # Senão, a thread que gravar o RAW já faz a movimentação
+        if mover:
+            self._queue.put(('mover', job))
+        return final_path
+
+    def discard(self, job):
+        """Desiste de uma captura sem resultado (ex.: erro na predição): o RAW
+        é apagado em vez de movido, para não ficar órfão em raw_dir (a captura
+        volta no próximo lote). Não faz nada se job é None ou já concluído."""
+        if job is None:
+            return
+        with self._lock:
+            if job.final_path is not None or job.discarded or job.error is not None:
+                return
+            job.discarded = True
+            apagar = job.written # Senão, a thread que gravar o RAW já o apaga
+        if apagar:
+            self._queue.put(('apagar', job))
+
+    # --- Threads de gravação ---
+
+    def _run(self):
+        while True:
+            tarefa, job = self._queue.get()
+            try:
+                if tarefa == 'gravar':
+                    self._write(job)
+                elif tarefa == 'mover':
+                    self._move(job)
+                else:
+                    self._remove(job)
+            except Exception as e:
+                self._record('arquivo_erro')
+                with self._lock:
+                    job.error = e
+                job.done.set()
+                print(f"Erro no arquivamento de {job.raw_path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, job):
+        inicio = time.perf_counter()
+        with self._lock:
+            descartado = job.discarded
+        if descartado: # Descartado antes de a gravação começar: nada a escrever
+            job.frame = None
+            with self._lock:
+                self._pending_writes -= 1
+            self._record('arquivo_cancelado')
+            job.done.set()
+            return
+        try:
+            ok, encoded = cv2.imencode('.jpg', job.frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                raise ValueError("falha ao codificar o JPEG")
+            _escrever_atomico(job.raw_path, encoded.tobytes())
+        finally:
+            job.frame = None
+            with self._lock:
+                self._pending_writes -= 1
+        self._record('arquivo_raw', 1, time.perf_counter() - inicio)
+        with self._lock:
+            job.written = True
+            mover = job.final_path is not None
+            apagar = job.discarded
+        if mover:
+            self._move(job)
+        elif apagar:
+            self._remove(job)
+
+    def _move(self, job):
+        inicio = time.perf_counter()
+        _mover_atomico(job.raw_path, job.final_path)
+        self._record('arquivo_movido', 1, time.perf_counter() - inicio)
+        job.done.set()
+
+    def _remove(self, job):
+        try:
+            os.remove(job.raw_path)
+        except FileNotFoundError:
+            pass
+        self._record('arquivo_cancelado')
+        job.done.set()
+
+    def cleanup_partial(self):
+        """Apaga temporários deixados por um crash. Retorna quantos foram apagados."""
+        apagados = 0
+        for raiz in (self.raw_dir, self.done_dir):
+            for pasta, _, arquivos in os.walk(raiz):
+                for nome in arquivos:
+                    if nome.startswith('.') and nome.endswith(SUFIXO_TEMPORARIO):
+                        try:
+                            os.remove(os.path.join(pasta, nome))
+                            apagados += 1
+                        except OSError:
+                            pass
+        if apagados:
+            print(f"Arquivamento: {apagados} arquivo(s) temporário(s) de uma execução anterior apagado(s).")
+        return apagados
+
+    def wait_idle(self, timeout=None):
+        """Espera a fila esvaziar (útil ao encerrar). Retorna True se esvaziou."""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if limite is not None and time.monotonic() >= limite:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def status(self):
+        with self._lock:
+            return {"pending_writes": self._pending_writes, "max_pending": self.max_pending,
+                    "queued": self._queue.qsize(), "workers": len(self._threads)}
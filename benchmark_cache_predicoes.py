@@ -0,0 +1,102 @@
+import os
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import argparse
+import glob
+import time
+
+import cv2
+import numpy as np
+
+# =================================================================
+# BENCHMARK: CACHE DE PREDIÇÕES POR HASH PERCEPTUAL
+# =================================================================
+# Simula o monitoramento contínuo de uma sala parada com as imagens de
+# Data/treino: cada imagem é uma "cena" capturada várias vezes seguidas
+# (com ruído do sensor) e, no meio da sequência, aparece uma mancha escura
+# (o fungo que a CNN precisa ver). Cada captura passa por
+# servidor_pc.predict_batch sem cache e com o cache, e o benchmark mostra:
+# ms por captura, fração de acertos (forward passes evitados) e quanto as
+# probabilidades/rótulos com cache diferem das calculadas sem cache.
+# Sem --modelo, usa a arquitetura do treinar_modelo.py sem treino (custo
+# real de um forward pass, mas os pesos aleatórios não servem para acurácia).
+
+PASTA_PROJETO = os.path.dirname(os.path.abspath(__file__))
+
+
+def carregar_cenas(pasta, limite):
+    arquivos = sorted(glob.glob(os.path.join(pasta, '*', '*')))[:limite]
+    cenas = [cv2.imread(f) for f in arquivos]
+    return [cv2.resize(c, (128, 128), interpolation=cv2.INTER_AREA) for c in cenas if c is not None]
+
+
+def gerar_capturas(cenas, capturas, ruido, raio, seed=0):
+    """Capturas em ordem: cada cena repetida com ruído; da metade em diante, com uma mancha."""
+    rng = np.random.default_rng(seed)
+    sequencia = []
+    for cena in cenas:
+        centro = tuple(int(v) for v in rng.integers(raio, 128 - raio, 2))
+        com_mancha = cv2.circle(cena.copy(), centro, raio, (30, 40, 35), -1)
+        for i in range(capturas):
+            base = cena if i < capturas // 2 else com_mancha
+            sequencia.append(np.clip(base + rng.normal(0, ruido, base.shape), 0, 255).astype(np.uint8))
+    return sequencia
+
+
+def executar(servidor_pc, capturas, cache):
+    servidor_pc.prediction_cache = cache
+    servidor_pc.predict_batch(capturas[:1]) # Aquecimento
+    if cache is not None:
+        cache.clear()
+        cache.hits = cache.misses = cache.near_hits = cache.evictions = 0
+    probs = []
+    inicio = time.perf_counter()
+    for captura in capturas: # Uma captura por vez, como no monitoramento contínuo
+        probs.append(float(servidor_pc.predict_batch([captura])[0][0]))
+    ms = (time.perf_counter() - inicio) * 1000 / len(capturas)
+    return np.array(probs), ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forward passes evitados e diferença nos resultados com o cache de predições.")
+    parser.add_argument('--dados', default=os.path.join(PASTA_PROJETO, 'Data', 'treino'))
+    parser.add_argument('--modelo', help="Modelo .h5/.tflite (padrão: arquitetura sem treino)")
+    parser.add_argument('--cenas', type=int, default=40, help="Imagens de Data/treino usadas como cenas")
+    parser.add_argument('--capturas', type=int, default=20, help="Capturas seguidas de cada cena")
+    parser.add_argument('--ruido', type=float, default=2.0, help="Desvio padrão do ruído do sensor (níveis de cinza)")
+    parser.add_argument('--raio', type=int, default=6, help="Raio (px) da mancha que aparece no meio de cada cena")
+    parser.add_argument('--hash', choices=('phash', 'dhash'), default='phash')
+    parser.add_argument('--distancias', type=int, nargs='+', default=[0, 2, 4, 8], help="Tolerâncias (bits) testadas")
+    args = parser.parse_args()
+
+    import servidor_pc
+    from cache_predicoes import PredictionCache
+
+    if args.modelo:
+        modelo, predict_fn = servidor_pc.load_backend_model(args.modelo)
+    else:
+        from treinar_modelo import construir_modelo
+        modelo = construir_modelo()
+        predict_fn = servidor_pc.compile_model_fn(modelo)
+    servidor_pc.use_model(predict_fn, modelo, version='benchmark')
+
+    capturas = gerar_capturas(carregar_cenas(args.dados, args.cenas), args.capturas, args.ruido, args.raio)
+    referencia, ms_sem = executar(servidor_pc, capturas, None)
+    rotulos = referencia >= servidor_pc.HEALTHY_THRESHOLD
+
+    print(f"{len(capturas)} capturas ({args.capturas} por cena, mancha de raio {args.raio} px na metade) | "
+          f"ruído sigma={args.ruido} | hash: {args.hash}")
+    print(f"{'cache':>12} | {'ms/captura':>10} | {'acertos':>8} | {'aprox.':>6} | {'máx |dp|':>8} | {'rótulos trocados':>16}")
+    print(f"{'sem cache':>12} | {ms_sem:>10.3f} | {'-':>8} | {'-':>6} | {'-':>8} | {'-':>16}")
+    for distancia in args.distancias:
+        cache = PredictionCache(max_entries=256, max_distance=distancia, method=args.hash)
+        probs, ms = executar(servidor_pc, capturas, cache)
+        stats = cache.stats()
+        trocados = int(np.sum((probs >= servidor_pc.HEALTHY_THRESHOLD) != rotulos))
+        print(f"{f'<= {distancia} bits':>12} | {ms:>10.3f} | {stats['hit_rate'] * 100:>7.1f}% | {stats['near_hits']:>6} | "
+              f"{np.max(np.abs(probs - referencia)):>8.4f} | {trocados:>16}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+# =================================================================
+# TESTE DE CARGA DO SERVIDOR DA RPi (dev x producao)
+# =================================================================
+# Sobe o app_rpi.py com câmera e Arduino simulados (--simulado) em outro
+# processo e aumenta o número de espectadores do /video_feed em degraus.
+# Em cada degrau, enquanto os espectadores assistem, um cliente consulta o
+# /api/sensor como a página web faz e mede a latência. Um degrau "passa" se
+# todos os espectadores continuam recebendo pelo menos FPS_MINIMO da taxa
+# da câmera e o p99 do /api/sensor fica abaixo de P99_MAXIMO_MS.
+# Mostra, por modo: máximo de espectadores aprovados, p99 do /api/sensor,
+# memória (RSS) e threads do processo do servidor.
+
+PASTA_PROJETO = os.path.dirname(os.path.abspath(__file__))
+HOST = '127.0.0.1'
+NIVEIS = (1, 4, 16, 64, 128, 256)
+FPS_MINIMO = 0.5          # Fração do FPS da câmera que cada espectador precisa receber
+P99_MAXIMO_MS = 250.0
+SEPARADOR = b'--frame'
+
+
+def processo_info(pid):
+    """(RSS em MB, número de threads) de um processo (Linux, /proc)."""
+    rss, threads = 0.0, 0
+    with open(f'/proc/{pid}/status') as f:
+        for linha in f:
+            if linha.startswith('VmRSS:'):
+                rss = int(linha.split()[1]) / 1024
+            elif linha.startswith('Threads:'):
+                threads = int(linha.split()[1])
+    return rss, threads
+
+
+async def espectador(porta, contagem, indice, parar):
+    """Assiste o /video_feed contando as partes recebidas."""
+    try:
+        reader, writer = await asyncio.open_connection(HOST, porta)
+    except OSError:
+        return
+    writer.write(f"GET /video_feed HTTP/1.1\r\nHost: {HOST}\r\n\r\n".encode())
+    await writer.drain()
+    resto = b''
+    try:
+        while not parar.is_set():
+            dados = await reader.read(256 * 1024)
+            if not dados:
+                break
+            bloco = resto + dados
+            contagem[indice] += bloco.count(SEPARADOR)
+            resto = bloco[-(len(SEPARADOR) - 1):]
+    except (ConnectionError, OSError):
+        pass
+    finally:
+        writer.close()
+
+
+async def consultar_sensor(porta):
+    """Uma requisição ao /api/sensor (conexão nova, como um navegador simples). Retorna ms."""
+    inicio = time.perf_counter()
+    reader, writer = await asyncio.open_connection(HOST, porta)
+    writer.write(f"GET /api/sensor HTTP/1.1\r\nHost: {HOST}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    resposta = await reader.read()
+    writer.close()
+    if not resposta.startswith(b'HTTP/1.1 200') and not resposta.startswith(b'HTTP/1.0 200'):
+        raise RuntimeError(resposta[:80])
+    return (time.perf_counter() - inicio) * 1000
+
+
+async def medir_nivel(porta, pid, espectadores, duracao, taxa_sensor):
+    contagem = [0] * espectadores
+    parar = asyncio.Event()
+    tarefas = [asyncio.create_task(espectador(porta, contagem, i, parar)) for i in range(espectadores)]
+    await asyncio.sleep(1.0) # Conexões estabelecidas e câmera no FPS cheio
+    contagem[:] = [0] * espectadores
+    latencias, erros = [], 0
+    inicio = time.monotonic()
+    while time.monotonic() - inicio < duracao:
+        try:
+            latencias.append(await asyncio.wait_for(consultar_sensor(porta), 5.0))
+        except Exception:
+            erros += 1
+        await asyncio.sleep(1.0 / taxa_sensor)
+    decorrido = time.monotonic() - inicio
+    rss, threads = processo_info(pid) # Com todos os espectadores ainda conectados
+    fps = sorted(c / decorrido for c in contagem)
+    parar.set()
+    for tarefa in tarefas:
+        tarefa.cancel()
+    await asyncio.gather(*tarefas, return_exceptions=True)
+    latencias.sort()
+    p99 = latencias[min(len(latencias) - 1, int(0.99 * len(latencias)))] if latencias else float('inf')
+    return fps, p99, erros, rss, threads
+
+
+def esperar_servidor(porta, processo, timeout=30):
+    import socket
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError("o servidor terminou ao iniciar")
+        try:
+            socket.create_connection((HOST, porta), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("o servidor não respondeu")
+
+
+def testar_modo(modo, porta, niveis, duracao, fps_camera, taxa_sensor):
+    processo = subprocess.Popen(
+        [sys.executable, 'app_rpi.py', '--servidor', modo, '--simulado', '--host', HOST, '--porta', str(porta)],
+        cwd=PASTA_PROJETO, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    resultados = []
+    try:
+        esperar_servidor(porta, processo)
+        time.sleep(1.0)
+        for n in niveis:
+            fps, p99, erros, rss, threads = asyncio.run(medir_nivel(porta, processo.pid, n, duracao, taxa_sensor))
+            pior = fps[0] if fps else 0.0
+            passou = pior >= FPS_MINIMO * fps_camera and p99 <= P99_MAXIMO_MS and erros == 0
+            resultados.append((n, pior, fps[len(fps) // 2], p99, erros, rss, threads, passou))
+            print(f"{modo:>9} | {n:>5} | {pior:>8.1f} | {fps[len(fps) // 2]:>8.1f} | {p99:>8.1f} | "
+                  f"{erros:>5} | {rss:>7.0f} | {threads:>7} | {'ok' if passou else 'FALHOU'}")
+            if not passou:
+                break
+    finally:
+        processo.terminate()
+        processo.wait(timeout=10)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Espectadores simultâneos e p99 do /api/sensor: servidor dev x producao.")
+    parser.add_argument('--modos', nargs='+', default=['dev', 'producao'], choices=('dev', 'producao'))
+    parser.add_argument('--niveis', type=int, nargs='+', default=list(NIVEIS), help="Espectadores em cada degrau")
+    parser.add_argument('--duracao', type=float, default=5.0, help="Segundos medidos em cada degrau")
+    parser.add_argument('--taxa-sensor', type=float, default=20.0, help="Consultas ao /api/sensor por segundo")
+    parser.add_argument('--porta', type=int, default=8190)
+    args = parser.parse_args()
+
+    sys.path.insert(0, PASTA_PROJETO)
+    from app_rpi import CAMERA_FPS_ACTIVE
+
+    print(f"Câmera simulada a {CAMERA_FPS_ACTIVE} FPS | aprovação: pior espectador >= "
+          f"{FPS_MINIMO * CAMERA_FPS_ACTIVE:.0f} FPS e p99 /api/sensor <= {P99_MAXIMO_MS:.0f} ms")
+    print(f"{'modo':>9} | {'esp.':>5} | {'FPS pior':>8} | {'FPS med.':>8} | {'p99 ms':>8} | "
+          f"{'erros':>5} | {'RSS MB':>7} | {'threads':>7} |")
+    resumo = {}
+    for i, modo in enumerate(args.modos):
+        resultados = testar_modo(modo, args.porta + i, args.niveis, args.duracao, CAMERA_FPS_ACTIVE, args.taxa_sensor)
+        aprovados = [r for r in resultados if r[-1]]
+        resumo[modo] = (aprovados[-1][0], aprovados[-1][3]) if aprovados else (0, None)
+
+    print()
+    for modo, (maximo, p99) in resumo.items():
+        p99_texto = f"{p99:.1f} ms" if p99 is not None else "-"
+        print(f"{modo:>9}: máximo de espectadores simultâneos = {maximo} | p99 /api/sensor nesse nível = {p99_texto}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import os
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1") # Mede somente em CPU
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import argparse
+import statistics
+import threading
+import time
+
+import numpy as np
+
+import servidor_pc
+from treinar_modelo import construir_modelo
+
+# =================================================================
+# BENCHMARK: model.predict por frame x motor de micro-lotes (CPU)
+# =================================================================
+# Para cada tamanho de lote mede a vazão (imagens/s) e a latência por lote
+# de três caminhos: model.predict (como era), a chamada compilada
+# (tf.function) e o InferenceEngine recebendo frames de várias threads.
+
+TAMANHOS_LOTE = (1, 8, 32, 128)
+
+
+def carregar_modelo():
+    """Usa o modelo treinado se existir; senão, a mesma arquitetura sem treino."""
+    servidor_pc.prediction_cache = None # Os mesmos frames se repetem entre as medições
+    if os.path.exists(servidor_pc.MODELO_PATH):
+        servidor_pc.load_ml_model()
+    else:
+        print(f"'{servidor_pc.MODELO_PATH}' não encontrado: usando arquitetura sem treino.")
+        modelo = construir_modelo()
+        servidor_pc.use_model(servidor_pc.compile_model_fn(modelo), modelo, version='sem-treino')
+
+
+def cronometrar(fn, repeticoes):
+    """Executa fn repetidas vezes (após aquecimento) e retorna latências em ms."""
+    fn()
+    latencias = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        fn()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    return latencias
+
+
+def medir_motor(frames, tamanho_lote, produtores=4):
+    """Envia todos os frames ao motor a partir de várias threads. Retorna imagens/s."""
+    engine = servidor_pc.InferenceEngine(servidor_pc.predict_batch, max_batch_size=tamanho_lote)
+    engine.predict_many(frames[:tamanho_lote]) # Aquecimento
+
+    partes = [frames[i::produtores] for i in range(produtores)]
+    threads = [threading.Thread(target=engine.predict_many, args=(parte,)) for parte in partes]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(frames) / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão e latência da inferência em CPU por tamanho de lote.")
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--frames-motor', type=int, default=512)
+    args = parser.parse_args()
+
+    carregar_modelo()
+    model, model_fn = servidor_pc.model, servidor_pc.model_fn
+    rng = np.random.default_rng(0)
+    shape = (servidor_pc.IMAGE_HEIGHT, servidor_pc.IMAGE_WIDTH, 3)
+    frames = list(rng.integers(0, 256, (args.frames_motor,) + shape, dtype=np.uint8))
+
+    print(f"\n{'Lote':>5} | {'predict img/s':>14} {'p50 ms':>8} | {'compilado img/s':>16} {'p50 ms':>8} | {'motor img/s':>12}")
+    for tamanho in TAMANHOS_LOTE:
+        lote = np.stack(frames[:tamanho])
+        lote_float = lote.astype('float32') / 255.0
+
+        lat_predict = cronometrar(lambda: model.predict(lote_float, verbose=0), args.repeticoes)
+        lat_compilado = cronometrar(lambda: model_fn(lote), args.repeticoes)
+        vazao_motor = medir_motor(frames, tamanho)
+
+        p50_predict = statistics.median(lat_predict)
+        p50_compilado = statistics.median(lat_compilado)
+        print(f"{tamanho:>5} | {tamanho / p50_predict * 1000:>14.1f} {p50_predict:>8.2f} | "
+              f"{tamanho / p50_compilado * 1000:>16.1f} {p50_compilado:>8.2f} | {vazao_motor:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+import os
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1") # Mede o pipeline, não a GPU
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import argparse
+import json
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+# =================================================================
+# BENCHMARK PONTA A PONTA SEM HARDWARE (RPi + PC)
+# =================================================================
+# Roda o caminho completo captura -> serialização -> transferência ->
+# decodificação -> predição -> arquivamento/histórico sem webcam, Arduino
+# nem modelo treinado:
+#   - app_rpi.py sobe em outro processo com --simulado (VideoCapture
+#     sintético da camera_simulada.py e Arduino falso numa pty do
+#     arduino_simulado.py, que emite "Temp:..,Hum:.." na taxa pedida);
+#   - o servidor_pc.py roda neste processo com um modelo Keras minúsculo
+#     (ou sua conversão TFLite) gerado numa pasta temporária;
+#   - o benchmark "aperta o botão" (/capture) numa taxa fixa.
+# Mostra capturas/s, latência captura -> resultado (p50/p95/p99), bytes
+# transferidos por captura e memória (RSS) dos dois processos, e salva
+# tudo em JSON para comparar execuções (--comparar anterior.json).
+
+PASTA_PROJETO = os.path.dirname(os.path.abspath(__file__))
+PASTA_RESULTADOS = os.path.join(PASTA_PROJETO, 'resultados_benchmark')
+HOST = '127.0.0.1'
+# Métricas comparadas com --comparar (nome, maior é melhor)
+METRICAS_COMPARADAS = (
+    ('capturas_por_s', True), ('latencia_p50_ms', False), ('latencia_p95_ms', False),
+    ('latencia_p99_ms', False), ('bytes_por_captura', False), ('rss_rpi_mb', False), ('rss_pc_mb', False),
+)
+
+
+def criar_modelo_stub(pasta, backend):
+    """Modelo minúsculo com a entrada/saída da CNN real (128x128x3 -> P(Saudável)).
+    Retorna o caminho do .h5 ou do .tflite, conforme o backend."""
+    import tensorflow as tf
+    from treinar_modelo import IMAGE_HEIGHT, IMAGE_WIDTH
+
+    modelo = tf.keras.Sequential([
+        tf.keras.layers.Input((IMAGE_HEIGHT, IMAGE_WIDTH, 3)),
+        tf.keras.layers.Conv2D(4, 3, strides=4, activation='relu'),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(1, activation='sigmoid'),
+    ])
+    caminho = os.path.join(pasta, 'modelo_stub.h5')
+    modelo.save(caminho)
+    if backend != 'tflite':
+        return caminho
+    from exportar_tflite import converter
+    caminho = os.path.join(pasta, 'modelo_stub.tflite')
+    with open(caminho, 'wb') as f:
+        f.write(converter(modelo, 'float32', None))
+    return caminho
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def memoria_mb(pid='self'):
+    """(RSS atual, pico de RSS) em MB de um processo (Linux, /proc)."""
+    valores = {}
+    with open(f'/proc/{pid}/status') as f:
+        for linha in f:
+            if linha.startswith(('VmRSS:', 'VmHWM:')):
+                valores[linha.split(':')[0]] = int(linha.split()[1]) / 1024
+    return valores.get('VmRSS', 0.0), valores.get('VmHWM', 0.0)
+
+
+def percentil(valores, q):
+    return valores[min(len(valores) - 1, int(q * len(valores)))] if valores else None
+
+
+def esperar_rpi(url, processo, timeout=60):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError("o app_rpi.py terminou ao iniciar")
+        try:
+            if requests.get(url + '/api/sensor', timeout=1).json().get('temperature') is not None:
+                return
+        except (requests.exceptions.RequestException, ValueError):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("o app_rpi.py não respondeu com leituras do sensor")
+
+
+def versao_git():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PASTA_PROJETO,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def executar(args, pasta):
+    porta = porta_livre()
+    url = f"http://{HOST}:{porta}"
+
+    # Configuração do servidor_pc via ambiente (lida no import)
+    os.environ.update({
+        "FUNGOEYE_RPI_NODES": f"{HOST}:{porta}",
+        "FUNGOEYE_BACKEND": args.backend,
+        "FUNGOEYE_MODELOS_DIR": os.path.join(pasta, 'modelos'),
+        "FUNGOEYE_RAW_DIR": os.path.join(pasta, 'Imagens_RAW'),
+        "FUNGOEYE_ANALISES_DIR": os.path.join(pasta, 'Analises_Concluidas'),
+        "FUNGOEYE_METRICS_PORT": "0",
+        "FUNGOEYE_TILED": "1" if args.tiled else "0",
+    })
+    modelo = criar_modelo_stub(pasta, args.backend)
+    os.environ["FUNGOEYE_MODELO_TFLITE"] = modelo
+    sys.path.insert(0, PASTA_PROJETO)
+    import servidor_pc
+    servidor_pc.MODELO_PATH = modelo
+    servidor_pc.HISTORICO_DB_PATH = os.path.join(pasta, 'historico.db')
+
+    rpi = subprocess.Popen(
+        [sys.executable, 'app_rpi.py', '--servidor', args.servidor, '--simulado', '--host', HOST,
+         '--porta', str(porta), '--taxa-sensor', str(args.taxa_sensor)],
+        cwd=PASTA_PROJETO, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    parar = threading.Event()
+    try:
+        esperar_rpi(url, rpi)
+        servidor_pc.load_ml_model()
+        node = servidor_pc.nodes[0]
+
+        # Bytes recebidos do /api/captures (corpo binário do lote)
+        recebido = {"bytes": 0}
+        def contar_bytes(response, *a, **k):
+            recebido["bytes"] += int(response.headers.get('Content-Length', 0))
+        node.session.hooks['response'].append(contar_bytes)
+
+        servidor_pc.start_polling([node], parar)
+        time.sleep(1.0) # Long-poll estabelecido
+
+        # "Aperta o botão" na taxa pedida
+        sessao = requests.Session()
+        pedidas, recusadas = 0, 0
+        inicio = time.monotonic()
+        proxima = inicio
+        while time.monotonic() - inicio < args.duracao:
+            resposta = sessao.get(url + '/capture', timeout=10)
+            pedidas += 1
+            recusadas += resposta.status_code != 200
+            proxima += 1.0 / args.taxa
+            time.sleep(max(0.0, proxima - time.monotonic()))
+        duracao = time.monotonic() - inicio
+
+        # Espera as últimas capturas saírem do pipeline
+        limite = time.monotonic() + 10
+        while node.processed < pedidas - recusadas and time.monotonic() < limite:
+            time.sleep(0.05)
+        servidor_pc.archiver.wait_idle(timeout=10)
+
+        rss_rpi, pico_rpi = memoria_mb(rpi.pid)
+        rss_pc, pico_pc = memoria_mb()
+        estagios_rpi = requests.get(url + '/api/pipeline/stats', timeout=5).json().get('stages', {})
+    finally:
+        parar.set()
+        rpi.terminate()
+        try:
+            rpi.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            rpi.kill() # Long-poll do PC ainda preso no pool da ponte WSGI
+            rpi.wait()
+
+    latencias = sorted(1000 * l for l in node.latency_samples)
+    processadas = node.processed
+    ms = lambda q: round(percentil(latencias, q), 2) if latencias else None
+    return {
+        "capturas_pedidas": pedidas,
+        "capturas_recusadas": recusadas,
+        "capturas_processadas": processadas,
+        "capturas_por_s": round(processadas / duracao, 3),
+        "latencia_p50_ms": ms(0.50),
+        "latencia_p95_ms": ms(0.95),
+        "latencia_p99_ms": ms(0.99),
+        "latencia_media_ms": round(sum(latencias) / len(latencias), 2) if latencias else None,
+        "bytes_total": recebido["bytes"],
+        "bytes_por_captura": round(recebido["bytes"] / processadas) if processadas else None,
+        "rss_rpi_mb": round(rss_rpi, 1),
+        "rss_rpi_pico_mb": round(pico_rpi, 1),
+        "rss_pc_mb": round(rss_pc, 1),
+        "rss_pc_pico_mb": round(pico_pc, 1),
+        "etapas_pc": servidor_pc.get_pipeline_stats()["stages"],
+        "etapas_rpi": estagios_rpi,
+    }
+
+
+def comparar(anterior, atual):
+    print(f"\nComparação com {anterior['_arquivo']} ({anterior.get('commit')}):")
+    for nome, maior_melhor in METRICAS_COMPARADAS:
+        antes, agora = anterior['resultados'].get(nome), atual['resultados'].get(nome)
+        if antes is None or agora is None:
+            continue
+        variacao = (agora - antes) / antes * 100 if antes else 0.0
+        piorou = variacao < -5 if maior_melhor else variacao > 5
+        print(f"  {nome:>18}: {antes:>10} -> {agora:>10} ({variacao:+.1f}%){'  <- piorou' if piorou else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ponta a ponta RPi + PC sem hardware (câmera, Arduino e modelo simulados).")
+    parser.add_argument('--duracao', type=float, default=20.0, help="Segundos disparando capturas")
+    parser.add_argument('--taxa', type=float, default=2.0, help="Capturas por segundo (/capture)")
+    parser.add_argument('--taxa-sensor', type=float, default=10.0, help="Leituras/s do Arduino simulado")
+    parser.add_argument('--servidor', choices=('dev', 'producao'), default='dev', help="Modo do servidor da RPi")
+    parser.add_argument('--backend', choices=('keras', 'tflite'), default='keras', help="Backend do modelo stub no PC")
+    parser.add_argument('--tiled', action='store_true', help="Inferência em janelas no PC")
+    parser.add_argument('--saida', help="Arquivo JSON do resultado (padrão: resultados_benchmark/ponta_a_ponta_<data>.json)")
+    parser.add_argument('--comparar', metavar='JSON', help="Resultado anterior para comparar")
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='ponta_a_ponta_')
+    try:
+        resultados = executar(args, pasta)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    r = resultados
+    print(f"\nCapturas: {r['capturas_processadas']} processadas de {r['capturas_pedidas']} pedidas "
+          f"({r['capturas_recusadas']} recusadas) | {r['capturas_por_s']:.2f} capturas/s")
+    if r['latencia_p50_ms'] is not None:
+        print(f"Latência captura -> resultado: p50 {r['latencia_p50_ms']:.1f} ms | p95 {r['latencia_p95_ms']:.1f} ms | "
+              f"p99 {r['latencia_p99_ms']:.1f} ms")
+    print(f"Transferido: {r['bytes_total']} bytes ({r['bytes_por_captura']} por captura)")
+    print(f"RSS: RPi {r['rss_rpi_mb']:.0f} MB (pico {r['rss_rpi_pico_mb']:.0f}) | "
+          f"PC {r['rss_pc_mb']:.0f} MB (pico {r['rss_pc_pico_mb']:.0f})")
+
+    documento = {
+        "data": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "commit": versao_git(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": vars(args),
+        "resultados": resultados,
+    }
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"ponta_a_ponta_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w') as f:
+        json.dump(documento, f, indent=2, ensure_ascii=False)
+    print(f"Resultado salvo em {saida}")
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            anterior = json.load(f)
+        anterior['_arquivo'] = args.comparar
+        comparar(anterior, documento)
+
+
+if __name__ == '__main__':
+    main()
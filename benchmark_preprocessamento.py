@@ -0,0 +1,80 @@
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from preprocessamento import BatchBuffer, display_image
+
+# =================================================================
+# BENCHMARK: PRÉ-PROCESSAMENTO (modelo e GUI)
+# =================================================================
+# Compara, por frame, o caminho antigo e o novo:
+#   - modelo: resize + astype(float32)/255 + expand_dims por frame (antigo)
+#     x resize/BGR->RGB direto no lote uint8 reaproveitado (BatchBuffer);
+#   - GUI: cvtColor na resolução cheia + PIL LANCZOS 300x300 (antigo)
+#     x redução com INTER_AREA e conversão sobre 300x300 (display_image).
+# Mostra o tempo médio por frame e o pico de memória alocada por frame
+# (tracemalloc, que enxerga as alocações dos arrays NumPy/OpenCV).
+
+IMAGE_SIZE = (128, 128)
+GUI_SIZE = (300, 300)
+
+
+def modelo_antigo(frames):
+    lote = []
+    for frame in frames:
+        frame = cv2.resize(frame, IMAGE_SIZE, interpolation=cv2.INTER_AREA)
+        lote.append(np.expand_dims(frame.astype(np.float32) / 255.0, axis=0))
+    return np.concatenate(lote)
+
+
+def gui_antiga(frames):
+    for frame in frames:
+        img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        img.resize(GUI_SIZE, Image.LANCZOS)
+
+
+def medir(funcao, frames, repeticoes):
+    """(ms por frame, KiB de pico por frame)."""
+    funcao(frames) # Aquecimento
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao(frames)
+    ms = (time.perf_counter() - inicio) * 1000 / (repeticoes * len(frames))
+    tracemalloc.start()
+    funcao(frames)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ms, pico / 1024 / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo e memória por frame do pré-processamento: antigo x novo.")
+    parser.add_argument('--largura', type=int, default=1280)
+    parser.add_argument('--altura', type=int, default=720)
+    parser.add_argument('--lote', type=int, default=8)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (args.altura, args.largura, 3), dtype=np.uint8) for _ in range(args.lote)]
+    buffer = BatchBuffer(args.lote, IMAGE_SIZE[1], IMAGE_SIZE[0])
+    casos = [
+        ("modelo antigo", modelo_antigo),
+        ("modelo novo", buffer.fill),
+        ("GUI antiga", gui_antiga),
+        ("GUI nova", lambda fs: [Image.fromarray(display_image(f, GUI_SIZE)) for f in fs]),
+    ]
+
+    print(f"Frames {args.largura}x{args.altura} | lote: {args.lote} | repetições: {args.repeticoes}")
+    print(f"{'Caminho':>14} | {'ms/frame':>9} | {'pico KiB/frame':>14}")
+    for nome, funcao in casos:
+        ms, kib = medir(funcao, frames, args.repeticoes)
+        print(f"{nome:>14} | {ms:>9.3f} | {kib:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from transmissor_mjpeg import MJPEGBroadcaster
+
+# =================================================================
+# BENCHMARK: CPU POR ESPECTADOR DO /video_feed
+# =================================================================
+# Simula a thread da câmera (frames sintéticos a FPS fixo) e N clientes
+# consumindo o stream, medindo o uso de CPU do processo em cada caso:
+#   legado  -> cada cliente codifica o próprio JPEG (generate_frames antigo)
+#   broadcaster -> um JPEG por frame, compartilhado (MJPEGBroadcaster)
+
+ESPECTADORES = (0, 1, 2, 4, 8, 16)
+
+
+class CameraSintetica:
+    """Publica frames sintéticos (ruído + gradiente) a um FPS fixo."""
+
+    def __init__(self, largura, altura, fps):
+        rng = np.random.default_rng(0)
+        gradiente = np.linspace(0, 255, largura, dtype=np.float32)[np.newaxis, :, np.newaxis]
+        ruido = rng.integers(0, 40, (altura, largura, 3))
+        self.frames = [np.clip(gradiente + ruido + 10 * i, 0, 255).astype(np.uint8) for i in range(8)]
+        self.intervalo = 1.0 / fps
+        self.last_frame = self.frames[0]
+        self.lock = threading.Lock()
+
+    def rodar(self, parar, publicar=None):
+        i = 0
+        while not parar.is_set():
+            frame = self.frames[i % len(self.frames)]
+            with self.lock:
+                self.last_frame = frame
+            if publicar is not None:
+                publicar(frame)
+            i += 1
+            time.sleep(self.intervalo)
+
+
+def espectador_legado(camera, parar, contagem):
+    """Cópia do generate_frames antigo: cada cliente codifica seu próprio JPEG."""
+    while not parar.is_set():
+        with camera.lock:
+            frame = camera.last_frame
+        (flag, encodedImage) = cv2.imencode(".jpg", frame)
+        parte = b'--frame\r\n' b'Content-Type: image/jpeg\r\n\r\n' + bytearray(encodedImage) + b'\r\n'
+        contagem.append(len(parte))
+        time.sleep(0.05)
+
+
+def espectador_broadcaster(broadcaster, parar, contagem):
+    for parte in broadcaster.subscribe():
+        contagem.append(len(parte))
+        if parar.is_set():
+            return
+
+
+def medir(modo, espectadores, camera, duracao):
+    """Retorna (CPU em % de um núcleo, frames entregues por espectador por segundo)."""
+    parar = threading.Event()
+    broadcaster = MJPEGBroadcaster()
+    contagens = [[] for _ in range(espectadores)]
+
+    if modo == 'legado':
+        threads = [threading.Thread(target=camera.rodar, args=(parar,))]
+        threads += [threading.Thread(target=espectador_legado, args=(camera, parar, c)) for c in contagens]
+    else:
+        threads = [threading.Thread(target=camera.rodar, args=(parar, broadcaster.publish))]
+        threads += [threading.Thread(target=espectador_broadcaster, args=(broadcaster, parar, c)) for c in contagens]
+
+    for t in threads:
+        t.start()
+    time.sleep(0.5) # Aquecimento
+    for c in contagens:
+        c.clear()
+    cpu_inicio, inicio = time.process_time(), time.perf_counter()
+    time.sleep(duracao)
+    cpu = (time.process_time() - cpu_inicio) / (time.perf_counter() - inicio) * 100
+    entregues = [len(c) / duracao for c in contagens]
+    parar.set()
+    broadcaster.close()
+    for t in threads:
+        t.join()
+    return cpu, (sum(entregues) / len(entregues) if entregues else 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU por espectador do stream MJPEG (legado x broadcaster).")
+    parser.add_argument('--largura', type=int, default=640)
+    parser.add_argument('--altura', type=int, default=480)
+    parser.add_argument('--fps', type=float, default=20)
+    parser.add_argument('--duracao', type=float, default=3.0)
+    args = parser.parse_args()
+
+    camera = CameraSintetica(args.largura, args.altura, args.fps)
+    print(f"\nFrames {args.largura}x{args.altura} a {args.fps:.0f} FPS")
+    print(f"{'Espectadores':>12} | {'legado CPU%':>11} {'fps/cliente':>11} | {'broadcaster CPU%':>16} {'fps/cliente':>11}")
+    for n in ESPECTADORES:
+        cpu_legado, fps_legado = medir('legado', n, camera, args.duracao)
+        cpu_novo, fps_novo = medir('broadcaster', n, camera, args.duracao)
+        print(f"{n:>12} | {cpu_legado:>11.1f} {fps_legado:>11.1f} | {cpu_novo:>16.1f} {fps_novo:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import logging
+import statistics
+import threading
+import time
+
+import numpy as np
+import requests
+from werkzeug.serving import make_server
+
+import app_rpi
+from protocolo_captura import CONTENT_TYPE_BINARIO, decode_capture
+
+# =================================================================
+# BENCHMARK: JSON (listas aninhadas) x BINÁRIO em /api/captured_data
+# =================================================================
+# Sobe o app Flask da RPi localmente, congela um frame sintético e mede
+# o tamanho do payload e a latência ponta a ponta (requisição HTTP +
+# serialização na RPi + reconstrução do array numpy no PC).
+
+HOST, PORT = '127.0.0.1', 8090
+
+# Silencia o log de cada requisição do servidor de desenvolvimento
+logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+
+def decode_json(response):
+    """Caminho legado do PC: JSON -> lista aninhada -> np.array."""
+    data = response.json()['data']
+    return np.array(data['image_data'], dtype=np.uint8)
+
+
+def decode_binary(response):
+    """Caminho binário do PC: bytes crus + cabeçalhos -> np.frombuffer."""
+    assert response.headers['Content-Type'].startswith(CONTENT_TYPE_BINARIO)
+    return decode_capture(response.content, response.headers)['image_data']
+
+
+def medir(session, url, decode, repeticoes):
+    """Retorna (bytes_do_payload, lista_de_latencias_ms)."""
+    latencias = []
+    tamanho = 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        response = session.get(url, timeout=10)
+        response.raise_for_status()
+        frame = decode(response)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        tamanho = len(response.content)
+    assert frame.shape == (app_rpi.IMAGE_HEIGHT, app_rpi.IMAGE_WIDTH, 3)
+    return tamanho, latencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara JSON e binário em /api/captured_data.")
+    parser.add_argument('--repeticoes', type=int, default=200)
+    args = parser.parse_args()
+
+    # Congela um frame sintético como se o botão de captura tivesse sido clicado
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (app_rpi.IMAGE_HEIGHT, app_rpi.IMAGE_WIDTH, 3), dtype=np.uint8)
+    with app_rpi.capture_lock:
+        app_rpi.captured_data.update({
+            "image_data": frame,
+            "temperature": 25.0,
+            "humidity": 80.0,
+            "timestamp": time.time(),
+        })
+
+    server = make_server(HOST, PORT, app_rpi.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    base_url = f"http://{HOST}:{PORT}/api/captured_data"
+    session = requests.Session()
+    try:
+        print(f"\n{'Formato':<10}{'Payload (KB)':>14}{'p50 (ms)':>12}{'média (ms)':>12}{'máx (ms)':>12}")
+        for nome, url, decode in (
+            ("json", base_url + "?format=json", decode_json),
+            ("binario", base_url, decode_binary),
+        ):
+            tamanho, latencias = medir(session, url, decode, args.repeticoes)
+            print(f"{nome:<10}{tamanho / 1024:>14.1f}{statistics.median(latencias):>12.2f}"
+                  f"{statistics.mean(latencias):>12.2f}{max(latencias):>12.2f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
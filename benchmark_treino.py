@@ -0,0 +1,95 @@
+import os
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1") # Compara o pipeline de dados, não a GPU
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import tensorflow as tf
+
+import treinar_modelo
+from treinar_modelo import (BATCH_SIZE, DATA_DIR, carregar_cache, construir_modelo,
+                            criar_dataset_treino, criar_gerador_treino, treinar)
+
+# =================================================================
+# BENCHMARK: PIPELINE DE DADOS DO TREINAMENTO (legado x tf.data)
+# =================================================================
+# Mede, para o ImageDataGenerator antigo e para o tf.data com cache:
+#   - imagens/s só do pipeline de dados (uma passada pelo conjunto);
+#   - tempo de parede por época treinando o modelo de verdade.
+# O cache é montado numa pasta temporária (o tempo de montagem a frio
+# também é mostrado), para não depender de execuções anteriores.
+
+
+class TempoPorEpoca(tf.keras.callbacks.Callback):
+    def __init__(self):
+        super().__init__()
+        self.tempos = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._inicio = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.tempos.append(time.perf_counter() - self._inicio)
+
+
+def medir_pipeline(lotes):
+    """Percorre os lotes e retorna imagens/s."""
+    total = 0
+    inicio = time.perf_counter()
+    for x, _ in lotes:
+        total += len(x)
+    return total / (time.perf_counter() - inicio)
+
+
+def medir_epocas(train_data, epocas):
+    """Treina um modelo novo por `epocas` épocas e retorna o tempo de cada uma."""
+    cronometro = TempoPorEpoca()
+    treinar(construir_modelo(), train_data, epocas, extra_callbacks=[cronometro])
+    return cronometro.tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Imagens/s e tempo por época: ImageDataGenerator x tf.data com cache.")
+    parser.add_argument('--epocas', type=int, default=3, help="Épocas treinadas em cada pipeline")
+    parser.add_argument('--dados', default=DATA_DIR)
+    args = parser.parse_args()
+    treinar_modelo.DATA_DIR = args.dados
+
+    pasta_cache = tempfile.mkdtemp(prefix='cache_treino_')
+    try:
+        # --- Legado ---
+        gerador = criar_gerador_treino()
+        passos = max(1, gerador.samples // BATCH_SIZE)
+        ips_legado = medir_pipeline(gerador[i] for i in range(passos))
+        tempos_legado = medir_epocas(gerador, args.epocas)
+
+        # --- tf.data ---
+        inicio = time.perf_counter()
+        imagens, rotulos, _ = carregar_cache(args.dados, pasta_cache)
+        cache_frio = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        imagens, rotulos, _ = carregar_cache(args.dados, pasta_cache)
+        cache_quente = time.perf_counter() - inicio
+
+        dataset = criar_dataset_treino(imagens, rotulos)
+        medir_pipeline(dataset) # Aquecimento (traçado das funções do tf.data)
+        ips_novo = medir_pipeline(dataset)
+        tempos_novo = medir_epocas(dataset, args.epocas)
+    finally:
+        shutil.rmtree(pasta_cache, ignore_errors=True)
+
+    # A primeira época inclui o traçado do grafo; a mediana das demais é o regime
+    regime = lambda tempos: float(np.median(tempos[1:] if len(tempos) > 1 else tempos))
+    print(f"\nImagens: {len(rotulos)} | lote: {BATCH_SIZE} | épocas medidas: {args.epocas}")
+    print(f"Cache tf.data: montagem a frio {cache_frio:.2f} s | reabertura {cache_quente * 1000:.1f} ms")
+    print(f"{'Pipeline':>10} | {'imagens/s':>10} | {'1ª época (s)':>12} | {'época (s)':>9}")
+    print(f"{'legado':>10} | {ips_legado:>10.0f} | {tempos_legado[0]:>12.2f} | {regime(tempos_legado):>9.2f}")
+    print(f"{'tf.data':>10} | {ips_novo:>10.0f} | {tempos_novo[0]:>12.2f} | {regime(tempos_novo):>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
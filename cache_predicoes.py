@@ -0,0 +1,153 @@
+import collections
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# =================================================================
+# CACHE DE PREDIÇÕES POR HASH PERCEPTUAL
+# =================================================================
+# Numa sala de armazenamento a cena quase não muda: capturas seguidas são
+# praticamente o mesmo frame, só com ruído do sensor. Cada frame vira um
+# hash perceptual curto (dHash ou pHash, calculados com NumPy sobre uma
+# miniatura em tons de cinza); se um frame com hash igual ou a poucos bits
+# de distância (Hamming) já passou pela MESMA versão do modelo, a
+# probabilidade dele é reaproveitada e a CNN não roda.
+#   - a chave inclui a versão do modelo: depois de uma troca, nada da
+#     versão anterior é reaproveitado;
+#   - as entradas expiram (max_age) para que uma mudança pequena demais
+#     para o hash (o início de uma mancha) seja reavaliada pela CNN;
+#   - LRU com tamanho fixo; contadores de acertos/falhas em stats().
+# O padrão (max_distance=0) só reaproveita hashes idênticos; aceitar alguns
+# bits de distância aumenta os acertos, mas entrega a probabilidade de outro
+# frame, então fica a critério de cada instalação.
+# Nas imagens de Data/treino (128x128), o pHash 16x16 muda no máximo 4 bits
+# com ruído gaussiano sigma=2 e na mediana 12 a 29 bits com uma mancha escura
+# de raio 3 a 10 px; o dHash quase não percebe as manchas, por isso o pHash
+# é o padrão.
+
+HASHES = ('dhash', 'phash')
+
+
+def _cinza(frame, largura, altura):
+    """Miniatura float32 em tons de cinza (média dos canais: independe de RGB/BGR)."""
+    pequeno = cv2.resize(frame, (largura, altura), interpolation=cv2.INTER_AREA)
+    if pequeno.ndim == 3:
+        return pequeno.mean(axis=2, dtype=np.float32)
+    return pequeno.astype(np.float32)
+
+
+def _bits_para_int(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def dhash(frame, hash_size=16):
+    """Hash de diferença: 1 onde cada célula da miniatura é mais clara que a
+    vizinha da direita. hash_size² bits, como int."""
+    cinza = _cinza(frame, hash_size + 1, hash_size)
+    return _bits_para_int(cinza[:, 1:] > cinza[:, :-1])
+
+
+_DCT = {}
+
+
+def _matriz_dct(n):
+    """Matriz da DCT-II ortonormal n x n (calculada uma vez por tamanho)."""
+    matriz = _DCT.get(n)
+    if matriz is None:
+        k = np.arange(n)[:, np.newaxis]
+        i = np.arange(n)[np.newaxis, :]
+        matriz = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+        matriz[0] /= np.sqrt(2.0)
+        matriz = _DCT[n] = matriz.astype(np.float32)
+    return matriz
+
+
+def phash(frame, hash_size=16, fator=4):
+    """Hash da DCT: frequências baixas (hash_size x hash_size) de uma
+    miniatura de (hash_size * fator)², comparadas com a mediana."""
+    n = hash_size * fator
+    dct = _matriz_dct(n)
+    coeficientes = (dct @ _cinza(frame, n, n) @ dct.T)[:hash_size, :hash_size]
+    return _bits_para_int(coeficientes > np.median(coeficientes.ravel()[1:])) # Sem o termo DC
+
+
+class PredictionCache:
+    """Cache LRU de P(Saudável) por (versão do modelo, hash perceptual). Seguro entre threads.
+
+    max_entries: tamanho máximo (a entrada usada há mais tempo sai primeiro).
+    max_distance: bits diferentes (distância de Hamming) aceitos entre o hash
+        do frame e o de uma entrada; 0 exige hash idêntico.
+    max_age: segundos até uma entrada expirar (None = sem expiração).
+    method: 'dhash' ou 'phash'; hash_size: lado da grade do hash (hash_size² bits).
+    """
+
+    def __init__(self, max_entries=256, max_distance=0, max_age=300.0, method='phash', hash_size=16):
+        if method not in HASHES:
+            raise ValueError(f"Hash desconhecido: {method!r} (use {', '.join(HASHES)})")
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self.method = method
+        self.hash_size = hash_size
+        self._hash_fn = dhash if method == 'dhash' else phash
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict() # (versão, hash) -> (P(Saudável), instante)
+        self.hits = 0
+        self.misses = 0
+        self.near_hits = 0 # Acertos com distância > 0
+        self.evictions = 0
+
+    def hash(self, frame):
+        return self._hash_fn(frame, self.hash_size)
+
+    def get(self, frame_hash, version):
+        """P(Saudável) em cache para o hash nesta versão do modelo, ou None."""
+        agora = time.monotonic()
+        with self._lock:
+            chave = (version, frame_hash)
+            entrada = self._entries.get(chave)
+            if entrada is None and self.max_distance > 0:
+                # Busca o hash mais próximo (as entradas mais recentes ganham o empate)
+                melhor = self.max_distance + 1
+                for (v, h), candidata in reversed(self._entries.items()):
+                    if v == version:
+                        distancia = (h ^ frame_hash).bit_count()
+                        if distancia < melhor:
+                            chave, entrada, melhor = (v, h), candidata, distancia
+            if entrada is not None and self.max_age is not None and agora - entrada[1] > self.max_age:
+                del self._entries[chave] # Expirada: a CNN reavalia e a entrada é refeita
+                entrada = None
+            if entrada is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(chave)
+            self.hits += 1
+            self.near_hits += chave[1] != frame_hash
+            return entrada[0]
+
+    def put(self, frame_hash, version, prob):
+        with self._lock:
+            self._entries[(version, frame_hash)] = (prob, time.monotonic())
+            self._entries.move_to_end((version, frame_hash))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "method": self.method,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / consultas if consultas else None,
+            }
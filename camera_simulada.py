@@ -0,0 +1,69 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# =================================================================
+# CÂMERA SIMULADA (substituta do cv2.VideoCapture, sem hardware)
+# =================================================================
+# Gera frames sintéticos (gradiente + ruído, com uma "mancha" que se move)
+# na resolução e no FPS pedidos, com a interface do cv2.VideoCapture usada
+# pelo CameraPipeline: isOpened(), read(image), set(), get() e release().
+# read() respeita o FPS como uma webcam (bloqueia até o próximo frame).
+
+
+class VideoCaptureSintetica:
+    """VideoCapture falso. fps=None entrega frames sem esperar."""
+
+    def __init__(self, largura=1280, altura=720, fps=30.0, quadros=16, seed=0):
+        self.largura, self.altura = largura, altura
+        self.fps = fps
+        rng = np.random.default_rng(seed)
+        gradiente = np.linspace(0, 200, largura, dtype=np.float32)[np.newaxis, :, np.newaxis]
+        base = np.clip(gradiente + rng.integers(0, 40, (altura, largura, 3)), 0, 255).astype(np.uint8)
+        self._frames = []
+        raio = max(4, min(largura, altura) // 10)
+        for i in range(quadros):
+            frame = base.copy()
+            centro = (int(largura * (0.2 + 0.6 * i / quadros)), altura // 2)
+            cv2.circle(frame, centro, raio, (40, 90, 60), -1) # "Mancha" escura que anda pela cena
+            self._frames.append(frame)
+        self._lock = threading.Lock()
+        self._i = 0
+        self._proximo = time.monotonic()
+        self._aberta = True
+        self.frames_read = 0
+
+    def isOpened(self):
+        return self._aberta
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FPS:
+            self.fps = value
+        return True
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_FRAME_WIDTH: self.largura, cv2.CAP_PROP_FRAME_HEIGHT: self.altura,
+                cv2.CAP_PROP_FPS: self.fps or 0}.get(prop, 0)
+
+    def read(self, image=None):
+        if not self._aberta:
+            return False, None
+        if self.fps:
+            # Como uma câmera real: o próximo frame só existe 1/fps depois do anterior
+            agora = time.monotonic()
+            if self._proximo > agora:
+                time.sleep(self._proximo - agora)
+            self._proximo = max(self._proximo, agora) + 1.0 / self.fps
+        with self._lock:
+            frame = self._frames[self._i % len(self._frames)]
+            self._i += 1
+            self.frames_read += 1
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame.copy()
+
+    def release(self):
+        self._aberta = False
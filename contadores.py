@@ -0,0 +1,196 @@
+import bisect
+import collections
+import contextlib
+import math
+import numbers
+import threading
+import time
+
+# =================================================================
+# CONTADORES DE VAZÃO POR ETAPA DO PIPELINE
+# =================================================================
+# Cada etapa (câmera, captura, busca, inferência...) registra quantos itens
+# processou e, opcionalmente, quanto tempo ficou ocupada. O snapshot traz o
+# total, a taxa (itens/s) e a fração de tempo ocupado na janela recente:
+# a etapa mais perto de 100% ocupada é o gargalo.
+# Cada registro cronometrado também entra num histograma de latência por
+# etapa (baldes fixos, custo de um bisect), exportado em formato texto do
+# Prometheus pelo /metrics da RPi e do PC para acompanhar regressões.
+
+# Limites (s) dos baldes dos histogramas de latência (padrão do Prometheus + 30 s)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class StageCounters:
+    """Contadores de itens e tempo ocupado por etapa, com janela deslizante
+    de `window` segundos (baldes de 1 s). Seguro entre threads."""
+
+    def __init__(self, window=60):
+        self.window = window
+        self._lock = threading.Lock()
+        self._totals = collections.defaultdict(int)
+        self._busy_totals = collections.defaultdict(float)
+        # etapa -> [contagem por balde (não cumulativa, + balde +Inf), soma, observações]
+        self._histograms = {}
+        # etapa -> deque de [segundo, itens, segundos ocupados]
+        self._buckets = collections.defaultdict(lambda: collections.deque(maxlen=self.window + 1))
+        self._start = time.monotonic()
+
+    def record(self, stage, n=1, seconds=0.0, latency=None):
+        """Registra n itens processados pela etapa (e o tempo gasto neles).
+
+        latency: duração de uma operação para o histograma da etapa; por
+        padrão, todo registro cronometrado (seconds > 0) é uma observação.
+        """
+        segundo = int(time.monotonic())
+        if latency is None and seconds > 0:
+            latency = seconds
+        with self._lock:
+            self._totals[stage] += n
+            self._busy_totals[stage] += seconds
+            if latency is not None:
+                histograma = self._histograms.get(stage)
+                if histograma is None:
+                    histograma = self._histograms[stage] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0]
+                histograma[0][bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+                histograma[1] += latency
+                histograma[2] += 1
+            buckets = self._buckets[stage]
+            if buckets and buckets[-1][0] == segundo:
+                buckets[-1][1] += n
+                buckets[-1][2] += seconds
+            else:
+                buckets.append([segundo, n, seconds])
+
+    def snapshot(self):
+        """{etapa: {"total", "rate" (itens/s), "busy" (0-1)}} na janela recente."""
+        agora = time.monotonic()
+        # No começo a janela é só o tempo decorrido desde a criação
+        janela = max(1.0, min(self.window, agora - self._start))
+        limite = int(agora) - janela
+        result = {}
+        with self._lock:
+            for stage, total in self._totals.items():
+                recentes = [b for b in self._buckets[stage] if b[0] >= limite]
+                result[stage] = {
+                    "total": total,
+                    "rate": sum(b[1] for b in recentes) / janela,
+                    "busy": min(1.0, sum(b[2] for b in recentes) / janela),
+                }
+        return result
+
+    def timed(self, stage, n=1):
+        """Cronômetro da etapa, como bloco with ou decorador de função:
+
+            with counters.timed('captura'): ...
+
+            @counters.timed('gui')
+            def update_gui(self): ...
+        """
+        return _StageTimer(self, stage, n)
+
+    def histograms(self):
+        """{etapa: (contagens cumulativas por limite de LATENCY_BUCKETS + +Inf, soma, observações)}."""
+        with self._lock:
+            copia = {stage: (list(h[0]), h[1], h[2]) for stage, h in self._histograms.items()}
+        resultado = {}
+        for stage, (contagens, soma, total) in copia.items():
+            acumuladas, acumulado = [], 0
+            for contagem in contagens:
+                acumulado += contagem
+                acumuladas.append(acumulado)
+            resultado[stage] = (acumuladas, soma, total)
+        return resultado
+
+    def totals(self):
+        """{etapa: (itens, segundos ocupados)} desde a criação."""
+        with self._lock:
+            return {stage: (total, self._busy_totals[stage]) for stage, total in self._totals.items()}
+
+    def bottleneck(self):
+        """Etapa com maior fração de tempo ocupado (None se nada foi cronometrado)."""
+        snapshot = self.snapshot()
+        ocupadas = {stage: s["busy"] for stage, s in snapshot.items() if s["busy"] > 0}
+        return max(ocupadas, key=ocupadas.get) if ocupadas else None
+
+
+class _StageTimer(contextlib.ContextDecorator):
+    """Cronômetro de StageCounters.timed() (uma instância por uso, segura entre threads)."""
+
+    def __init__(self, counters, stage, n=1):
+        self.counters = counters
+        self.stage = stage
+        self.n = n
+
+    def _recreate_cm(self):
+        # Como decorador, cada chamada da função usa um cronômetro próprio
+        return _StageTimer(self.counters, self.stage, self.n)
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.counters.record(self.stage, self.n, time.perf_counter() - self._inicio)
+        return False
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ''
+    escapar = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escapar(v)}"' for k, v in rotulos.items()) + '}'
+
+
+def _valor(v):
+    """Valor de uma amostra sem perder dígitos: inteiros exatos e floats com
+    todas as casas (o formato :g arredondaria 1234567 para 1.23457e+06)."""
+    if isinstance(v, numbers.Integral):
+        return str(int(v))
+    v = float(v)
+    if math.isnan(v):
+        return 'NaN'
+    if math.isinf(v):
+        return '+Inf' if v > 0 else '-Inf'
+    return repr(v)
+
+
+def prometheus_text(counters, prefix='fungoeye', gauges=None):
+    """Métricas no formato texto do Prometheus.
+
+    Para cada etapa de counters: <prefix>_stage_items_total,
+    <prefix>_stage_busy_seconds_total e o histograma
+    <prefix>_stage_latency_seconds. gauges: {nome: valor} ou
+    {nome: [(rótulos, valor), ...]} com valores extras (filas, conexões...);
+    nomes terminados em _total são exportados como counter.
+    """
+    linhas = [
+        f"# HELP {prefix}_stage_items_total Itens processados por etapa.",
+        f"# TYPE {prefix}_stage_items_total counter",
+    ]
+    totais = counters.totals()
+    linhas += [f'{prefix}_stage_items_total{_rotulos({"stage": s})} {n}' for s, (n, _) in sorted(totais.items())]
+    linhas += [
+        f"# HELP {prefix}_stage_busy_seconds_total Tempo ocupado por etapa.",
+        f"# TYPE {prefix}_stage_busy_seconds_total counter",
+    ]
+    linhas += [f'{prefix}_stage_busy_seconds_total{_rotulos({"stage": s})} {b:.6f}' for s, (_, b) in sorted(totais.items())]
+
+    nome = f"{prefix}_stage_latency_seconds"
+    linhas += [f"# HELP {nome} Latência de cada operação cronometrada, por etapa.", f"# TYPE {nome} histogram"]
+    for stage, (acumuladas, soma, total) in sorted(counters.histograms().items()):
+        for limite, contagem in zip(LATENCY_BUCKETS + ('+Inf',), acumuladas):
+            linhas.append(f'{nome}_bucket{_rotulos({"stage": stage, "le": limite})} {contagem}')
+        linhas.append(f'{nome}_sum{_rotulos({"stage": stage})} {soma:.6f}')
+        linhas.append(f'{nome}_count{_rotulos({"stage": stage})} {total}')
+
+    for metrica, valor in (gauges or {}).items():
+        metrica = f"{prefix}_{metrica}"
+        linhas.append(f"# TYPE {metrica} {'counter' if metrica.endswith('_total') else 'gauge'}")
+        amostras = valor if isinstance(valor, list) else [({}, valor)]
+        for rotulos, v in amostras:
+            if v is None:
+                continue
+            linhas.append(f"{metrica}{_rotulos(rotulos)} {_valor(v)}")
+    return '\n'.join(linhas) + '\n'
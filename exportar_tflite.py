@@ -0,0 +1,86 @@
+import os
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import argparse
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import load_model # type: ignore
+
+from modelo_tflite import TFLiteModel
+from treinar_modelo import DATA_DIR, MODELO_FILENAME, carregar_imagens
+
+# =================================================================
+# EXPORTAÇÃO TFLITE (float32, float16 e int8 pós-treino)
+# =================================================================
+# Gera os arquivos .tflite a partir do modelo_fungo.h5. A variante int8 é
+# calibrada com as imagens de DATA_DIR. No final compara a acurácia de cada
+# variante com a do .h5 nas mesmas imagens.
+
+VARIANTES = ('float32', 'float16', 'int8')
+
+
+def converter(modelo, variante, imagens_calibracao):
+    """Converte o modelo Keras para TFLite na variante pedida."""
+    converter = tf.lite.TFLiteConverter.from_keras_model(modelo)
+    if variante == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variante == 'int8':
+        def representative_dataset():
+            for imagem in imagens_calibracao:
+                yield [imagem[np.newaxis].astype('float32') / 255.0]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.uint8
+        converter.inference_output_type = tf.uint8
+    return converter.convert()
+
+
+def avaliar(predict, imagens, rotulos):
+    """Retorna (probabilidades, acurácia, ms por imagem com lote 1)."""
+    probs = predict(imagens)
+    acuracia = float(np.mean((probs >= 0.5) == rotulos))
+
+    inicio = time.perf_counter()
+    for imagem in imagens[:50]:
+        predict(imagem[np.newaxis])
+    ms_por_imagem = (time.perf_counter() - inicio) * 1000 / min(len(imagens), 50)
+    return probs, acuracia, ms_por_imagem
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta o modelo .h5 para TFLite (float32/float16/int8).")
+    parser.add_argument('--modelo', default=MODELO_FILENAME)
+    parser.add_argument('--dados', default=DATA_DIR, help="Pasta com as imagens de calibração/avaliação")
+    parser.add_argument('--saida', default='.', help="Pasta onde os .tflite serão gravados")
+    args = parser.parse_args()
+
+    modelo = load_model(args.modelo)
+    imagens, rotulos, _ = carregar_imagens(args.dados)
+    base = os.path.splitext(os.path.basename(args.modelo))[0]
+
+    def predict_keras(lote):
+        return modelo(lote.astype('float32') / 255.0, training=False).numpy()[:, 0]
+
+    probs_h5, acc_h5, ms_h5 = avaliar(predict_keras, imagens, rotulos)
+    print(f"\n{'Variante':<10}{'Tamanho (KB)':>14}{'Acurácia':>10}{'Δ acc':>9}{'Concordância':>14}{'ms/img':>9}")
+    print(f"{'h5':<10}{os.path.getsize(args.modelo) / 1024:>14.1f}{acc_h5:>10.3f}{0:>9.3f}{1:>14.3f}{ms_h5:>9.2f}")
+
+    for variante in VARIANTES:
+        path = os.path.join(args.saida, f"{base}_{variante}.tflite")
+        with open(path, 'wb') as f:
+            f.write(converter(modelo, variante, imagens))
+
+        tflite = TFLiteModel(path)
+        probs, acc, ms = avaliar(tflite.predict, imagens, rotulos)
+        concordancia = float(np.mean((probs >= 0.5) == (probs_h5 >= 0.5)))
+        print(f"{variante:<10}{os.path.getsize(path) / 1024:>14.1f}{acc:>10.3f}{acc - acc_h5:>+9.3f}"
+              f"{concordancia:>14.3f}{ms:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import time
+import tkinter as tk
+import numpy as np
+
+from serie_temporal import decimate_minmax
+
+# =================================================================
+# GRÁFICOS DE SÉRIES TEMPORAIS NA GUI (Canvas do Tk, decimados)
+# =================================================================
+# Meses de histórico têm milhões de pontos, mas o gráfico só tem algumas
+# centenas de colunas de pixel. Cada gráfico reduz a série a um par
+# min/máx por coluna (serie_temporal.decimate_minmax) e desenha tudo como
+# poucas linhas do Canvas (uma por trecho contínuo), então redesenhar ao
+# redimensionar a janela ou mover o mouse custa o mesmo para 1 dia ou 1 ano.
+# Os picos continuam visíveis: uma coluna com um único valor fora do
+# normal vira um traço vertical até ele.
+
+MARGEM_ESQ, MARGEM_DIR, MARGEM_SUP, MARGEM_INF = 48, 12, 22, 20
+GAP_MAX_COLUNAS = 12    # Colunas vazias seguidas a partir das quais a linha é interrompida
+FORMATO_DATA = '%d/%m %H:%M'
+
+
+class TimeSeriesChart(tk.Canvas):
+    """Gráfico de uma série (mín/máx por coluna de pixel) com leitura do valor sob o mouse.
+
+    y_range: (mínimo, máximo) fixos do eixo Y; None ajusta aos dados.
+    """
+
+    def __init__(self, master, title, unit='', color='#1f77b4', y_range=None, **kwargs):
+        kwargs.setdefault('height', 150)
+        kwargs.setdefault('background', 'white')
+        kwargs.setdefault('highlightthickness', 0)
+        super().__init__(master, **kwargs)
+        self.title = title
+        self.unit = unit
+        self.color = color
+        self.y_range = y_range
+        self._dados = None     # (t, mínimos, máximos, início, fim)
+        self._colunas = None   # Última decimação desenhada (para o mouse)
+        self.bind('<Configure>', lambda e: self.redraw())
+        self.bind('<Motion>', self._on_motion)
+        self.bind('<Leave>', lambda e: self.delete('cursor'))
+
+    def set_data(self, timestamps, mins, maxs=None, start=None, end=None):
+        """Define a série (amostras brutas ou buckets já agregados) e redesenha."""
+        t = np.asarray(timestamps, dtype=np.float64)
+        mins = np.asarray(mins, dtype=np.float64)
+        maxs = mins if maxs is None else np.asarray(maxs, dtype=np.float64)
+        start = (t[0] if len(t) else time.time()) if start is None else start
+        end = (t[-1] if len(t) else time.time()) if end is None else end
+        self._dados = (t, mins, maxs, start, end)
+        self.redraw()
+
+    def _area(self):
+        largura, altura = self.winfo_width(), self.winfo_height()
+        return MARGEM_ESQ, MARGEM_SUP, max(MARGEM_ESQ + 1, largura - MARGEM_DIR), max(MARGEM_SUP + 1, altura - MARGEM_INF)
+
+    def redraw(self):
+        self.delete('all')
+        x0, y0, x1, y1 = self._area()
+        self.create_text(x0, 4, anchor='nw', text=self.title, font=("Helvetica", 10, "bold"))
+        self.create_rectangle(x0, y0, x1, y1, outline='#bbbbbb')
+        self._colunas = None
+        if self._dados is None:
+            return
+        t, mins, maxs, start, end = self._dados
+        self.create_text(x0, y1 + 2, anchor='nw', text=time.strftime(FORMATO_DATA, time.localtime(start)),
+                         font=("Helvetica", 8))
+        self.create_text(x1, y1 + 2, anchor='ne', text=time.strftime(FORMATO_DATA, time.localtime(end)),
+                         font=("Helvetica", 8))
+
+        colunas, lo, hi = decimate_minmax(t, mins, maxs, start, end, columns=x1 - x0)
+        if len(colunas) == 0:
+            self.create_text((x0 + x1) / 2, (y0 + y1) / 2, text="Sem dados no período", fill='#888888')
+            return
+
+        y_min, y_max = self.y_range or (float(lo.min()), float(hi.max()))
+        if y_max - y_min < 1e-9:
+            y_min, y_max = y_min - 1, y_max + 1
+        escala = (y1 - y0) / (y_max - y_min)
+        self.create_text(x0 - 4, y0, anchor='ne', text=f"{y_max:.1f}", font=("Helvetica", 8))
+        self.create_text(x0 - 4, y1, anchor='se', text=f"{y_min:.1f}", font=("Helvetica", 8))
+
+        # Cada coluna vira um traço vertical mín -> máx; as colunas de um trecho
+        # contínuo formam uma única linha do Canvas
+        xs = x0 + colunas + 0.5
+        ys_lo = y1 - (lo - y_min) * escala
+        ys_hi = y1 - (hi - y_min) * escala - 1 # Pelo menos 1 px quando mín == máx
+        pontos = np.column_stack((xs, ys_lo, xs, ys_hi))
+        cortes = np.flatnonzero(np.diff(colunas) > GAP_MAX_COLUNAS) + 1
+        for trecho in np.split(pontos, cortes):
+            self.create_line(*trecho.ravel().tolist(), fill=self.color)
+        self._colunas = (colunas, lo, hi, start, (end - start) / (x1 - x0))
+
+    def _on_motion(self, event):
+        self.delete('cursor')
+        if self._colunas is None:
+            return
+        colunas, lo, hi, start, segundos_por_coluna = self._colunas
+        x0, y0, x1, y1 = self._area()
+        i = np.searchsorted(colunas, event.x - x0)
+        # Coluna com dados mais próxima do mouse
+        vizinhas = [j for j in (i - 1, i) if 0 <= j < len(colunas)]
+        if not vizinhas:
+            return
+        j = min(vizinhas, key=lambda k: abs(colunas[k] - (event.x - x0)))
+        x = x0 + colunas[j] + 0.5
+        quando = time.strftime(FORMATO_DATA, time.localtime(start + colunas[j] * segundos_por_coluna))
+        valor = f"{lo[j]:.2f}{self.unit}" if lo[j] == hi[j] else f"{lo[j]:.2f} a {hi[j]:.2f}{self.unit}"
+        self.create_line(x, y0, x, y1, fill='#999999', dash=(2, 2), tags='cursor')
+        self.create_text(x1, 4, anchor='ne', text=f"{quando}: {valor}", font=("Helvetica", 9), tags='cursor')
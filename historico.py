@@ -0,0 +1,215 @@
+import argparse
+import csv
+import sqlite3
+import threading
+import numpy as np
+
+# =================================================================
+# HISTÓRICO DE ANÁLISES (SQLite com índice de tempo + resumo por hora)
+# =================================================================
+# Cada predição vira um registro (timestamp, temperatura, umidade,
+# probabilidade, rótulo, caminho da imagem, RPi de origem, versão do modelo e
+# pontuação da triagem na RPi, quando houve). Além da tabela
+# de registros, um resumo por hora é atualizado na mesma transação, então
+# agregações sobre meses leem poucas linhas em vez de reprocessar tudo.
+# O antigo data_historico.csv continua disponível via export_csv().
+
+HISTORICO_DB_PATH = 'historico.db'
+HISTORICO_CSV_PATH = 'data_historico.csv'
+HORA = 3600
+
+COLUNAS = ("timestamp", "temperature", "humidity", "probability", "label", "image_path", "node", "model_version",
+           "screening")
+COLUNAS_TEXTO = ("label", "image_path", "node", "model_version")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analises (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    temperature REAL,
+    humidity REAL,
+    probability REAL,
+    label TEXT,
+    image_path TEXT,
+    node TEXT,
+    model_version TEXT,
+    screening REAL
+);
+CREATE INDEX IF NOT EXISTS idx_analises_timestamp ON analises(timestamp);
+
+CREATE TABLE IF NOT EXISTS resumo_hora (
+    hora INTEGER PRIMARY KEY,
+    n INTEGER NOT NULL,
+    fungo INTEGER NOT NULL,
+    temp_n INTEGER NOT NULL, temp_sum REAL, temp_min REAL, temp_max REAL,
+    hum_n INTEGER NOT NULL, hum_sum REAL, hum_min REAL, hum_max REAL,
+    prob_n INTEGER NOT NULL, prob_sum REAL, prob_min REAL, prob_max REAL
+);
+"""
+
+# Acumula um registro no resumo da sua hora (min/max ignorando NULL)
+_UPSERT_RESUMO = """
+INSERT INTO resumo_hora VALUES (
+    CAST(:timestamp / 3600 AS INTEGER), 1, :label = 'fungo',
+    :temperature IS NOT NULL, :temperature, :temperature, :temperature,
+    :humidity IS NOT NULL, :humidity, :humidity, :humidity,
+    :probability IS NOT NULL, :probability, :probability, :probability
+)
+ON CONFLICT(hora) DO UPDATE SET
+    n = n + 1,
+    fungo = fungo + excluded.fungo,
+    temp_n = temp_n + excluded.temp_n,
+    temp_sum = coalesce(temp_sum, 0) + coalesce(excluded.temp_sum, 0),
+    temp_min = min(coalesce(temp_min, excluded.temp_min), coalesce(excluded.temp_min, temp_min)),
+    temp_max = max(coalesce(temp_max, excluded.temp_max), coalesce(excluded.temp_max, temp_max)),
+    hum_n = hum_n + excluded.hum_n,
+    hum_sum = coalesce(hum_sum, 0) + coalesce(excluded.hum_sum, 0),
+    hum_min = min(coalesce(hum_min, excluded.hum_min), coalesce(excluded.hum_min, hum_min)),
+    hum_max = max(coalesce(hum_max, excluded.hum_max), coalesce(excluded.hum_max, hum_max)),
+    prob_n = prob_n + excluded.prob_n,
+    prob_sum = coalesce(prob_sum, 0) + coalesce(excluded.prob_sum, 0),
+    prob_min = min(coalesce(prob_min, excluded.prob_min), coalesce(excluded.prob_min, prob_min)),
+    prob_max = max(coalesce(prob_max, excluded.prob_max), coalesce(excluded.prob_max, prob_max))
+"""
+
+# Mesma agregação, direto da tabela de registros (buckets menores que 1 hora)
+_AGREGAR_REGISTROS = """
+SELECT CAST(timestamp / :bucket AS INTEGER) AS b, count(*), sum(label = 'fungo'),
+       count(temperature), sum(temperature), min(temperature), max(temperature),
+       count(humidity), sum(humidity), min(humidity), max(humidity),
+       count(probability), sum(probability), min(probability), max(probability)
+FROM analises WHERE timestamp >= :start AND timestamp < :end
+GROUP BY b ORDER BY b
+"""
+
+_AGREGAR_RESUMO = """
+SELECT CAST(hora / :horas AS INTEGER) AS b, sum(n), sum(fungo),
+       sum(temp_n), sum(temp_sum), min(temp_min), max(temp_max),
+       sum(hum_n), sum(hum_sum), min(hum_min), max(hum_max),
+       sum(prob_n), sum(prob_sum), min(prob_min), max(prob_max)
+FROM resumo_hora WHERE hora >= :hora_start AND hora < :hora_end
+GROUP BY b ORDER BY b
+"""
+
+
+class HistoricoAnalises:
+    """Armazena e consulta o histórico de predições (seguro entre threads)."""
+
+    def __init__(self, path=HISTORICO_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")   # Leituras não bloqueiam a escrita
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # Bancos criados antes das colunas 'node' (várias RPis), 'model_version' e 'screening'
+        colunas = {row[1] for row in self._conn.execute("PRAGMA table_info(analises)")}
+        for nova, tipo in (("node", "TEXT"), ("model_version", "TEXT"), ("screening", "REAL")):
+            if nova not in colunas:
+                self._conn.execute(f"ALTER TABLE analises ADD COLUMN {nova} {tipo}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def add_many(self, records):
+        """Insere vários registros (dicts com as chaves de COLUNAS) numa única transação."""
+        records = [{col: r.get(col) for col in COLUNAS} for r in records]
+        if not records:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO analises ({', '.join(COLUNAS)}) VALUES ({', '.join(':' + c for c in COLUNAS)})",
+                records
+            )
+            self._conn.executemany(_UPSERT_RESUMO, records)
+
+    def add(self, **record):
+        self.add_many([record])
+
+    def query(self, start=None, end=None, limit=None):
+        """Registros em [start, end), em ordem de tempo, como dict colunar.
+        Colunas numéricas vêm como arrays NumPy (None vira NaN)."""
+        start = float('-inf') if start is None else start
+        end = float('inf') if end is None else end
+        sql = f"SELECT {', '.join(COLUNAS)} FROM analises WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp"
+        params = [start, end]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        colunas = list(zip(*rows)) if rows else [()] * len(COLUNAS)
+        result = {}
+        for nome, valores in zip(COLUNAS, colunas):
+            if nome in COLUNAS_TEXTO:
+                result[nome] = list(valores)
+            else:
+                result[nome] = np.array([np.nan if v is None else v for v in valores], dtype=np.float64)
+        return result
+
+    def aggregate(self, start, end, bucket_seconds):
+        """Agrega [start, end) em buckets de bucket_seconds.
+
+        Retorna um dict colunar no mesmo formato de
+        serie_temporal.aggregate_buckets ('t', 'count', e min/mean/max de
+        'temperature', 'humidity' e 'probability'), mais 'fungo' (quantas
+        análises deram fungo em cada bucket). Buckets múltiplos de 1 hora
+        são respondidos pelo resumo por hora.
+        """
+        if bucket_seconds >= HORA and bucket_seconds % HORA == 0:
+            sql = _AGREGAR_RESUMO
+            params = {"horas": bucket_seconds // HORA,
+                      "hora_start": int(start // HORA), "hora_end": int(-(-end // HORA))}
+        else:
+            sql = _AGREGAR_REGISTROS
+            params = {"bucket": bucket_seconds, "start": start, "end": end}
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        result = {"t": [row[0] * bucket_seconds for row in rows],
+                  "count": [row[1] for row in rows],
+                  "fungo": [row[2] for row in rows]}
+        for i, nome in enumerate(("temperature", "humidity", "probability")):
+            base = 3 + 4 * i
+            result[nome] = {
+                "min": [row[base + 2] for row in rows],
+                "mean": [row[base + 1] / row[base] if row[base] else None for row in rows],
+                "max": [row[base + 3] for row in rows],
+            }
+        return result
+
+    def export_csv(self, path=HISTORICO_CSV_PATH, start=None, end=None):
+        """Exporta os registros para CSV (compatível com o data_historico.csv).
+        Retorna o número de linhas escritas."""
+        start = float('-inf') if start is None else start
+        end = float('inf') if end is None else end
+        total = 0
+        with self._lock, open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUNAS)
+            cursor = self._conn.execute(
+                f"SELECT {', '.join(COLUNAS)} FROM analises WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+                (start, end)
+            )
+            while True:
+                rows = cursor.fetchmany(10_000)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                total += len(rows)
+        return total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Utilitários do histórico de análises.")
+    parser.add_argument('--db', default=HISTORICO_DB_PATH)
+    parser.add_argument('--exportar-csv', nargs='?', const=HISTORICO_CSV_PATH, metavar='ARQUIVO',
+                        help=f"Exporta o histórico para CSV (padrão: {HISTORICO_CSV_PATH})")
+    args = parser.parse_args()
+
+    historico = HistoricoAnalises(args.db)
+    if args.exportar_csv:
+        linhas = historico.export_csv(args.exportar_csv)
+        print(f"{linhas} registros exportados para {args.exportar_csv}")
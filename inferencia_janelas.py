@@ -0,0 +1,88 @@
+import cv2
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# =================================================================
+# INFERÊNCIA EM JANELAS (tiles) PARA CAPTURAS EM ALTA RESOLUÇÃO
+# =================================================================
+# Em vez de espremer a captura inteira em 128x128 (o que apaga uma mancha
+# pequena numa caixa cheia de bananas), a imagem é cortada em janelas
+# 128x128 sobrepostas. As janelas são views do próprio frame
+# (sliding_window_view), sem cópia: a memória não cresce com o número de
+# janelas; só o micro-lote que vai para o modelo é materializado.
+# O veredito agregado é o da PIOR janela (menor P(Saudável)) e as
+# probabilidades de cada janela formam o mapa de calor exibido na GUI.
+
+
+def tile_offsets(length, tile, stride):
+    """Posições iniciais das janelas num eixo. A última janela é encostada
+    na borda para cobrir a imagem inteira mesmo se o passo não dividir."""
+    if length <= tile:
+        return [0]
+    offsets = list(range(0, length - tile + 1, stride))
+    if offsets[-1] != length - tile:
+        offsets.append(length - tile)
+    return offsets
+
+
+def extract_tiles(frame, tile_size, stride):
+    """Corta o frame (H, W, C) em janelas de tile_size=(altura, largura).
+
+    Retorna (tiles, ys, xs): tiles é a lista de views (sem cópia) em ordem
+    de linha, e ys/xs as posições das linhas e colunas de janelas.
+    O frame deve ter pelo menos tile_size em cada eixo.
+    """
+    tile_h, tile_w = tile_size
+    windows = sliding_window_view(frame, (tile_h, tile_w), axis=(0, 1))
+    # windows[y, x] tem forma (C, tile_h, tile_w); volta para (tile_h, tile_w, C)
+    ys = tile_offsets(frame.shape[0], tile_h, stride)
+    xs = tile_offsets(frame.shape[1], tile_w, stride)
+    tiles = [np.moveaxis(windows[y, x], 0, -1) for y in ys for x in xs]
+    return tiles, ys, xs
+
+
+def build_heatmap(probs, ys, xs, tile_size, frame_shape):
+    """Monta o mapa de calor (dict) a partir das P(Saudável) das janelas."""
+    return {
+        "prob": np.asarray(probs, dtype=np.float32).reshape(len(ys), len(xs)),
+        "y": list(ys),
+        "x": list(xs),
+        "tile": tuple(tile_size),
+        "shape": tuple(frame_shape[:2]),
+    }
+
+
+def aggregate_prob(heatmap):
+    """P(Saudável) da imagem inteira: a da pior janela."""
+    return float(heatmap["prob"].min())
+
+
+def render_heatmap(heatmap, size):
+    """Probabilidade de fungo por pixel, na resolução size=(largura, altura).
+
+    Cada pixel recebe o máximo de (1 - P(Saudável)) entre as janelas que o
+    cobrem. Calculado direto na resolução de exibição (barato para a GUI).
+    """
+    largura, altura = size
+    frame_h, frame_w = heatmap["shape"]
+    tile_h, tile_w = heatmap["tile"]
+    escala_y, escala_x = altura / frame_h, largura / frame_w
+
+    mapa = np.zeros((altura, largura), dtype=np.float32)
+    fungo = 1.0 - heatmap["prob"]
+    for i, y in enumerate(heatmap["y"]):
+        y0, y1 = int(y * escala_y), int(np.ceil((y + tile_h) * escala_y))
+        for j, x in enumerate(heatmap["x"]):
+            x0, x1 = int(x * escala_x), int(np.ceil((x + tile_w) * escala_x))
+            regiao = mapa[y0:y1, x0:x1]
+            np.maximum(regiao, fungo[i, j], out=regiao)
+    return mapa
+
+
+def overlay_heatmap(image_rgb, heatmap, alpha=0.4):
+    """Sobrepõe o mapa de calor (vermelho = fungo) numa imagem RGB uint8."""
+    altura, largura = image_rgb.shape[:2]
+    mapa = render_heatmap(heatmap, (largura, altura))
+    cores = cv2.applyColorMap((mapa * 255).astype(np.uint8), cv2.COLORMAP_JET)
+    cores = cv2.cvtColor(cores, cv2.COLOR_BGR2RGB)
+    return cv2.addWeighted(image_rgb, 1.0 - alpha, cores, alpha, 0)
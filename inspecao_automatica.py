@@ -0,0 +1,161 @@
+import collections
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# =================================================================
+# INSPEÇÃO AUTOMÁTICA (capturas por intervalo ou mudança de cena)
+# =================================================================
+# Roda dentro da thread da câmera: a cada frame decide se deve congelar uma
+# captura, seja porque o intervalo configurado passou, seja porque a cena
+# mudou (diferença média de uma miniatura em tons de cinza, custo de
+# microssegundos). Para não gerar capturas mais rápido do que o PC consegue
+# inferir, só pode haver max_pending capturas automáticas ainda não
+# processadas: o PC confirma o processamento ao pedir /api/captures?since=<id>.
+# Com um screener (triagem.EdgeScreener), capturas claramente saudáveis nem
+# chegam à fila: contam como inspecionadas, mas não vão para o PC.
+
+
+class SceneChangeDetector:
+    """Detecta mudança de cena comparando miniaturas em tons de cinza."""
+
+    def __init__(self, threshold=12.0, size=(32, 24)):
+        self.threshold = threshold  # Diferença média absoluta (0-255)
+        self.size = size            # (largura, altura) da miniatura
+        self._reference = None
+
+    def thumbnail(self, frame):
+        if frame.shape[1::-1] != self.size:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def score(self, thumb):
+        """Diferença média entre a miniatura e a referência (inf sem referência)."""
+        if self._reference is None:
+            return float('inf')
+        return float(np.mean(cv2.absdiff(thumb, self._reference)))
+
+    def changed(self, thumb):
+        return self.score(thumb) > self.threshold
+
+    def set_reference(self, thumb):
+        """A cena da última captura vira a referência para as próximas comparações."""
+        self._reference = thumb
+
+
+class AutoInspector:
+    """Dispara capturas automáticas com backpressure.
+
+    capture_fn(trigger, screening) congela uma captura e retorna seu ID (ou
+    None se não há frame/sensor). trigger é 'intervalo' ou 'mudanca';
+    screening é (pontuação, veredito) da triagem ou None.
+    interval: segundos entre capturas periódicas (None = sem capturas periódicas).
+    detector: SceneChangeDetector (None = sem captura por mudança de cena).
+    min_interval: intervalo mínimo entre duas capturas automáticas.
+    max_pending: capturas automáticas ainda não confirmadas pelo PC a partir
+    das quais novas capturas são puladas.
+    screener: triagem.EdgeScreener (None = todas as capturas vão para o PC).
+    """
+
+    def __init__(self, capture_fn, interval=None, detector=None, min_interval=2.0,
+                 max_pending=2, counters=None, screener=None):
+        self.capture_fn = capture_fn
+        self.interval = interval
+        self.detector = detector
+        self.min_interval = min_interval
+        self.max_pending = max_pending
+        self.counters = counters
+        self.screener = screener
+
+        self._lock = threading.Lock()
+        self._pending = collections.deque()  # IDs das capturas automáticas não confirmadas
+        self._acked_id = 0
+        self._last_time = float('-inf')
+
+    @property
+    def enabled(self):
+        return self.interval is not None or self.detector is not None
+
+    def ack(self, capture_id):
+        """O PC processou todas as capturas até capture_id (inclusive)."""
+        with self._lock:
+            self._acked_id = max(self._acked_id, capture_id)
+            while self._pending and self._pending[0] <= self._acked_id:
+                self._pending.popleft()
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _record(self, stage, n=1, seconds=0.0):
+        if self.counters is not None:
+            self.counters.record(stage, n, seconds)
+
+    def on_frame(self, pipeline):
+        """Chamado pela thread da câmera a cada frame novo. Retorna o ID da
+        captura disparada ou None."""
+        if not self.enabled:
+            return None
+        agora = time.monotonic()
+        if agora - self._last_time < self.min_interval:
+            return None
+
+        trigger, thumb = None, None
+        if self.detector is not None:
+            inicio = time.perf_counter()
+            frame = pipeline.small_frame(self.detector.size)
+            if frame is not None:
+                thumb = self.detector.thumbnail(frame)
+                if self.detector.changed(thumb):
+                    trigger = 'mudanca'
+            self._record('deteccao', 1, time.perf_counter() - inicio)
+        if trigger is None and self.interval is not None and agora - self._last_time >= self.interval:
+            trigger = 'intervalo'
+        if trigger is None:
+            return None
+
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                # PC ainda não deu conta das anteriores: não empilha mais capturas
+                self._record('auto_backpressure')
+                return None
+
+        screening = None
+        if self.screener is not None:
+            frame = pipeline.model_frame()
+            if frame is not None:
+                enviar, score, veredito = self.screener.screen(frame)
+                if not enviar:
+                    # Claramente saudável: cena inspecionada, nada enviado ao PC
+                    self._last_time = agora
+                    if thumb is not None:
+                        self.detector.set_reference(thumb)
+                    self._record('triagem_descartada')
+                    return None
+                screening = (score, veredito)
+
+        capture_id = self.capture_fn(trigger, screening)
+        if capture_id is None:
+            return None
+        with self._lock:
+            if capture_id > self._acked_id:
+                self._pending.append(capture_id)
+        self._last_time = agora
+        if thumb is not None:
+            self.detector.set_reference(thumb)
+        self._record('auto_' + trigger)
+        return capture_id
+
+    def status(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "interval": self.interval,
+                "on_change": self.detector is not None,
+                "pending": len(self._pending),
+                "max_pending": self.max_pending,
+                "acked_id": self._acked_id,
+                "screening": self.screener.stats() if self.screener is not None else None,
+            }
@@ -3,36 +3,70 @@ from tkinter import ttk
 from PIL import Image, ImageTk
 import threading
 import os
-import cv2
 import time
 import numpy as np
 
 # Importação ATUALIZADA
-from servidor_pc import latest_prediction_result, data_lock, load_ml_model, fetch_and_process
+# (servidor_pc não importa o TensorFlow; o modelo é carregado em segundo plano)
+from servidor_pc import (get_latest_result, get_historico, load_ml_model_async, start_polling, nodes,
+                         pipeline_counters, start_metrics_server)
+from inferencia_janelas import overlay_heatmap
+from preprocessamento import display_image
+from graficos import TimeSeriesChart
+from historico import HORA
+
+# Períodos da aba "Relatórios e Histórico" (rótulo, segundos)
+PERIODOS_RELATORIO = (
+    ("Últimas 24 horas", 24 * HORA),
+    ("Últimos 7 dias", 7 * 24 * HORA),
+    ("Últimos 30 dias", 30 * 24 * HORA),
+    ("Últimos 90 dias", 90 * 24 * HORA),
+    ("Último ano", 365 * 24 * HORA),
+)
 
 class App:
     def __init__(self, master):
         self.master = master
         master.title("Detector de Fungos - Monitor Web RPi")
         master.geometry("800x650")
-        
-        # 1. Tenta carregar o modelo de ML
-        if not load_ml_model():
-            master.destroy()
-            return
-            
+
+        # Versão do último resultado desenhado e frame/mapa de calor da imagem
+        # exibida: update_gui só refaz textos e imagem quando algo mudou
+        self.result_version = None
+        self.displayed_frame = None
+        self.displayed_heatmap = None
+        # Relatório carregado em segundo plano, aplicado pela thread da GUI
+        self.report_result = None
+        self.report_loading = False
+
         self.create_widgets()
+
+        # 1. Carrega o modelo de ML em segundo plano (o status aparece na janela)
+        self.model_loader_thread = load_ml_model_async()
         
-        # 2. Inicia a thread que buscará os dados da RPi periodicamente
-        self.processing_thread = threading.Thread(target=self.start_processor, daemon=True)
-        self.processing_thread.start()
+        # 2. Inicia uma thread por RPi que buscará as capturas (long-poll)
+        #    (enquanto o modelo carrega, elas já mostram os sensores ao vivo)
+        self.processing_threads = start_polling()
+        # Métricas por etapa (inclusive da própria GUI) em http://localhost:9101/metrics
+        self.metrics_server = start_metrics_server()
 
         # 3. Atualiza a GUI periodicamente (chama update_gui a cada 100ms)
         self.master.after(100, self.update_gui)
 
     def create_widgets(self):
-        # ... (Mantido como antes) ...
-        self.info_frame = ttk.LabelFrame(self.master, text="Status e Sensores")
+        self.notebook = ttk.Notebook(self.master)
+        self.notebook.pack(expand=True, fill="both")
+        self.monitor_tab = ttk.Frame(self.notebook)
+        self.report_tab = ttk.Frame(self.notebook)
+        self.notebook.add(self.monitor_tab, text="Monitoramento Atual")
+        self.notebook.add(self.report_tab, text="Relatórios e Histórico")
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+
+        self.create_monitor_widgets(self.monitor_tab)
+        self.create_report_widgets(self.report_tab)
+
+    def create_monitor_widgets(self, parent):
+        self.info_frame = ttk.LabelFrame(parent, text="Status e Sensores")
         self.info_frame.pack(pady=10, padx=10, fill="x")
 
         self.status_label = ttk.Label(self.info_frame, text="Iniciando...", font=("Helvetica", 14, "bold"))
@@ -48,7 +82,7 @@ class App:
         self.prob_label.pack(pady=2)
 
 
-        self.image_frame = ttk.LabelFrame(self.master, text="Última Imagem Capturada")
+        self.image_frame = ttk.LabelFrame(parent, text="Última Imagem Capturada")
         self.image_frame.pack(pady=10, padx=10, expand=True, fill="both")
 
         self.image_label = ttk.Label(self.image_frame)
@@ -56,6 +90,80 @@ class App:
         
         self.display_placeholder_image()
 
+    def create_report_widgets(self, parent):
+        controls = ttk.Frame(parent)
+        controls.pack(fill="x", padx=10, pady=(10, 0))
+        ttk.Label(controls, text="Período:").pack(side="left")
+        self.period_var = tk.StringVar(value=PERIODOS_RELATORIO[0][0])
+        period_box = ttk.Combobox(controls, textvariable=self.period_var, state="readonly", width=18,
+                                  values=[nome for nome, _ in PERIODOS_RELATORIO])
+        period_box.pack(side="left", padx=5)
+        period_box.bind('<<ComboboxSelected>>', lambda e: self.load_report())
+        ttk.Button(controls, text="Atualizar", command=self.load_report).pack(side="left", padx=5)
+        self.report_label = ttk.Label(controls, text="")
+        self.report_label.pack(side="left", padx=10)
+
+        # Cada gráfico desenha um par mín/máx por coluna de pixel (graficos.py)
+        self.temp_chart = TimeSeriesChart(parent, "Temperatura (°C)", unit="°C", color='#d62728')
+        self.hum_chart = TimeSeriesChart(parent, "Umidade (%)", unit="%", color='#1f77b4')
+        self.prob_chart = TimeSeriesChart(parent, "Prob. Saudável", color='#2ca02c', y_range=(0.0, 1.0))
+        for chart in (self.temp_chart, self.hum_chart, self.prob_chart):
+            chart.pack(expand=True, fill="both", padx=10, pady=5)
+
+    def on_tab_changed(self, event=None):
+        if self.notebook.select() == str(self.report_tab):
+            self.load_report()
+
+    def load_report(self):
+        """Consulta o histórico do período escolhido em segundo plano.
+
+        O SQLite já devolve um bucket (mín/média/máx) por coluna de pixel dos
+        gráficos; acima de 1 hora por coluna a consulta usa o resumo por hora,
+        então meses de histórico leem poucas linhas.
+        """
+        if self.report_loading:
+            return
+        periodo = dict(PERIODOS_RELATORIO)[self.period_var.get()]
+        colunas = max(100, self.temp_chart.winfo_width())
+        bucket = max(1.0, periodo / colunas)
+        if bucket >= HORA:
+            bucket = -(-bucket // HORA) * HORA # Múltiplo de 1 hora: vem do resumo por hora
+        end = time.time()
+        start = end - periodo
+        self.report_loading = True
+        self.report_label.config(text="Carregando...")
+
+        def worker():
+            try:
+                self.report_result = (start, end, get_historico().aggregate(start, end, bucket))
+            except Exception as e:
+                print(f"Erro ao consultar o histórico: {e}")
+                self.report_result = (start, end, e)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def apply_report(self):
+        """Desenha o relatório carregado por load_report (na thread da GUI)."""
+        resultado, self.report_result = self.report_result, None
+        if resultado is None:
+            return
+        self.report_loading = False
+        start, end, dados = resultado
+        if isinstance(dados, Exception):
+            self.report_label.config(text=f"Erro ao consultar o histórico: {dados}")
+            return
+
+        t = np.asarray(dados["t"], dtype=np.float64)
+        if len(t):
+            start = min(start, t[0]) # O primeiro bucket começa antes do período
+        for chart, nome in ((self.temp_chart, "temperature"), (self.hum_chart, "humidity"),
+                            (self.prob_chart, "probability")):
+            chart.set_data(t, np.array(dados[nome]["min"], dtype=np.float64),
+                           np.array(dados[nome]["max"], dtype=np.float64), start, end)
+        total, fungo = sum(dados["count"]), sum(dados["fungo"])
+        self.report_label.config(
+            text=f"{total} análises, {fungo} com fungo ({100 * fungo / total:.1f}%)" if total else "Nenhuma análise no período")
+
     def display_placeholder_image(self):
         """Exibe uma imagem placeholder."""
         blank_img = Image.new('RGB', (300, 300), color = 'lightgray')
@@ -63,50 +171,57 @@ class App:
         self.image_label.config(image=self.photo)
         self.image_label.image = self.photo
         
-    def start_processor(self):
-        """Nova função: Roda a busca e processamento em loop."""
-        while True:
-            # Chama a função de processamento no servidor_pc.py
-            fetch_and_process() 
-            time.sleep(3) # Intervalo para não sobrecarregar a rede
-
+    @pipeline_counters.timed('gui')
     def update_gui(self):
-        """Atualiza a interface gráfica com os últimos dados."""
-        
-        with data_lock: # Usa o Lock para ler os dados de forma segura
-            data = latest_prediction_result.copy()
+        """Atualiza a interface gráfica com os últimos dados (só o que mudou)."""
+        self.apply_report()
+
+        # None quando nada mudou desde a última atualização (nem cópia, nem redesenho)
+        data = get_latest_result(self.result_version)
+        if data is not None:
+            self.result_version = data['version']
+            self.show_result(data)
+
+        # Agenda a próxima atualização da GUI
+        self.master.after(100, self.update_gui)
 
-        self.status_label.config(text=f"Resultado: {data['status']}")
+    def show_result(self, data):
+        """Atualiza textos e imagem da aba de monitoramento com um resultado."""
+        origem = f" [{data['node']}]" if len(nodes) > 1 and data['node'] else ""
+        self.status_label.config(text=f"Resultado{origem}: {data['status']}")
         self.temp_label.config(text=f"Temperatura: {data['temperature']}°C" if data['temperature'] is not None else "Temperatura: N/A")
         self.hum_label.config(text=f"Umidade: {data['humidity']}%" if data['humidity'] is not None else "Umidade: N/A")
         
         prob = data['prediction_prob']
-        self.prob_label.config(text=f"Prob. Saudável: {prob*100:.2f}%" if prob is not None else "Prob. Saudável: N/A")
+        versao = f" (modelo {data['model_version']})" if data.get('model_version') else ""
+        self.prob_label.config(text=f"Prob. Saudável: {prob*100:.2f}%{versao}" if prob is not None else "Prob. Saudável: N/A")
 
 
-        # Atualiza a imagem se houver um novo frame
+        # Atualiza a imagem se houver um novo frame (leituras de sensor e
+        # mensagens de status mudam a versão, mas reaproveitam a imagem exibida)
         frame_array = data.get('image_frame')
-        if frame_array is not None and isinstance(frame_array, np.ndarray):
-            try:
-                # O frame array é em BGR (padrão OpenCV), converte para RGB para Pillow
-                cv2image = cv2.cvtColor(frame_array, cv2.COLOR_BGR2RGB)
-                
-                # Redimensiona para exibição na GUI (300x300 é um bom tamanho)
-                img = Image.fromarray(cv2image)
-                img = img.resize((300, 300), Image.LANCZOS)
-                
-                self.photo = ImageTk.PhotoImage(img)
-                self.image_label.config(image=self.photo)
-                self.image_label.image = self.photo
-            except Exception as e:
-                print(f"Erro ao carregar imagem para GUI: {e}")
-                self.image_label.config(text="Erro ao carregar imagem")
-        else:
-            # Se não houver imagem, mantenha o placeholder (se já estiver exibindo)
-            pass
-
-        # Agenda a próxima atualização da GUI
-        self.master.after(100, self.update_gui)
+        heatmap = data.get('heatmap')
+        if not isinstance(frame_array, np.ndarray):
+            return # Sem imagem nova: mantém a atual (ou o placeholder)
+        if frame_array is self.displayed_frame and heatmap is self.displayed_heatmap:
+            return
+        try:
+            # Reduz para exibição na GUI (300x300 é um bom tamanho) e só
+            # então converte de BGR (padrão OpenCV) para RGB (Pillow)
+            rgb = display_image(frame_array, (300, 300))
+
+            # Inferência em janelas: sobrepõe o mapa de calor (vermelho = fungo)
+            if heatmap is not None:
+                rgb = overlay_heatmap(rgb, heatmap)
+            img = Image.fromarray(rgb)
+            
+            self.photo = ImageTk.PhotoImage(img)
+            self.image_label.config(image=self.photo)
+            self.image_label.image = self.photo
+            self.displayed_frame, self.displayed_heatmap = frame_array, heatmap
+        except Exception as e:
+            print(f"Erro ao carregar imagem para GUI: {e}")
+            self.image_label.config(text="Erro ao carregar imagem")
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,292 @@
+import re
+import struct
+import threading
+import time
+
+import serial
+
+# =================================================================
+# LEITURA SERIAL DO ARDUINO (texto ou binário com checksum)
+# =================================================================
+# Os bytes da porta são lidos em blocos (tudo o que já chegou, numa única
+# chamada) para um buffer, de onde o parser extrai quantos quadros
+# estiverem completos. Dois formatos convivem na mesma porta, detectados
+# pelo primeiro byte de cada quadro:
+#
+#   Texto (o sketch original):  "Temp:25.30,Hum:61.00\n"
+#
+#   Binário (amostras em alta taxa ou acumuladas em lote):
+#     0xAA 0x55 | seq (uint16) | n (uint8) | n x amostra | CRC-8
+#     amostra = temperatura x100 (int16) | umidade x100 (uint16) | idade em ms (uint16)
+#     (little-endian; seq = número da primeira amostra do quadro; idade =
+#     quanto tempo antes do envio a amostra foi lida; CRC-8 poly 0x07 sobre
+#     seq, n e as amostras)
+#
+#   No Arduino, por exemplo:
+#     uint8_t q[3 + 6 * N]; ... ; Serial.write(0xAA); Serial.write(0x55);
+#     Serial.write(q, sizeof q); Serial.write(crc8(q, sizeof q));
+#
+# Quadros binários com CRC errado são descartados (o parser ressincroniza no
+# próximo 0xAA 0x55) e saltos em seq contam como amostras perdidas. Se a
+# porta cair, o leitor reconecta com backoff exponencial em vez de encerrar.
+
+SYNC = b'\xaa\x55'
+CABECALHO = struct.Struct('<HB')  # seq, n
+AMOSTRA = struct.Struct('<hHH')   # temperatura x100, umidade x100, idade (ms)
+MAX_AMOSTRAS_QUADRO = 255
+MAX_BUFFER = 4096                 # Bytes sem nenhum quadro reconhecível a partir dos quais o buffer é descartado
+LINHA_TEXTO = re.compile(rb'Temp:\s*(-?\d+(?:\.\d+)?)\s*,\s*Hum:\s*(-?\d+(?:\.\d+)?)')
+FAIXA_TEMPERATURA = (-40.0, 85.0) # Faixas dos sensores DHT (leituras fora são rejeitadas)
+FAIXA_UMIDADE = (0.0, 100.0)
+
+
+def _tabela_crc8(polinomio=0x07):
+    tabela = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ polinomio) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        tabela.append(crc)
+    return bytes(tabela)
+
+_CRC8 = _tabela_crc8()
+
+
+def crc8(data):
+    """CRC-8 (poly 0x07, init 0) de data."""
+    crc = 0
+    for byte in data:
+        crc = _CRC8[crc ^ byte]
+    return crc
+
+
+def encode_binary_frame(seq, samples):
+    """Quadro binário com as amostras [(temperatura, umidade, idade_ms), ...]
+    (o que o Arduino envia; usado pelo arduino_simulado.py)."""
+    if not 0 < len(samples) <= MAX_AMOSTRAS_QUADRO:
+        raise ValueError(f"um quadro leva de 1 a {MAX_AMOSTRAS_QUADRO} amostras")
+    corpo = bytearray(CABECALHO.pack(seq & 0xFFFF, len(samples)))
+    for temperatura, umidade, idade_ms in samples:
+        corpo += AMOSTRA.pack(round(temperatura * 100), round(umidade * 100), min(int(idade_ms), 0xFFFF))
+    return SYNC + bytes(corpo) + bytes([crc8(corpo)])
+
+
+def _na_faixa(temperatura, umidade):
+    return (FAIXA_TEMPERATURA[0] <= temperatura <= FAIXA_TEMPERATURA[1]
+            and FAIXA_UMIDADE[0] <= umidade <= FAIXA_UMIDADE[1])
+
+
+class SerialFrameParser:
+    """Extrai amostras (timestamp, temperatura, umidade) dos bytes recebidos.
+
+    feed(data, now) aceita blocos de qualquer tamanho (quadros podem chegar
+    partidos entre leituras) e devolve as amostras completas encontradas.
+    Os timestamps nunca voltam no tempo: amostras binárias são datadas pela
+    idade (now - idade) e, depois de uma amostra de texto ou de um quadro com
+    idades maiores, poderiam ficar antes da última entregue; nesse caso
+    recebem o timestamp da última (o SensorRingBuffer e as janelas por
+    searchsorted dependem da ordem). Os contadores ficam em `stats`.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._next_seq = None
+        self._ultimo_timestamp = float('-inf') # Mantido no reset(): o buffer de destino é o mesmo
+        self.stats = {"text_frames": 0, "binary_frames": 0, "samples": 0,
+                      "parse_errors": 0, "dropped_samples": 0, "ignored_lines": 0}
+
+    def reset(self):
+        """Descarta o buffer e a sequência (após reconectar: o Arduino reinicia)."""
+        self._buffer.clear()
+        self._next_seq = None
+
+    def feed(self, data, now=None):
+        now = time.time() if now is None else now
+        buf = self._buffer
+        buf += data
+        amostras = []
+        while buf:
+            inicio_binario = buf.find(SYNC)
+            fim_linha = buf.find(b'\n')
+            if inicio_binario != -1 and (fim_linha == -1 or inicio_binario < fim_linha):
+                consumido = self._parse_binary(buf, inicio_binario, now, amostras)
+                if consumido == 0:
+                    break # Quadro ainda incompleto
+                del buf[:consumido]
+            elif fim_linha != -1:
+                self._parse_line(bytes(buf[:fim_linha]), now, amostras)
+                del buf[:fim_linha + 1]
+            else:
+                break
+        if len(buf) > MAX_BUFFER:
+            # Lixo sem quebra de linha nem sincronismo (baud errado, ruído)
+            self.stats["parse_errors"] += 1
+            buf.clear()
+        ultimo = self._ultimo_timestamp
+        for i, (timestamp, temperatura, umidade) in enumerate(amostras):
+            if timestamp < ultimo:
+                amostras[i] = (ultimo, temperatura, umidade)
+            else:
+                ultimo = timestamp
+        self._ultimo_timestamp = ultimo
+        self.stats["samples"] += len(amostras)
+        return amostras
+
+    def _parse_line(self, line, now, amostras):
+        match = LINHA_TEXTO.search(line)
+        if match is None:
+            if b'Temp' in line or b'Hum' in line:
+                self.stats["parse_errors"] += 1 # Ex.: "Temp:nan,Hum:nan" (falha de leitura do DHT)
+            elif line.strip():
+                self.stats["ignored_lines"] += 1 # Mensagens de depuração do sketch
+            return
+        temperatura, umidade = float(match.group(1)), float(match.group(2))
+        if not _na_faixa(temperatura, umidade):
+            self.stats["parse_errors"] += 1
+            return
+        self.stats["text_frames"] += 1
+        amostras.append((now, temperatura, umidade))
+
+    def _parse_binary(self, buf, inicio, now, amostras):
+        """Tenta um quadro binário em buf[inicio:]. Retorna quantos bytes de
+        buf foram consumidos (0 = esperar mais bytes)."""
+        corpo_inicio = inicio + len(SYNC)
+        if len(buf) < corpo_inicio + CABECALHO.size:
+            return 0
+        seq, n = CABECALHO.unpack_from(buf, corpo_inicio)
+        fim = corpo_inicio + CABECALHO.size + n * AMOSTRA.size
+        if len(buf) < fim + 1:
+            return 0
+        if n == 0 or crc8(buf[corpo_inicio:fim]) != buf[fim]:
+            # Corrompido: pula só o sincronismo e procura o próximo quadro
+            self.stats["parse_errors"] += 1
+            return inicio + 1
+
+        if self._next_seq is not None:
+            perdidas = (seq - self._next_seq) & 0xFFFF
+            if perdidas < 0x8000: # Salto para trás = Arduino reiniciado, não perda
+                self.stats["dropped_samples"] += perdidas
+        self._next_seq = (seq + n) & 0xFFFF
+        self.stats["binary_frames"] += 1
+
+        for temperatura, umidade, idade_ms in AMOSTRA.iter_unpack(bytes(buf[corpo_inicio + CABECALHO.size:fim])):
+            temperatura, umidade = temperatura / 100.0, umidade / 100.0
+            if _na_faixa(temperatura, umidade):
+                amostras.append((now - idade_ms / 1000.0, temperatura, umidade))
+            else:
+                self.stats["parse_errors"] += 1
+        return fim + 1
+
+
+class SerialReader:
+    """Lê a porta serial numa thread e entrega as amostras a on_samples(lista).
+    Um erro dentro de on_samples é contado (callback_errors) e a leitura continua.
+
+    settle: espera (s) após abrir a porta (o Arduino reinicia ao conectar).
+    backoff_min/backoff_max: espera (s) entre tentativas de reconexão.
+    opener: função que abre a porta (padrão serial.Serial; testes podem trocar).
+    """
+
+    def __init__(self, port, baudrate, on_samples, settle=2.0, backoff_min=1.0, backoff_max=30.0,
+                 read_timeout=0.5, opener=serial.Serial):
+        self.port = port
+        self.baudrate = baudrate
+        self.on_samples = on_samples
+        self.settle = settle
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.read_timeout = read_timeout
+        self.opener = opener
+
+        self.parser = SerialFrameParser()
+        self._lock = threading.Lock()
+        self._connected = False
+        self._reconnects = 0
+        self._reads = 0
+        self._bytes = 0
+        self._callback_errors = 0
+        self._last_error = None
+
+    def _open(self):
+        ser = self.opener(self.port, self.baudrate, timeout=self.read_timeout)
+        if self.settle:
+            time.sleep(self.settle)
+        ser.reset_input_buffer()
+        return ser
+
+    def _read_chunk(self, ser):
+        """Bloqueia até chegar ao menos 1 byte (ou o timeout) e devolve tudo o
+        que já estiver no buffer do sistema."""
+        data = ser.read(1)
+        if data:
+            pendentes = ser.in_waiting
+            if pendentes:
+                data += ser.read(pendentes)
+        return data
+
+    def run(self, stop_event=None):
+        """Loop de leitura com reconexão (rodar numa thread)."""
+        stop_event = stop_event or threading.Event()
+        backoff = self.backoff_min
+        primeira = True
+        while not stop_event.is_set():
+            try:
+                ser = self._open()
+            except (serial.SerialException, OSError) as e:
+                self._set_error(e)
+                if primeira:
+                    print(f"Erro Serial: {e}. Verifique se a porta está correta; tentando de novo em {backoff:.1f} s.")
+                primeira = False
+                stop_event.wait(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
+                continue
+
+            print("Thread Serial: Conectada ao Arduino.")
+            primeira = True
+            with self._lock:
+                self._connected = True
+            self.parser.reset()
+            backoff = self.backoff_min
+            try:
+                while not stop_event.is_set():
+                    data = self._read_chunk(ser)
+                    if not data:
+                        continue
+                    with self._lock:
+                        self._reads += 1
+                        self._bytes += len(data)
+                        amostras = self.parser.feed(data)
+                    if amostras:
+                        self._deliver(amostras)
+            except (serial.SerialException, OSError) as e:
+                self._set_error(e)
+                print(f"Thread Serial: conexão perdida ({e}); reconectando...")
+                with self._lock:
+                    self._reconnects += 1
+            finally:
+                with self._lock:
+                    self._connected = False
+                try:
+                    ser.close()
+                except Exception:
+                    pass
+
+    def _deliver(self, amostras):
+        """Entrega as amostras sem deixar um erro do consumidor derrubar a thread."""
+        try:
+            self.on_samples(amostras)
+        except Exception as e:
+            self._set_error(e)
+            with self._lock:
+                self._callback_errors += 1
+            print(f"Thread Serial: erro ao processar {len(amostras)} amostra(s): {e}")
+
+    def _set_error(self, erro):
+        with self._lock:
+            self._last_error = str(erro)
+
+    def stats(self):
+        with self._lock:
+            return {**self.parser.stats, "connected": self._connected, "reconnects": self._reconnects,
+                    "reads": self._reads, "bytes": self._bytes, "callback_errors": self._callback_errors,
+                    "last_error": self._last_error}
@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+# =================================================================
+# MEDIÇÃO DO TEMPO DE INICIALIZAÇÃO (para acompanhar entre versões)
+# =================================================================
+# 1. Tempo de import de interface_grafica (python -X importtime), que é o
+#    que atrasa o aparecimento da janela. Tem um orçamento máximo.
+# 2. Tempo de carregamento do modelo em cada backend (roda em segundo plano
+#    na GUI, mas ainda define quando a primeira predição sai).
+# Cada medição é processada em um interpretador novo (sem cache de import).
+
+IMPORT_BUDGET_MS = 1500          # Orçamento para 'import interface_grafica'
+MODULO_GUI = 'interface_grafica'
+
+PASTA_PROJETO = os.path.dirname(os.path.abspath(__file__))
+
+_LINHA_IMPORTTIME = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def medir_import(modulo, repeticoes):
+    """Retorna (tempo_cumulativo_ms, 5 imports diretos mais caros) do import do módulo."""
+    tempos = []
+    mais_caros = []
+    for _ in range(repeticoes):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+            capture_output=True, text=True, cwd=PASTA_PROJETO
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"Falha ao importar {modulo}:\n{proc.stderr[-2000:]}")
+
+        total, diretos = None, {}
+        for linha in proc.stderr.splitlines():
+            m = _LINHA_IMPORTTIME.match(linha)
+            if not m:
+                continue
+            # O recuo indica a profundidade: 1 espaço = nível 0, 3 espaços = import direto
+            nivel = (len(m.group(3)) - 1) // 2
+            ms = int(m.group(2)) / 1000
+            if nivel == 0 and m.group(4) == modulo:
+                total = ms
+            elif nivel == 1:
+                diretos[m.group(4)] = ms
+        tempos.append(total)
+        mais_caros = sorted(diretos.items(), key=lambda kv: kv[1], reverse=True)[:5]
+    return min(tempos), mais_caros
+
+
+def medir_carregamento_modelo(backend):
+    """Tempo (ms) de 'import servidor_pc' + load_ml_model() num processo novo.
+    Os caminhos dos modelos são relativos à pasta atual, como na GUI."""
+    codigo = (
+        "import time; t = time.perf_counter(); import servidor_pc; "
+        "ok = servidor_pc.load_ml_model(); "
+        "print('RESULTADO', ok, (time.perf_counter() - t) * 1000)"
+    )
+    env = dict(os.environ, FUNGOEYE_BACKEND=backend, TF_CPP_MIN_LOG_LEVEL='2', PYTHONPATH=PASTA_PROJETO)
+    proc = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, env=env)
+    for linha in proc.stdout.splitlines():
+        if linha.startswith('RESULTADO'):
+            _, ok, ms = linha.split()
+            return float(ms) if ok == 'True' else None
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o tempo de inicialização da GUI e do modelo.")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--orcamento-ms', type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument('--saida', help="Acrescenta o resultado (uma linha JSON) neste arquivo")
+    args = parser.parse_args()
+
+    import_ms, mais_caros = medir_import(MODULO_GUI, args.repeticoes)
+    print(f"import {MODULO_GUI}: {import_ms:.0f} ms (orçamento: {args.orcamento_ms:.0f} ms)")
+    for nome, ms in mais_caros:
+        print(f"    {nome:<30}{ms:>8.0f} ms")
+
+    resultado = {"timestamp": time.time(), "import_gui_ms": import_ms, "orcamento_ms": args.orcamento_ms}
+    for backend in ('keras', 'tflite'):
+        ms = medir_carregamento_modelo(backend)
+        resultado[f"carregar_modelo_{backend}_ms"] = ms
+        print(f"carregar modelo ({backend}): " + (f"{ms:.0f} ms" if ms is not None else "indisponível"))
+
+    if args.saida:
+        with open(args.saida, 'a') as f:
+            f.write(json.dumps(resultado) + '\n')
+
+    if import_ms > args.orcamento_ms:
+        print("❌ Orçamento de inicialização estourado!")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import threading
+
+import numpy as np
+
+# =================================================================
+# BACKEND DE INFERÊNCIA TFLITE (sem TensorFlow completo)
+# =================================================================
+# Usa o pacote leve tflite-runtime (ou ai-edge-litert) quando disponível,
+# o que permite rodar o modelo até na própria Raspberry Pi. O TensorFlow
+# completo só é importado como último recurso.
+
+
+def _interpreter_class():
+    """Retorna a classe Interpreter do pacote TFLite disponível."""
+    try:
+        from tflite_runtime.interpreter import Interpreter # type: ignore
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from ai_edge_litert.interpreter import Interpreter # type: ignore
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+class TFLiteModel:
+    """Modelo .tflite (float32, float16 ou int8) com a mesma entrada do
+    servidor: lote de imagens uint8 (N, 128, 128, 3), sem normalização.
+
+    A normalização /255 e a (de)quantização dos modelos int8 são feitas
+    aqui, a partir dos parâmetros gravados no próprio arquivo; quando a
+    entrada int8/uint8 tem escala 1/255 (o caso do exportar_tflite.py), o
+    lote uint8 entra direto, sem passar por float32. Seguro entre
+    threads: o interpretador é um só, então as chamadas a predict são
+    serializadas.
+    """
+
+    def __init__(self, path, num_threads=None):
+        self.path = path
+        self.interpreter = _interpreter_class()(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input['shape'][0])
+        self._lock = threading.Lock()
+
+    def _resize(self, batch_size):
+        """Ajusta o tamanho de lote do interpretador (só quando muda)."""
+        if batch_size != self._batch_size:
+            shape = [batch_size] + list(self._input['shape'][1:])
+            self.interpreter.resize_tensor_input(self._input['index'], shape)
+            self.interpreter.allocate_tensors()
+            self._batch_size = batch_size
+
+    def _prepare_input(self, batch):
+        dtype = self._input['dtype']
+        scale, zero_point = self._input['quantization']
+        if dtype == np.float32 or not scale:
+            return (batch.astype('float32') / 255.0).astype(dtype)
+        if batch.dtype == np.uint8 and np.isclose(scale, 1 / 255.0, rtol=1e-5):
+            # Entrada quantizada em passos de 1/255: o próprio lote uint8 já é
+            # o valor quantizado (int8 com zero_point -128: só desloca 128)
+            if dtype == np.uint8 and zero_point == 0:
+                return batch
+            if dtype == np.int8 and zero_point == -128:
+                return (batch ^ 0x80).view(np.int8) # x - 128 em complemento de dois
+        # Outras escalas: quantiza num único array float32, no lugar
+        info = np.iinfo(dtype)
+        x = batch.astype('float32')
+        x *= 1.0 / (255.0 * scale)
+        x += zero_point
+        np.round(x, out=x)
+        np.clip(x, info.min, info.max, out=x)
+        return x.astype(dtype)
+
+    def _read_output(self):
+        y = self.interpreter.get_tensor(self._output['index'])
+        scale, zero_point = self._output['quantization']
+        if y.dtype != np.float32 and scale:
+            y = (y.astype('float32') - zero_point) * scale
+        return y
+
+    def predict(self, batch):
+        """Recebe um lote uint8 (N, H, W, 3). Retorna P(Saudável) de cada imagem."""
+        batch = np.asarray(batch)
+        x = self._prepare_input(batch)
+        # resize/set_tensor/invoke/get_tensor mexem nos mesmos tensores do interpretador
+        with self._lock:
+            self._resize(len(batch))
+            self.interpreter.set_tensor(self._input['index'], x)
+            self.interpreter.invoke()
+            return self._read_output()[:, 0]
@@ -0,0 +1,84 @@
+import threading
+
+import cv2
+import numpy as np
+
+# =================================================================
+# PRÉ-PROCESSAMENTO COMPARTILHADO (modelo e GUI)
+# =================================================================
+# Os frames chegam da câmera em BGR (padrão do OpenCV), mas o modelo foi
+# treinado em RGB (as imagens de treino são lidas pelo PIL no
+# treinar_modelo.py). Toda conversão de cor e de tamanho passa por aqui:
+#   - para o modelo, cada frame é redimensionado/convertido direto na sua
+#     posição de um lote uint8 pré-alocado e reaproveitado. No Keras a
+#     normalização /255 roda dentro do grafo (compile_model_fn); no TFLite
+#     int8/uint8 com entrada de escala 1/255 o lote uint8 entra direto. Só os
+#     .tflite float32/float16 (ou com outra escala) convertem o lote para
+#     float32, uma vez por lote (modelo_tflite.py);
+#   - para a GUI, o frame é reduzido ANTES da conversão de cor (a conversão
+#     roda sobre 300x300 em vez da resolução cheia).
+
+ORDEM_CAMERA = 'BGR'  # Ordem dos canais dos frames vindos da RPi (OpenCV)
+ORDEM_MODELO = 'RGB'  # Ordem dos canais usada no treinamento (PIL / Keras)
+
+
+def _conversao(ordem_origem, ordem_destino):
+    """Código cv2.cvtColor entre as ordens (None se já são iguais)."""
+    if ordem_origem == ordem_destino:
+        return None
+    return cv2.COLOR_BGR2RGB # Troca simétrica: serve para BGR->RGB e RGB->BGR
+
+
+def prepare_into(frame, out, ordem_origem=ORDEM_CAMERA, ordem_destino=ORDEM_MODELO):
+    """Escreve em `out` (uint8, altura x largura x 3, contíguo) o frame no
+    tamanho de `out` e na ordem de canais de destino, sem alocar o resultado."""
+    altura, largura = out.shape[:2]
+    conversao = _conversao(ordem_origem, ordem_destino)
+    if frame.shape[:2] != (altura, largura):
+        cv2.resize(frame, (largura, altura), dst=out, interpolation=cv2.INTER_AREA)
+        if conversao is not None:
+            cv2.cvtColor(out, conversao, dst=out)
+    elif conversao is not None:
+        cv2.cvtColor(frame, conversao, dst=out)
+    else:
+        np.copyto(out, frame)
+    return out
+
+
+class BatchBuffer:
+    """Lote uint8 pré-alocado (max_batch x altura x largura x 3), reaproveitado
+    a cada chamada de fill(). Cresce só se chegar um lote maior que o atual.
+
+    O array devolvido por fill() é uma view do buffer: vale até a próxima
+    chamada (quem precisar guardá-lo, como a versão sombra, deve copiar).
+    Seguro entre threads: fill() e o uso do lote devem ficar sob `lock`
+    quando o buffer for compartilhado.
+    """
+
+    def __init__(self, max_batch, height, width, ordem_origem=ORDEM_CAMERA, ordem_destino=ORDEM_MODELO):
+        self.height, self.width = height, width
+        self.ordem_origem, self.ordem_destino = ordem_origem, ordem_destino
+        self.lock = threading.Lock()
+        self._buffer = np.empty((max_batch, height, width, 3), dtype=np.uint8)
+
+    def fill(self, frames):
+        """Prepara os frames (qualquer tamanho, ordem_origem) no buffer. Retorna a view do lote."""
+        n = len(frames)
+        if n > len(self._buffer):
+            self._buffer = np.empty((n, self.height, self.width, 3), dtype=np.uint8)
+        for i, frame in enumerate(frames):
+            prepare_into(frame, self._buffer[i], self.ordem_origem, self.ordem_destino)
+        return self._buffer[:n]
+
+
+def display_image(frame, size, ordem_origem=ORDEM_CAMERA):
+    """Frame reduzido para exibição (size=(largura, altura)), em RGB para o PIL."""
+    largura, altura = size
+    if frame.shape[:2] != (altura, largura):
+        # INTER_AREA ao reduzir (nítido e barato); ao ampliar, INTER_CUBIC
+        interpolacao = cv2.INTER_AREA if frame.shape[1] >= largura else cv2.INTER_CUBIC
+        frame = cv2.resize(frame, size, interpolation=interpolacao)
+    conversao = _conversao(ordem_origem, 'RGB')
+    if conversao is None:
+        return frame if frame.flags.c_contiguous else np.ascontiguousarray(frame)
+    return cv2.cvtColor(frame, conversao)
@@ -0,0 +1,127 @@
+import json
+import struct
+import numpy as np
+
+# =================================================================
+# PROTOCOLO BINÁRIO DE TRANSFERÊNCIA DE CAPTURAS (RPi <-> PC)
+# =================================================================
+# O corpo da resposta é o frame cru (bytes uint8, ordem C) e os metadados
+# (formato do array, dtype e dados do sensor) vão nos cabeçalhos HTTP.
+# Isso evita serializar 49.152 inteiros Python em JSON a cada captura.
+
+CONTENT_TYPE_BINARIO = 'application/octet-stream'
+CONTENT_TYPE_LOTE = 'application/x-fungoeye-batch'
+
+HEADER_SHAPE = 'X-Frame-Shape'
+HEADER_DTYPE = 'X-Frame-Dtype'
+HEADER_TEMPERATURA = 'X-Temperature'
+HEADER_UMIDADE = 'X-Humidity'
+HEADER_TIMESTAMP = 'X-Timestamp'
+
+
+def _header_float(valor):
+    """Converte um valor numérico (ou None) para texto de cabeçalho."""
+    return '' if valor is None else repr(float(valor))
+
+
+def _float_header(texto):
+    """Converte o texto de um cabeçalho de volta para float (ou None)."""
+    return float(texto) if texto else None
+
+
+def encode_capture(frame, temperature, humidity, timestamp):
+    """Serializa uma captura. Retorna (corpo_em_bytes, cabeçalhos)."""
+    frame = np.ascontiguousarray(frame)
+    headers = {
+        'Content-Type': CONTENT_TYPE_BINARIO,
+        HEADER_SHAPE: ','.join(str(d) for d in frame.shape),
+        HEADER_DTYPE: frame.dtype.str,
+        HEADER_TEMPERATURA: _header_float(temperature),
+        HEADER_UMIDADE: _header_float(humidity),
+        HEADER_TIMESTAMP: _header_float(timestamp),
+    }
+    return frame.tobytes(), headers
+
+
+def decode_capture(body, headers):
+    """Reconstrói a captura a partir do corpo e dos cabeçalhos HTTP.
+
+    Retorna um dicionário no mesmo formato do antigo JSON ('image_data'
+    passa a ser um array numpy em vez de lista aninhada).
+    """
+    shape = tuple(int(d) for d in headers[HEADER_SHAPE].split(','))
+    dtype = np.dtype(headers.get(HEADER_DTYPE, '|u1'))
+    frame = np.frombuffer(body, dtype=dtype).reshape(shape)
+    return {
+        "image_data": frame,
+        "temperature": _float_header(headers.get(HEADER_TEMPERATURA)),
+        "humidity": _float_header(headers.get(HEADER_UMIDADE)),
+        "timestamp": _float_header(headers.get(HEADER_TIMESTAMP)),
+    }
+
+
+
+# =================================================================
+# LOTE DE CAPTURAS (/api/captures)
+# =================================================================
+# Corpo: [4 bytes big-endian com o tamanho do manifesto][manifesto JSON]
+# seguido dos frames crus concatenados, na ordem do manifesto.
+
+_TAMANHO_MANIFESTO = struct.Struct('>I')
+
+
+def encode_capture_batch(captures, **extra):
+    """Serializa uma lista de capturas (dicts com 'image_data', 'capture_id',
+    'temperature', 'humidity', 'timestamp' e, opcionalmente, 'trigger' e
+    'screening' (pontuação da triagem na RPi)) em um único corpo binário.
+    Campos extras (ex.: boot_id) vão no manifesto.
+    """
+    frames = [np.ascontiguousarray(c["image_data"]) for c in captures]
+    manifest = dict(extra)
+    manifest["captures"] = [
+        {
+            "capture_id": c["capture_id"],
+            "shape": list(frame.shape),
+            "dtype": frame.dtype.str,
+            "nbytes": frame.nbytes,
+            "temperature": c["temperature"],
+            "humidity": c["humidity"],
+            "timestamp": c["timestamp"],
+            "trigger": c.get("trigger", "manual"),
+            "screening": c.get("screening"),
+            "screening_verdict": c.get("screening_verdict"),
+        }
+        for c, frame in zip(captures, frames)
+    ]
+    manifest_bytes = json.dumps(manifest).encode('utf-8')
+    partes = [_TAMANHO_MANIFESTO.pack(len(manifest_bytes)), manifest_bytes]
+    partes.extend(frame.data for frame in frames)
+    return b''.join(partes)
+
+
+def decode_capture_batch(body):
+    """Inverso de encode_capture_batch. Retorna (manifesto, lista_de_capturas).
+
+    Os frames são views (np.frombuffer) sobre o corpo recebido, sem cópia.
+    """
+    (tamanho,) = _TAMANHO_MANIFESTO.unpack_from(body, 0)
+    inicio = _TAMANHO_MANIFESTO.size
+    manifest = json.loads(bytes(body[inicio:inicio + tamanho]))
+    offset = inicio + tamanho
+
+    captures = []
+    for meta in manifest.pop("captures"):
+        frame = np.frombuffer(body, dtype=np.dtype(meta["dtype"]),
+                              count=int(np.prod(meta["shape"])), offset=offset)
+        offset += meta["nbytes"]
+        captures.append({
+            "capture_id": meta["capture_id"],
+            "image_data": frame.reshape(meta["shape"]),
+            "temperature": meta["temperature"],
+            "humidity": meta["humidity"],
+            "timestamp": meta["timestamp"],
+            "trigger": meta.get("trigger", "manual"),
+            "screening": meta.get("screening"),
+            "screening_verdict": meta.get("screening_verdict"),
+        })
+    return manifest, captures
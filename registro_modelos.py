@@ -0,0 +1,316 @@
+import gc
+import os
+import queue
+import re
+import threading
+import time
+
+import numpy as np
+
+# =================================================================
+# REGISTRO DE VERSÕES DO MODELO (troca a quente, rollback e sombra)
+# =================================================================
+# Uma pasta guarda os modelos versionados (modelo_fungo_v1.h5,
+# modelo_fungo_v2.h5, ...). O registro vigia a pasta, carrega cada versão
+# nova em segundo plano, aquece com um lote de teste e só então a ativa,
+# trocando uma única referência: cada lote de inferência pega a versão ativa
+# no início e termina com ela, então nada em andamento é interrompido.
+# Versões ativadas ficam num histórico para rollback, e uma versão "sombra"
+# pode rodar nos mesmos frames só para comparar latência e concordância.
+# Só ficam na memória a versão ativa, a anterior do histórico (rollback
+# instantâneo) e a sombra; as demais são liberadas a cada troca e, se
+# pedidas de novo (rollback mais antigo), recarregadas do disco.
+
+VERSAO_REGEX = re.compile(r'^(?P<nome>.+)_v(?P<numero>\d+)(?P<ext>\.[A-Za-z0-9]+)$')
+
+
+def version_number(filename):
+    """Número da versão em '<nome>_v<N>.<ext>' (None se o nome não segue o padrão)."""
+    match = VERSAO_REGEX.match(os.path.basename(filename))
+    return int(match.group('numero')) if match else None
+
+
+def next_version_path(directory, nome='modelo_fungo', ext='.h5'):
+    """Caminho da próxima versão livre em directory (cria a pasta se preciso)."""
+    os.makedirs(directory, exist_ok=True)
+    numeros = [version_number(f) for f in os.listdir(directory)]
+    proximo = max([n for n in numeros if n is not None], default=0) + 1
+    return os.path.join(directory, f"{nome}_v{proximo}{ext}")
+
+
+def _numero(version):
+    """'v3' -> 3; versões fora do padrão (ex.: 'base') valem -1."""
+    return int(version[1:]) if version[:1] == 'v' and version[1:].isdigit() else -1
+
+
+class ModelVersion:
+    """Uma versão carregada: nome ('v3'), arquivo, modelo e função de predição."""
+
+    def __init__(self, version, path, model, predict_fn):
+        self.version = version
+        self.path = path
+        self.model = model
+        self.predict_fn = predict_fn
+        self.loaded_at = time.time()
+
+
+class ModelRegistry:
+    """Versões do modelo disponíveis em `directory`.
+
+    loader(path) -> (modelo, função lote_uint8 -> P(Saudável)).
+    warmup_batch: lote passado a cada versão antes de ativá-la.
+    extensions: extensões aceitas (ex.: ('.h5', '.keras') ou ('.tflite',)).
+    on_activate(ModelVersion): chamado a cada troca da versão ativa.
+    auto_activate: ativa sozinho a maior versão nova encontrada na pasta.
+    base_path: arquivo fora da pasta tratado como a versão 'base' (anterior
+    a todas as numeradas), usado quando ainda não há versões.
+    """
+
+    def __init__(self, directory, loader, warmup_batch, extensions=('.h5', '.keras'),
+                 on_activate=None, auto_activate=True, base_path=None):
+        self.directory = directory
+        self.base_path = base_path
+        self.loader = loader
+        self.warmup_batch = warmup_batch
+        self.extensions = tuple(extensions)
+        self.on_activate = on_activate
+        self.auto_activate = auto_activate
+
+        self._lock = threading.RLock()
+        self._loaded = {}       # versão -> ModelVersion
+        self._mtimes = {}       # arquivo -> mtime da última leitura
+        self._history = []      # versões ativadas, da mais antiga para a atual
+        self.active = None      # ModelVersion ativa (troca atômica da referência)
+        self.shadow = None      # ModelVersion sombra (ou None)
+
+    # --- Descoberta e carregamento ---
+
+    def available(self):
+        """{versão: arquivo} das versões disponíveis, em ordem crescente."""
+        versoes = {}
+        if self.base_path and os.path.exists(self.base_path):
+            versoes['base'] = self.base_path
+        try:
+            nomes = os.listdir(self.directory)
+        except FileNotFoundError:
+            nomes = []
+        encontrados = sorted(
+            (version_number(n), os.path.join(self.directory, n)) for n in nomes
+            if version_number(n) is not None and os.path.splitext(n)[1] in self.extensions
+        )
+        versoes.update((f"v{numero}", path) for numero, path in encontrados)
+        return versoes
+
+    def load(self, version, path=None):
+        """Carrega e aquece uma versão (sem ativá-la). Retorna a ModelVersion."""
+        path = path or self.available()[version]
+        mtime = os.stat(path).st_mtime_ns
+        model, predict_fn = self.loader(path)
+        predict_fn(self.warmup_batch) # Traça o grafo / aloca os tensores antes do tráfego real
+        carregada = ModelVersion(version, path, model, predict_fn)
+        with self._lock:
+            self._loaded[version] = carregada
+            self._mtimes[path] = mtime
+        print(f"Registro de modelos: versão {version} carregada ({path}).")
+        return carregada
+
+    def get(self, version):
+        """Versão já carregada ou carregada agora."""
+        with self._lock:
+            carregada = self._loaded.get(version)
+        return carregada or self.load(version)
+
+    def _release_unused(self):
+        """Libera as versões carregadas que não são a ativa, a anterior do
+        histórico nem a sombra (cada uma prende um modelo inteiro na memória)."""
+        with self._lock:
+            manter = set(self._history[-2:])
+            for carregada in (self.active, self.shadow):
+                if carregada is not None:
+                    manter.add(carregada.version)
+            liberadas = [v for v in self._loaded if v not in manter]
+            for version in liberadas:
+                del self._loaded[version]
+        if liberadas:
+            gc.collect()
+            print(f"Registro de modelos: versão(ões) {', '.join(sorted(liberadas, key=_numero))} liberada(s) da memória.")
+        return liberadas
+
+    # --- Ativação, rollback e sombra ---
+
+    def _set_active(self, carregada):
+        with self._lock:
+            self.active = carregada
+        if self.on_activate is not None:
+            self.on_activate(carregada)
+        print(f"🔄 Modelo ativo: versão {carregada.version}.")
+
+    def activate(self, version, path=None):
+        """Ativa uma versão (carrega se preciso). As anteriores ficam no
+        histórico; só a imediatamente anterior continua carregada."""
+        carregada = self.load(version, path) if path else self.get(version)
+        with self._lock:
+            if self._history and self._history[-1] == version:
+                self._history.pop()
+            self._history.append(version)
+        self._set_active(carregada)
+        self._release_unused()
+        return carregada
+
+    def rollback(self):
+        """Volta para a versão ativada antes da atual. Retorna a versão ativa."""
+        with self._lock:
+            if len(self._history) < 2:
+                raise ValueError("Não há versão anterior para voltar.")
+            self._history.pop()
+            version = self._history[-1]
+        anterior = self.get(version) # Recarregada do disco se já foi liberada
+        self._set_active(anterior)
+        self._release_unused()
+        return anterior
+
+    def set_shadow(self, version):
+        """Roda `version` em paralelo à ativa só para comparação (None desliga)."""
+        carregada = None if version is None else self.get(version)
+        with self._lock:
+            self.shadow = carregada
+        self._release_unused()
+        return carregada
+
+    # --- Vigia da pasta ---
+
+    def poll(self):
+        """Verifica a pasta. Recarrega versões já carregadas cujo arquivo mudou
+        e, com auto_activate, carrega e ativa a maior versão se for mais nova
+        que a ativa (ou a própria ativa regravada). Versões mais antigas só são
+        carregadas quando pedidas (activate/set_shadow). Retorna as versões
+        carregadas nesta chamada."""
+        mudadas = {}
+        for version, path in self.available().items():
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            with self._lock:
+                if self._mtimes.get(path) != mtime:
+                    mudadas[version] = (path, mtime)
+
+        with self._lock:
+            carregadas = set(self._loaded)
+            ativa = self.active.version if self.active is not None else None
+        maior = max(mudadas, key=_numero, default=None)
+        ativar = self.auto_activate and maior is not None and (ativa is None or _numero(maior) >= _numero(ativa))
+
+        novas = []
+        for version, (path, mtime) in mudadas.items():
+            if version in carregadas or (ativar and version == maior):
+                try:
+                    self.load(version, path)
+                    novas.append(version)
+                except Exception as e:
+                    # Arquivo ainda sendo copiado ou corrompido: tenta de novo depois
+                    print(f"Registro de modelos: erro ao carregar {path}: {e}")
+            else:
+                with self._lock:
+                    self._mtimes[path] = mtime # Conhecida, carregada só se for pedida
+
+        with self._lock:
+            if self.shadow is not None and self.shadow.version in novas:
+                self.shadow = self._loaded[self.shadow.version]
+        if ativar and maior in novas:
+            self.activate(maior)
+        elif ativa in novas:
+            self._set_active(self.get(ativa)) # A versão ativa foi regravada
+        self._release_unused()
+        return novas
+
+    def watch(self, stop_event=None, interval=10.0):
+        """Loop de vigia da pasta (rodar numa thread)."""
+        stop_event = stop_event or threading.Event()
+        while not stop_event.wait(interval):
+            self.poll()
+
+    def status(self):
+        with self._lock:
+            return {
+                "active": self.active.version if self.active else None,
+                "shadow": self.shadow.version if self.shadow else None,
+                "loaded": sorted(self._loaded),
+                "history": list(self._history),
+                "available": list(self.available()),
+            }
+
+
+class ShadowRunner:
+    """Executa a versão sombra nos mesmos lotes da versão ativa, numa thread
+    própria (não soma latência às predições reais). Se a sombra ficar para
+    trás, lotes são descartados em vez de acumular."""
+
+    def __init__(self, threshold=0.5, max_pending=4):
+        self.threshold = threshold
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stats = {"batches": 0, "frames": 0, "agree": 0, "dropped": 0, "errors": 0,
+                          "abs_diff_sum": 0.0, "active_ms_sum": 0.0, "shadow_ms_sum": 0.0,
+                          "active": None, "shadow": None}
+
+    def submit(self, shadow, batch, active_version, active_probs, active_ms):
+        """Agenda a comparação de um lote já predito pela versão ativa."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ShadowModel", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait((shadow, batch, active_version, np.asarray(active_probs), active_ms))
+        except queue.Full:
+            with self._lock:
+                self.stats["dropped"] += 1
+
+    def _run(self):
+        while True:
+            shadow, batch, active_version, active_probs, active_ms = self._queue.get()
+            inicio = time.perf_counter()
+            try:
+                shadow_probs = np.asarray(shadow.predict_fn(batch))
+            except Exception:
+                with self._lock:
+                    self.stats["errors"] += 1
+                continue
+            shadow_ms = (time.perf_counter() - inicio) * 1000
+            concordam = (active_probs >= self.threshold) == (shadow_probs >= self.threshold)
+            with self._lock:
+                s = self.stats
+                if (s["active"], s["shadow"]) != (active_version, shadow.version):
+                    # Outra dupla de versões: recomeça a comparação
+                    s.update(batches=0, frames=0, agree=0, abs_diff_sum=0.0,
+                             active_ms_sum=0.0, shadow_ms_sum=0.0,
+                             active=active_version, shadow=shadow.version)
+                s["batches"] += 1
+                s["frames"] += len(active_probs)
+                s["agree"] += int(concordam.sum())
+                s["abs_diff_sum"] += float(np.abs(active_probs - shadow_probs).sum())
+                s["active_ms_sum"] += active_ms
+                s["shadow_ms_sum"] += shadow_ms
+
+    def summary(self):
+        """Concordância dos rótulos, diferença média de probabilidade e
+        latência média por lote (ativa x sombra)."""
+        with self._lock:
+            s = dict(self.stats)
+        lotes, frames = s["batches"], s["frames"]
+        return {
+            "active": s["active"],
+            "shadow": s["shadow"],
+            "frames": frames,
+            "agreement": s["agree"] / frames if frames else None,
+            "mean_abs_diff": s["abs_diff_sum"] / frames if frames else None,
+            "active_ms_per_batch": s["active_ms_sum"] / lotes if lotes else None,
+            "shadow_ms_per_batch": s["shadow_ms_sum"] / lotes if lotes else None,
+            "dropped_batches": s["dropped"],
+            "errors": s["errors"],
+        }
@@ -0,0 +1,119 @@
+import threading
+import time
+import numpy as np
+
+# =================================================================
+# SÉRIES TEMPORAIS EM MEMÓRIA (buffer circular NumPy + agregação)
+# =================================================================
+# Guarda amostras (timestamp, temperatura, umidade) em arrays NumPy de
+# tamanho fixo, em vez de milhões de dicts Python, e agrega intervalos em
+# buckets min/média/máx com operações vetorizadas (reduceat). Para os
+# gráficos da GUI, decimate_minmax reduz qualquer série a um par min/máx por
+# coluna de pixel.
+
+
+class SensorRingBuffer:
+    """Buffer circular de amostras de sensor com capacidade e retenção fixas.
+
+    capacity: número máximo de amostras (as mais antigas são sobrescritas).
+    retention: idade máxima (s) das amostras devolvidas (None = sem limite).
+    """
+
+    def __init__(self, capacity, retention=None):
+        self.capacity = capacity
+        self.retention = retention
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._temperature = np.zeros(capacity, dtype=np.float32)
+        self._humidity = np.zeros(capacity, dtype=np.float32)
+        self._head = 0   # Próxima posição de escrita
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, temperature, humidity):
+        with self._lock:
+            i = self._head
+            self._timestamps[i] = timestamp
+            self._temperature[i] = temperature
+            self._humidity[i] = humidity
+            self._head = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def _ordered(self, array):
+        """Cópia do conteúdo válido em ordem cronológica (mais antiga primeiro)."""
+        if self._count < self.capacity:
+            return array[:self._count].copy()
+        return np.concatenate((array[self._head:], array[:self._head]))
+
+    def snapshot(self, start=None, end=None):
+        """Retorna (timestamps, temperatura, umidade) no intervalo [start, end]."""
+        with self._lock:
+            t = self._ordered(self._timestamps)
+            temp = self._ordered(self._temperature)
+            hum = self._ordered(self._humidity)
+
+        if self.retention is not None:
+            limite = time.time() - self.retention
+            start = limite if start is None else max(start, limite)
+        lo = 0 if start is None else np.searchsorted(t, start, side='left')
+        hi = len(t) if end is None else np.searchsorted(t, end, side='right')
+        return t[lo:hi], temp[lo:hi], hum[lo:hi]
+
+
+def aggregate_buckets(timestamps, bucket_seconds, **series):
+    """Agrupa amostras ordenadas por tempo em buckets de bucket_seconds.
+
+    Retorna um dict colunar: 't' (início de cada bucket), 'count' e, para cada
+    série nomeada, {'min': [...], 'mean': [...], 'max': [...]}. Buckets sem
+    amostras são omitidos.
+    """
+    if len(timestamps) == 0:
+        return {"t": [], "count": [], **{nome: {"min": [], "mean": [], "max": []} for nome in series}}
+
+    keys = np.floor(timestamps / bucket_seconds).astype(np.int64)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+    counts = np.diff(np.append(starts, len(keys)))
+
+    result = {"t": (keys[starts] * bucket_seconds).tolist(), "count": counts.tolist()}
+    for nome, valores in series.items():
+        valores = np.asarray(valores, dtype=np.float64)
+        result[nome] = {
+            "min": np.minimum.reduceat(valores, starts).tolist(),
+            "mean": (np.add.reduceat(valores, starts) / counts).tolist(),
+            "max": np.maximum.reduceat(valores, starts).tolist(),
+        }
+    return result
+
+
+def decimate_minmax(timestamps, mins, maxs=None, start=None, end=None, columns=800):
+    """Reduz uma série ordenada por tempo a uma coluna por pixel de um gráfico.
+
+    Divide [start, end] em `columns` colunas e guarda, em cada uma, o mínimo
+    de `mins` e o máximo de `maxs` (ou dos próprios valores, se maxs=None):
+    desenhar uma linha vertical min -> max por coluna mostra os mesmos picos
+    que a série inteira, com custo proporcional à largura e não às amostras.
+    Aceita tanto amostras brutas quanto buckets já agregados (min/máx).
+    Valores NaN/None são ignorados.
+
+    Retorna (coluna, mínimo, máximo) das colunas com dados, como arrays.
+    """
+    t = np.asarray(timestamps, dtype=np.float64)
+    lo_vals = np.asarray(mins, dtype=np.float64)
+    hi_vals = lo_vals if maxs is None else np.asarray(maxs, dtype=np.float64)
+    if start is None:
+        start = t[0] if len(t) else 0.0
+    if end is None:
+        end = t[-1] if len(t) else 0.0
+
+    validos = np.isfinite(lo_vals) & np.isfinite(hi_vals) & (t >= start) & (t <= end)
+    t, lo_vals, hi_vals = t[validos], lo_vals[validos], hi_vals[validos]
+    if len(t) == 0 or columns <= 0:
+        vazio = np.zeros(0)
+        return vazio.astype(np.int64), vazio, vazio
+
+    span = max(end - start, 1e-9)
+    keys = np.minimum(((t - start) * (columns / span)).astype(np.int64), columns - 1)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+    return keys[starts], np.minimum.reduceat(lo_vals, starts), np.maximum.reduceat(hi_vals, starts)
@@ -4,8 +4,19 @@ import requests
 import time
 import os
 import threading
-from tensorflow.keras.models import load_model # type: ignore
+import queue
+import collections
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import logging
+from protocolo_captura import decode_capture_batch
+from historico import HISTORICO_DB_PATH, HistoricoAnalises
+from inferencia_janelas import aggregate_prob, build_heatmap, extract_tiles
+from contadores import PROMETHEUS_CONTENT_TYPE, StageCounters, prometheus_text
+from registro_modelos import ModelRegistry, ModelVersion, ShadowRunner
+from preprocessamento import ORDEM_CAMERA, ORDEM_MODELO, BatchBuffer
+from arquivamento import Archiver
+from cache_predicoes import PredictionCache
 
 # Desabilita logs irritantes do TensorFlow
 logging.getLogger("tensorflow").setLevel(logging.ERROR)
@@ -15,9 +26,53 @@ logging.getLogger("tensorflow").setLevel(logging.ERROR)
 # =================================================================
 # Mude este IP para o IP REAL da sua Raspberry Pi
 RPi_IP = '192.168.0.14' 
-RPi_CAPTURE_URL = f"http://{RPi_IP}:8080/api/captured_data"
+# Para monitorar várias RPis, liste "ip[:porta]" separados por vírgula em
+# FUNGOEYE_RPI_NODES (ex.: "192.168.0.14,192.168.0.15,192.168.0.16:8081")
+RPi_NODES = [n.strip() for n in os.environ.get("FUNGOEYE_RPI_NODES", RPi_IP).split(',') if n.strip()]
 MODELO_PATH = 'modelo_fungo.h5'      
+MODELO_TFLITE_PATH = os.environ.get("FUNGOEYE_MODELO_TFLITE", 'modelo_fungo_int8.tflite')
+# Backend de inferência: 'keras' (TensorFlow completo + .h5) ou 'tflite'
+# (somente o interpretador TFLite; gere os arquivos com exportar_tflite.py)
+INFERENCE_BACKEND = os.environ.get("FUNGOEYE_BACKEND", 'keras')
+# Versões do modelo (modelo_fungo_v<N>.h5 ou .tflite, conforme o backend),
+# publicadas pelo treinar_modelo.py. A maior versão é ativada sozinha, sem
+# reiniciar; sem versões na pasta, usa MODELO_PATH/MODELO_TFLITE_PATH.
+MODELOS_DIR = os.environ.get("FUNGOEYE_MODELOS_DIR", 'modelos')
+MODEL_REGISTRY_INTERVAL = 10         # Intervalo (s) entre verificações da pasta; 0 desliga
+MODEL_VERSION_PIN = os.environ.get("FUNGOEYE_MODEL_VERSION")  # Ex.: 'v3' fixa a versão (sem troca automática)
+SHADOW_MODEL_VERSION = os.environ.get("FUNGOEYE_SHADOW_MODEL") # Ex.: 'v4' roda em sombra para comparação
 IMAGE_WIDTH, IMAGE_HEIGHT = 128, 128
+# Ordem dos canais dos frames recebidos das RPis; o modelo recebe sempre RGB
+# (a ordem do treinamento) e a conversão acontece no pré-processamento
+FRAME_COLOR_ORDER = os.environ.get("FUNGOEYE_FRAME_COLOR_ORDER", ORDEM_CAMERA)
+LONG_POLL_WAIT = 25                  # Segundos que a RPi segura a requisição esperando nova captura
+INFERENCE_MAX_BATCH = 32             # Máximo de frames por micro-lote de inferência
+INFERENCE_MAX_WAIT = 0.01            # Espera máxima (s) para completar um micro-lote
+HEALTHY_THRESHOLD = 0.5              # P(Saudável) a partir da qual a banana é considerada saudável
+# Inferência em janelas: capturas em alta resolução (CAPTURE_RESOLUTION='nativa'
+# na RPi) são cortadas em janelas 128x128 sobrepostas em vez de reduzidas
+# inteiras; o veredito é o da pior janela e a GUI mostra o mapa de calor.
+TILED_INFERENCE = os.environ.get("FUNGOEYE_TILED", "0") == "1"
+TILE_STRIDE = int(os.environ.get("FUNGOEYE_TILE_STRIDE", 64)) # Passo (px) entre janelas; < 128 = sobreposição
+ERROR_BACKOFF_MIN, ERROR_BACKOFF_MAX = 1, 30  # Espera (s) entre tentativas após erro em um nó
+# Arquivamento das capturas: Imagens_RAW/ -> Analises_Concluidas/ (pastas
+# AAAA/MM/DD), gravado por threads próprias fora do caminho da inferência
+RAW_DIR = os.environ.get("FUNGOEYE_RAW_DIR", 'Imagens_RAW')
+ANALISES_DIR = os.environ.get("FUNGOEYE_ANALISES_DIR", 'Analises_Concluidas')
+ARCHIVE_ENABLED = os.environ.get("FUNGOEYE_ARQUIVAR", "1") == "1"
+ARCHIVE_WORKERS = 2                  # Threads de codificação/escrita
+ARCHIVE_MAX_PENDING = 64             # Capturas aguardando gravação; acima disso não são arquivadas
+# Cache de predições por hash perceptual: capturas com o mesmo hash (sala
+# parada) reaproveitam a probabilidade de um frame já visto pela mesma versão
+# do modelo, sem rodar a CNN (veja cache_predicoes.py). O padrão só aceita
+# hash idêntico; FUNGOEYE_CACHE_DISTANCIA > 0 reaproveita também frames
+# parecidos (mais acertos, mas a probabilidade é a de outro frame)
+PREDICTION_CACHE_SIZE = int(os.environ.get("FUNGOEYE_CACHE_PREDICOES", 256))  # Entradas (LRU); 0 desliga
+PREDICTION_CACHE_HASH = os.environ.get("FUNGOEYE_CACHE_HASH", 'phash')         # 'phash' ou 'dhash'
+PREDICTION_CACHE_MAX_DISTANCE = int(os.environ.get("FUNGOEYE_CACHE_DISTANCIA", 0)) # Bits diferentes aceitos (de 256)
+PREDICTION_CACHE_MAX_AGE = 300       # Segundos até a CNN reavaliar uma cena em cache
+# /metrics (formato do Prometheus) com as etapas do PC; 0 desliga
+METRICS_PORT = int(os.environ.get("FUNGOEYE_METRICS_PORT", 9101))
 
 # =================================================================
 # VARIÁVEIS GLOBAIS COMPARTILHADAS (Com Lock para segurança)
@@ -26,14 +81,45 @@ IMAGE_WIDTH, IMAGE_HEIGHT = 128, 128
 # Lock para controlar o acesso seguro entre a thread de busca e a thread da GUI
 data_lock = threading.Lock() 
 model = None
+model_fn = None # Lote uint8 -> P(Saudável); no Keras é uma tf.function de model(x, training=False)
+model_version = None
+# Versão ativa (ModelVersion). Cada lote de inferência lê esta referência uma
+# vez, então uma troca nunca mistura versões dentro de um lote.
+active_model = None
+model_registry = None
+shadow_runner = ShadowRunner(HEALTHY_THRESHOLD)
+# Lote uint8 reaproveitado por predict_batch (sem alocar um array por frame)
+batch_buffer = BatchBuffer(INFERENCE_MAX_BATCH, IMAGE_HEIGHT, IMAGE_WIDTH, FRAME_COLOR_ORDER, ORDEM_MODELO)
+# Sinalizado quando o carregamento do modelo termina (com sucesso ou não)
+model_loaded_event = threading.Event()
+
+# Vazão e tempo ocupado de cada etapa no PC (busca, decodificação, modelo,
+# histórico); compare com /api/pipeline/stats da RPi para achar o gargalo
+pipeline_counters = StageCounters()
+
+# Probabilidades já calculadas por (versão do modelo, hash do frame)
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_MAX_DISTANCE, PREDICTION_CACHE_MAX_AGE,
+                                   PREDICTION_CACHE_HASH) if PREDICTION_CACHE_SIZE > 0 else None
+
+# Gravação em segundo plano das capturas (threads iniciadas no primeiro uso)
+archiver = Archiver(RAW_DIR, ANALISES_DIR, ARCHIVE_WORKERS, ARCHIVE_MAX_PENDING, counters=pipeline_counters)
+
+# Histórico persistente das análises (aberto no primeiro uso)
+historico = None
+historico_lock = threading.Lock()
 
 # Variável que armazena o último resultado processado para ser lido pela GUI
+# (a predição mais recente entre todas as RPis; 'node' indica de qual veio)
 latest_prediction_result = {
+    "node": None,
     "status": "Conectando à RPi...", 
     "temperature": None, 
     "humidity": None,
     "image_frame": None, # Armazena o frame numpy
-    "prediction_prob": None
+    "prediction_prob": None,
+    "heatmap": None,     # Mapa de calor por janela (só na inferência em janelas)
+    "model_version": None,
+    "version": 0         # Incrementada a cada alteração (a GUI só redesenha quando muda)
 }
 
 # =================================================================
@@ -41,92 +127,598 @@ latest_prediction_result = {
 # =================================================================
 
 def load_ml_model():
-    """Carrega o modelo de Machine Learning."""
-    global model
+    """Carrega o modelo de Machine Learning no backend configurado.
+
+    Cria o registro de versões (MODELOS_DIR) e ativa a versão fixada em
+    MODEL_VERSION_PIN ou a maior disponível (ou o arquivo base, se a pasta
+    está vazia). O TensorFlow só é importado aqui, e só no backend 'keras'.
+    """
+    global model_registry
     try:
-        model = load_model(MODELO_PATH)
-        print(f"Modelo '{MODELO_PATH}' carregado com sucesso!")
+        model_registry = ModelRegistry(
+            MODELOS_DIR, load_backend_model,
+            warmup_batch=np.zeros((1, IMAGE_HEIGHT, IMAGE_WIDTH, 3), dtype=np.uint8),
+            extensions=('.tflite',) if INFERENCE_BACKEND == 'tflite' else ('.h5', '.keras'),
+            on_activate=set_active_model,
+            auto_activate=MODEL_VERSION_PIN is None,
+            base_path=model_file_path(),
+        )
+        versoes = model_registry.available()
+        if not versoes:
+            raise FileNotFoundError(f"Nenhum modelo em '{MODELOS_DIR}' nem '{model_file_path()}'.")
+        ativa = model_registry.activate(MODEL_VERSION_PIN or list(versoes)[-1])
+        model_registry.poll() # Registra as demais versões da pasta (carregadas só se pedidas)
+        if SHADOW_MODEL_VERSION:
+            model_registry.set_shadow(SHADOW_MODEL_VERSION)
+        print(f"Modelo '{ativa.path}' (versão {ativa.version}) carregado com sucesso! (backend: {INFERENCE_BACKEND})")
         return True
     except Exception as e:
         print(f"Erro ao carregar o modelo: {e}")
         return False
+    finally:
+        model_loaded_event.set()
+
+def model_file_path():
+    """Arquivo base do modelo usado pelo backend configurado."""
+    return MODELO_TFLITE_PATH if INFERENCE_BACKEND == 'tflite' else MODELO_PATH
+
+def load_backend_model(path=None):
+    """Lê um arquivo de modelo (padrão: o base). Retorna (modelo, função de predição)."""
+    path = path or model_file_path()
+    if path.endswith('.tflite'):
+        from modelo_tflite import TFLiteModel
+        tflite_model = TFLiteModel(path)
+        return tflite_model, tflite_model.predict
+    from tensorflow.keras.models import load_model # type: ignore
+    keras_model = load_model(path)
+    return keras_model, compile_model_fn(keras_model)
+
+def set_active_model(version):
+    """Troca a versão ativa (ModelVersion). Lotes em andamento terminam com a anterior."""
+    global active_model, model, model_fn, model_version
+    model, model_fn, model_version = version.model, version.predict_fn, version.version
+    active_model = version
+
+def use_model(predict_fn, model_obj=None, version='stub'):
+    """Ativa uma função de predição avulsa, fora do registro (benchmarks e
+    testes com modelo stub)."""
+    set_active_model(ModelVersion(version, None, model_obj if model_obj is not None else object(), predict_fn))
+
+def activate_model_version(version):
+    """Ativa uma versão do registro (ex.: 'v2'); a anterior fica carregada para rollback."""
+    return model_registry.activate(version).version
+
+def rollback_model():
+    """Volta para a versão ativada antes da atual. Retorna a versão ativa."""
+    return model_registry.rollback().version
+
+def set_shadow_model(version):
+    """Roda `version` em sombra nos mesmos frames (None desliga). Zera a comparação."""
+    model_registry.set_shadow(version)
+    shadow_runner.reset()
+
+def get_model_status():
+    """Versões (ativa, sombra, histórico, disponíveis) e comparação com a sombra."""
+    status = model_registry.status() if model_registry is not None else {"active": model_version}
+    return {**status, "shadow_comparison": shadow_runner.summary()}
+
+def load_ml_model_async():
+    """Carrega o modelo numa thread de fundo (a GUI não fica bloqueada
+    esperando o import do TensorFlow). Depois de carregar, a mesma thread
+    passa a vigiar a pasta de versões (model_registry.watch). Retorna a thread."""
+    def worker():
+        update_status("⏳ Carregando modelo de ML...")
+        if load_ml_model():
+            update_status("Modelo carregado. Aguardando Captura Manual na RPi...")
+            if MODEL_REGISTRY_INTERVAL > 0:
+                model_registry.watch(interval=MODEL_REGISTRY_INTERVAL)
+        else:
+            update_status("❌ Erro ao carregar o modelo. Verifique o arquivo e reinicie.")
+
+    thread = threading.Thread(target=worker, name="ModelLoader", daemon=True)
+    thread.start()
+    return thread
+
+def compile_model_fn(keras_model):
+    """Compila a chamada direta do modelo num grafo TF (evita o custo do
+    model.predict, que monta um pipeline tf.data a cada chamada).
+    O lote tem tamanho variável para não haver retracing, e a normalização
+    /255 roda dentro do grafo."""
+    import tensorflow as tf
+
+    @tf.function(input_signature=[tf.TensorSpec([None, IMAGE_HEIGHT, IMAGE_WIDTH, 3], tf.uint8)])
+    def fn(batch):
+        return keras_model(tf.cast(batch, tf.float32) / 255.0, training=False)
+
+    return lambda batch: fn(batch).numpy()[:, 0]
+
+def to_model_size(frame):
+    """Redimensiona capturas em resolução nativa para a entrada do modelo."""
+    if frame.shape[:2] != (IMAGE_HEIGHT, IMAGE_WIDTH):
+        return cv2.resize(frame, (IMAGE_WIDTH, IMAGE_HEIGHT), interpolation=cv2.INTER_AREA)
+    return frame
+
+def predict_batch(frames):
+    """Predição vetorizada de uma lista de imagens (uint8 em FRAME_COLOR_ORDER,
+    128x128x3 ou maiores). Cada frame é redimensionado/convertido para RGB
+    direto no lote pré-alocado (batch_buffer).
+    Retorna (array com P(Classe 1: Saudável) de cada imagem, versão do modelo).
+    Frames já vistos pela mesma versão (mesmo hash, calculado sobre o lote já
+    preparado) saem do prediction_cache sem rodar o modelo. Com uma versão
+    sombra configurada, uma cópia do lote efetivamente inferido é enviada a ela."""
+    current = active_model # Uma leitura: o lote inteiro usa a mesma versão
+    probs = np.full(len(frames), np.nan)
+    hashes = None
+    with batch_buffer.lock:
+        batch = batch_buffer.fill(frames)
+        if prediction_cache is not None:
+            inicio = time.perf_counter()
+            hashes = [prediction_cache.hash(imagem) for imagem in batch]
+            for i, frame_hash in enumerate(hashes):
+                cached = prediction_cache.get(frame_hash, current.version)
+                if cached is not None:
+                    probs[i] = cached
+            pipeline_counters.record('cache_predicoes', len(frames), time.perf_counter() - inicio)
+
+        faltando = np.flatnonzero(np.isnan(probs))
+        if len(faltando) == 0:
+            return probs, current.version
+        if len(faltando) < len(frames):
+            batch = batch[faltando] # Só os frames fora do cache vão ao modelo
+        inicio = time.perf_counter()
+        calculadas = np.asarray(current.predict_fn(batch))
+        shadow = model_registry.shadow if model_registry is not None else None
+        if shadow is not None and shadow is not current:
+            shadow_runner.submit(shadow, batch.copy(), current.version, calculadas, (time.perf_counter() - inicio) * 1000)
+    probs[faltando] = calculadas
+    if hashes is not None:
+        for i, prob in zip(faltando, calculadas):
+            prediction_cache.put(hashes[i], current.version, float(prob))
+    return probs, current.version
+
+def prediction_label(prediction_prob):
+    """Rótulo gravado no histórico: 'saudavel' ou 'fungo'."""
+    return 'saudavel' if prediction_prob >= HEALTHY_THRESHOLD else 'fungo'
+
+def format_prediction(prediction_prob):
+    """Texto exibido para uma probabilidade de 'Saudável'."""
+    if prediction_prob >= HEALTHY_THRESHOLD:
+        return f"Saudável ({prediction_prob*100:.2f}%)"
+    else: 
+        return f"Fungo detectado! (Prob. Saudável: {prediction_prob*100:.2f}%)"
+
+class InferenceEngine:
+    """Motor de inferência em micro-lotes.
+
+    Frames enviados por submit() (de uma ou mais RPis/threads) entram numa
+    fila. Uma thread de trabalho junta até max_batch_size frames, esperando
+    no máximo max_wait segundos depois do primeiro, e faz uma única chamada
+    vetorizada a predict_fn, que retorna (probabilidades, versão do modelo).
+    Cada frame recebe sua probabilidade pelo Future, e a versão que a
+    calculou fica em future.model_version.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=INFERENCE_MAX_BATCH, max_wait=INFERENCE_MAX_WAIT, counters=None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.counters = counters
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, frame):
+        """Enfileira um frame e retorna um Future com P(Saudável)."""
+        future = Future()
+        self._ensure_started()
+        self._queue.put((frame, future))
+        return future
+
+    def predict_many(self, frames):
+        """Enfileira vários frames de uma vez e espera todos os resultados."""
+        futures = [self.submit(frame) for frame in frames]
+        return [future.result() for future in futures]
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="InferenceEngine", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        """Bloqueia até o primeiro frame e completa o lote até o limite de tamanho/tempo."""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait()) # Só o que já está na fila
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [(frame, future) for frame, future in self._next_batch()
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                inicio = time.perf_counter()
+                probs, version = self.predict_fn([frame for frame, _ in batch])
+                if self.counters is not None:
+                    self.counters.record('modelo', len(batch), time.perf_counter() - inicio)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), prob in zip(batch, probs):
+                future.model_version = version
+                future.set_result(float(prob))
+
+# Motor compartilhado por todas as fontes de frames
+inference_engine = InferenceEngine(predict_batch, counters=pipeline_counters)
 
 def predict_image(image_array):
-    """Faz a predição em uma imagem 128x128x3."""
+    """Faz a predição em uma imagem 128x128x3 (via motor de micro-lotes)."""
     if model is None:
         return "Erro: Modelo não carregado.", 0.0
-    
-    # Pré-processamento: normalizar e expandir dimensões (como no treino)
-    processed_image = image_array.astype('float32') / 255.0 
-    processed_image = np.expand_dims(processed_image, axis=0) # Adiciona dimensão de batch
-
-    prediction = model.predict(processed_image, verbose=0)
-    prediction_prob = prediction[0][0] # P(Classe 1: Saudável)
-    
-    threshold = 0.5 
-
-    if prediction_prob >= threshold:
-        result = f"Saudável ({prediction_prob*100:.2f}%)"
-    else: 
-        result = f"Fungo detectado! (Prob. Saudável: {prediction_prob*100:.2f}%)"
-    
-    return result, prediction_prob
+
+    with pipeline_counters.timed('predicao'):
+        prediction_prob = inference_engine.submit(image_array).result() # P(Classe 1: Saudável)
+    return format_prediction(prediction_prob), prediction_prob
+
+class PendingPrediction:
+    """Predição de uma captura já enfileirada no motor de micro-lotes.
+
+    Com tiled=True o frame é cortado em janelas 128x128 (views, sem cópia)
+    e cada janela entra no motor como um frame; o motor as agrupa em lotes
+    de no máximo INFERENCE_MAX_BATCH, então a memória não cresce com o
+    número de janelas. result() devolve (P(Saudável), mapa de calor ou None)
+    e preenche model_version com a versão do modelo que fez a predição.
+    """
+
+    def __init__(self, frame, tiled=False, stride=TILE_STRIDE, engine=None):
+        engine = engine or inference_engine
+        self.heatmap_info = None
+        self.model_version = None
+        if not tiled:
+            self.futures = [engine.submit(frame)]
+            return
+        if frame.shape[0] < IMAGE_HEIGHT or frame.shape[1] < IMAGE_WIDTH:
+            frame = to_model_size(frame)
+        tiles, ys, xs = extract_tiles(frame, (IMAGE_HEIGHT, IMAGE_WIDTH), stride)
+        self.heatmap_info = (ys, xs, frame.shape)
+        self.futures = [engine.submit(tile) for tile in tiles]
+
+    def result(self):
+        probs = [future.result() for future in self.futures]
+        # Janelas de uma captura podem cair em lotes de versões diferentes
+        # durante uma troca de modelo; nesse caso as duas são registradas
+        self.model_version = '+'.join(sorted({f.model_version for f in self.futures}))
+        if self.heatmap_info is None:
+            return probs[0], None
+        ys, xs, shape = self.heatmap_info
+        heatmap = build_heatmap(probs, ys, xs, (IMAGE_HEIGHT, IMAGE_WIDTH), shape)
+        return aggregate_prob(heatmap), heatmap
+
+def predict_image_tiled(image_array, stride=TILE_STRIDE):
+    """Predição em janelas de uma captura em alta resolução.
+    Retorna (texto, P(Saudável) da pior janela, mapa de calor)."""
+    if model is None:
+        return "Erro: Modelo não carregado.", 0.0, None
+
+    prediction_prob, heatmap = PendingPrediction(image_array, tiled=True, stride=stride).result()
+    return format_prediction(prediction_prob), prediction_prob, heatmap
 
 # =================================================================
 # FUNÇÃO DE BUSCA E PROCESSAMENTO (Chamada pela thread da GUI)
 # =================================================================
 
-def fetch_and_process():
-    """Busca dados CONGELADOS da RPi via API e faz a predição."""
-    global latest_prediction_result
-    
-    status_msg = latest_prediction_result["status"]
-    temp, hum, frame, prediction_prob = None, None, None, None
-    
-    # 1. Buscar Dados de Captura da API
-    try:
-        response = requests.get(RPi_CAPTURE_URL, timeout=5)
-        response.raise_for_status() 
-        data_json = response.json()
-        data = data_json.get('data')
-
-        if not data or data.get('image_data') is None:
-            status_msg = "Aguardando Captura Manual na RPi..."
-        else:
-            # Converte a lista serializada de volta para um array numpy (np.uint8)
-            image_list = data.get('image_data')
-            frame = np.array(image_list, dtype=np.uint8)
-            temp = data.get('temperature')
-            hum = data.get('humidity')
-            
-            # 2. Processar Imagem
-            if model is not None:
-                prediction_text, prediction_prob = predict_image(frame)
-                status_msg = prediction_text
-            else:
-                status_msg = "❌ Modelo não carregado no PC."
+def get_historico():
+    """Abre (uma única vez) o histórico de análises em HISTORICO_DB_PATH."""
+    global historico
+    with historico_lock:
+        if historico is None:
+            historico = HistoricoAnalises(HISTORICO_DB_PATH)
+        return historico
 
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 404:
-             status_msg = "Aguardando Captura Manual na RPi..."
-        else:
-            status_msg = f"❌ Erro HTTP: {e}"
-    except requests.exceptions.RequestException as e:
-        status_msg = f"❌ Erro de Conexão com RPi: {e}"
-    except Exception as e:
-        status_msg = f"❌ Erro de Processamento: {e}"
+def update_status(status_msg):
+    """Atualiza só o texto de status exibido pela GUI, mantendo os demais campos."""
+    with data_lock:
+        latest_prediction_result["status"] = status_msg
+        latest_prediction_result["version"] += 1
 
-    # 3. Atualizar Variável Global (com Lock)
+def get_latest_result(since_version=None):
+    """Cópia do último resultado, ou None se a versão ainda é since_version
+    (nada mudou desde a última leitura; evita copiar e redesenhar à toa)."""
     with data_lock:
-        latest_prediction_result.update({
+        if latest_prediction_result["version"] == since_version:
+            return None
+        return latest_prediction_result.copy()
+
+# =================================================================
+# NÓS RPi (várias RPis monitoradas em paralelo)
+# =================================================================
+
+class RPiNode:
+    """Uma RPi monitorada: conexão keep-alive própria, posição na fila de
+    capturas e último resultado. Cada nó é consultado pela sua própria
+    thread de long-poll, então um nó lento ou fora do ar não atrasa os outros.
+    """
+
+    def __init__(self, address):
+        if ':' not in address:
+            address += ':8080'
+        self.name = address
+        self.captures_url = f"http://{address}/api/captures"
+        self.sensor_url = f"http://{address}/api/sensor"
+
+        # Sessão com conexão persistente (keep-alive) reaproveitada a cada long-poll
+        self.session = requests.Session()
+        self.session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+        # Última captura processada da fila da RPi (evita baixar e predizer o mesmo frame de novo)
+        self.last_capture_id = 0
+        self.boot_id = None
+
+        # Último resultado deste nó (protegido por data_lock)
+        self.result = {
+            "status": "Conectando à RPi...",
+            "temperature": None,
+            "humidity": None,
+            "image_frame": None,
+            "prediction_prob": None,
+            "heatmap": None,
+            "model_version": None,
+        }
+        self.processed = 0
+        # Idade das capturas ao terem o resultado pronto (s). Depende dos
+        # relógios da RPi e do PC estarem sincronizados (NTP).
+        self.latency_samples = collections.deque(maxlen=1000)
+
+    def update_result(self, status_msg, temp=None, hum=None, frame=None, prediction_prob=None, heatmap=None,
+                      model_version=None):
+        """Atualiza o resultado do nó e a Variável Global lida pela GUI (com Lock).
+
+        A GUI mostra sempre a predição mais recente de qualquer nó; mensagens
+        de status/erro só aparecem lá quando há uma única RPi configurada.
+        """
+        fields = {
             "status": status_msg,
             "temperature": temp,
             "humidity": hum,
             "image_frame": frame,
-            "prediction_prob": prediction_prob
+            "prediction_prob": prediction_prob,
+            "heatmap": heatmap,
+            "model_version": model_version
+        }
+        with data_lock:
+            self.result.update(fields)
+            if prediction_prob is not None or len(nodes) <= 1:
+                latest_prediction_result.update(fields, node=self.name)
+                latest_prediction_result["version"] += 1
+
+    def fetch_sensor_data(self):
+        """Lê os sensores ao vivo da RPi (/api/sensor), sem captura nem predição.
+        Retorna False em caso de erro de conexão."""
+        try:
+            response = self.session.get(self.sensor_url, timeout=5)
+            response.raise_for_status()
+            data = response.json()
+        except requests.exceptions.RequestException as e:
+            self.update_result(f"❌ Erro de Conexão com RPi: {e}")
+            return False
+        self.update_result(self.result["status"], data.get("temperature"), data.get("humidity"))
+        return True
+
+    def fetch_and_process(self):
+        """Drena a fila de capturas CONGELADAS da RPi via API e faz a predição.
+
+        Usa long-poll em /api/captures?since=<último ID processado>: a chamada
+        bloqueia até a RPi ter capturas novas (ou até LONG_POLL_WAIT) e recebe
+        todas as pendentes em um único lote binário. Se nada mudou, não há
+        predição e o último resultado é mantido.
+
+        Retorna False em caso de erro de conexão/HTTP (o chamador deve esperar
+        antes de tentar de novo) e True caso contrário.
+        """
+        if model is None:
+            if not model_loaded_event.is_set():
+                # Modelo ainda carregando em segundo plano: mostra os sensores ao vivo
+                ok = self.fetch_sensor_data()
+                model_loaded_event.wait(timeout=1)
+                return ok
+            self.update_result("❌ Modelo não carregado no PC.")
+            return False
+        
+        # 1. Buscar o Lote de Capturas Pendentes da API
+        try:
+            # stream=True: retorna nos cabeçalhos, para cronometrar só a
+            # transferência do corpo (sem a espera do long-poll)
+            response = self.session.get(
+                self.captures_url,
+                params={"since": self.last_capture_id, "boot": self.boot_id, "wait": LONG_POLL_WAIT},
+                timeout=LONG_POLL_WAIT + 5,
+                stream=True
+            )
+            response.raise_for_status() 
+            inicio = time.perf_counter()
+            content = response.content
+            inicio_decodificacao = time.perf_counter()
+            manifest, captures = decode_capture_batch(content)
+            fim = time.perf_counter()
+            if captures:
+                pipeline_counters.record('transferencia', len(captures), inicio_decodificacao - inicio)
+            pipeline_counters.record('decodificacao', len(captures), fim - inicio_decodificacao)
+        except requests.exceptions.HTTPError as e:
+            self.update_result(f"❌ Erro HTTP: {e}")
+            return False
+        except requests.exceptions.RequestException as e:
+            self.update_result(f"❌ Erro de Conexão com RPi: {e}")
+            return False
+        except Exception as e:
+            self.update_result(f"❌ Erro de Processamento: {e}")
+            return False
+
+        pipeline_counters.record('recebidas', len(captures))
+        if not captures:
+            if manifest["last_id"] == 0:
+                self.update_result("Aguardando Captura Manual na RPi...")
+            return True
+
+        if manifest["missed"]:
+            print(f"Aviso [{self.name}]: {manifest['missed']} captura(s) descartada(s) pela fila da RPi antes da busca.")
+
+        # 2. Salvamento RAW (enfileirado; a gravação roda em paralelo à predição)
+        if ARCHIVE_ENABLED:
+            jobs = [archiver.save_raw(capture["image_data"], capture["timestamp"], self.name, capture["capture_id"])
+                    for capture in captures]
+        else:
+            jobs = [None] * len(captures)
+
+        # 3. Processar as Imagens do lote (motor de micro-lotes compartilhado entre os nós)
+        inicio = time.perf_counter()
+        pending = [PendingPrediction(capture["image_data"], tiled=TILED_INFERENCE) for capture in captures]
+        records = []
+        ok = True
+        for i, (capture, prediction, job) in enumerate(zip(captures, pending, jobs)):
+            try:
+                prediction_prob, heatmap = prediction.result()
+            except Exception as e:
+                self.update_result(f"❌ Erro de Processamento: {e}")
+                # As capturas restantes voltam no próximo lote: apaga os RAW já
+                # enfileirados para não ficarem órfãos em Imagens_RAW/
+                for restante in jobs[i:]:
+                    archiver.discard(restante)
+                ok = False
+                break
+            # Latência de cada captura do lote: do envio ao motor até o resultado
+            pipeline_counters.record('predicao', 1, latency=time.perf_counter() - inicio)
+            self.update_result(format_prediction(prediction_prob), capture["temperature"], capture["humidity"],
+                               capture["image_data"], prediction_prob, heatmap, prediction.model_version)
+            # Movimentação para Analises_Concluidas/ com horário e resultado no nome
+            image_path = archiver.conclude(job, capture["timestamp"], prediction_label(prediction_prob), prediction_prob)
+            records.append({
+                "timestamp": capture["timestamp"],
+                "temperature": capture["temperature"],
+                "humidity": capture["humidity"],
+                "probability": prediction_prob,
+                "label": prediction_label(prediction_prob),
+                "image_path": image_path,
+                "node": self.name,
+                "model_version": prediction.model_version,
+                "screening": capture["screening"], # Pontuação da triagem na RPi (None se desligada)
+            })
+
+            # Só marca como processada depois que a predição foi feita
+            self.boot_id = manifest["boot_id"]
+            self.last_capture_id = capture["capture_id"]
+            self.processed += 1
+            idade = time.time() - capture["timestamp"]
+            self.latency_samples.append(idade)
+            # Captura na RPi -> resultado pronto no PC (relógios sincronizados por NTP)
+            pipeline_counters.record('ponta_a_ponta', 1, latency=max(0.0, idade))
+
+        pipeline_counters.record('inferidas', len(records))
+
+        # 4. Registrar as análises no histórico (uma transação por lote)
+        try:
+            inicio = time.perf_counter()
+            get_historico().add_many(records)
+            pipeline_counters.record('historico', len(records), time.perf_counter() - inicio)
+        except Exception as e:
+            print(f"Erro ao gravar o histórico: {e}")
+
+        # print(f"[{time.strftime('%H:%M:%S')}] [{self.name}] Status: {self.result['status']}")
+        return ok
+
+    def run_forever(self, stop_event=None):
+        """Loop de long-poll do nó. Após erros espera com backoff exponencial."""
+        backoff = ERROR_BACKOFF_MIN
+        while stop_event is None or not stop_event.is_set():
+            if self.fetch_and_process():
+                backoff = ERROR_BACKOFF_MIN
+            else:
+                time.sleep(backoff) # Intervalo para não sobrecarregar a rede
+                backoff = min(backoff * 2, ERROR_BACKOFF_MAX)
+
+nodes = [RPiNode(address) for address in RPi_NODES]
+
+def fetch_and_process(node=None):
+    """Drena a fila de um nó (padrão: a primeira RPi configurada). Veja RPiNode.fetch_and_process."""
+    return (node or nodes[0]).fetch_and_process()
+
+def get_pipeline_stats():
+    """Vazão por etapa no PC (mesmo formato do /api/pipeline/stats da RPi)."""
+    return {"stages": pipeline_counters.snapshot(), "bottleneck": pipeline_counters.bottleneck(),
+            "prediction_cache": prediction_cache.stats() if prediction_cache is not None else None}
+
+def get_metrics_text():
+    """Métricas do PC no formato do Prometheus (etapas + nós, modelo e arquivamento)."""
+    with data_lock:
+        processadas = [({"node": node.name}, node.processed) for node in nodes]
+    arquivo = archiver.status()
+    sombra = shadow_runner.summary()
+    gauges = {
+        "capturas_processadas_total": processadas,
+        "arquivo_gravacoes_pendentes": arquivo["pending_writes"],
+        "modelo_ativo": [({"version": active_model.version}, 1)] if active_model is not None else [],
+        "sombra_concordancia": sombra["agreement"],
+        "sombra_lotes_descartados_total": sombra["dropped_batches"],
+    }
+    if prediction_cache is not None:
+        cache = prediction_cache.stats()
+        gauges.update({
+            "cache_predicoes_acertos_total": cache["hits"],
+            "cache_predicoes_acertos_aproximados_total": cache["near_hits"],
+            "cache_predicoes_falhas_total": cache["misses"],
+            "cache_predicoes_remocoes_total": cache["evictions"],
+            "cache_predicoes_entradas": cache["entries"],
         })
+    return prometheus_text(pipeline_counters, 'fungoeye_pc', gauges)
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = get_metrics_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass # Sem uma linha de log a cada coleta
+
+def start_metrics_server(port=None, host='0.0.0.0'):
+    """Sobe o /metrics do PC numa thread. Retorna o servidor (None se desligado ou porta ocupada)."""
+    port = METRICS_PORT if port is None else port
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        print(f"Aviso: /metrics não iniciado na porta {port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="Metrics", daemon=True).start()
+    return server
 
-    # print(f"[{time.strftime('%H:%M:%S')}] Status: {latest_prediction_result['status']}")
+def start_polling(node_list=None, stop_event=None):
+    """Inicia uma thread de long-poll por RPi. Retorna as threads."""
+    threads = []
+    for node in (nodes if node_list is None else node_list):
+        thread = threading.Thread(target=node.run_forever, args=(stop_event,),
+                                  name=f"RPiNode-{node.name}", daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
 
 
 if __name__ == '__main__':
@@ -0,0 +1,127 @@
+import asyncio
+import contextlib
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# =================================================================
+# SERVIDOR DE PRODUÇÃO DA RPi (aiohttp, orientado a eventos)
+# =================================================================
+# O servidor de desenvolvimento do Flask abre uma thread por requisição, e
+# cada cliente do /video_feed prende a sua para sempre. Aqui um único event
+# loop atende todas as conexões:
+#   - /video_feed é servido direto no loop (MJPEGBroadcaster.subscribe_async):
+#     um espectador custa uma corrotina e um buffer de socket, não uma thread;
+#   - /api/sensor (consultado a cada 2 s por cada página aberta) também
+#     responde direto no loop, sem passar pelo Flask;
+#   - as demais rotas continuam sendo as do Flask, chamadas por uma ponte
+#     WSGI num pool pequeno de threads (o long-poll do /api/captures ocupa
+#     uma thread do pool por PC conectado).
+# Requer aiohttp (pip install aiohttp); o modo de desenvolvimento não.
+
+CABECALHOS_HOP = {'connection', 'keep-alive', 'transfer-encoding', 'content-length'}
+
+
+def _environ(request, body, port):
+    """Ambiente WSGI (PEP 3333) para uma requisição do aiohttp."""
+    environ = {
+        'REQUEST_METHOD': request.method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': request.path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': request.query_string,
+        'SERVER_NAME': request.host.split(':')[0],
+        'SERVER_PORT': str(port),
+        'SERVER_PROTOCOL': f"HTTP/{request.version.major}.{request.version.minor}",
+        'REMOTE_ADDR': request.remote or '',
+        'CONTENT_TYPE': request.headers.get('Content-Type', ''),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': request.scheme,
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for nome, valor in request.headers.items():
+        chave = 'HTTP_' + nome.upper().replace('-', '_')
+        if chave not in ('HTTP_CONTENT_TYPE', 'HTTP_CONTENT_LENGTH'):
+            environ[chave] = f"{environ[chave]},{valor}" if chave in environ else valor
+    return environ
+
+
+def _call_wsgi(wsgi_app, environ):
+    """Executa a aplicação WSGI (numa thread do pool) e junta a resposta."""
+    resposta = {}
+    partes = []
+
+    def start_response(status, headers, exc_info=None):
+        resposta['status'], resposta['headers'] = status, headers
+        return partes.append
+
+    resultado = wsgi_app(environ, start_response)
+    try:
+        partes.extend(resultado)
+    finally:
+        if hasattr(resultado, 'close'):
+            resultado.close()
+    return resposta['status'], resposta['headers'], b''.join(partes)
+
+
+def create_web_app(wsgi_app, broadcaster, sensor_snapshot, workers=8, port=8080):
+    """Aplicação aiohttp na frente do app Flask.
+
+    broadcaster: MJPEGBroadcaster do /video_feed.
+    sensor_snapshot(): dict da última leitura (resposta do /api/sensor).
+    workers: threads da ponte WSGI para as rotas do Flask.
+    """
+    from aiohttp import web
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wsgi")
+
+    async def video_feed(request):
+        response = web.StreamResponse(headers={
+            'Content-Type': "multipart/x-mixed-replace; boundary=frame",
+            'Cache-Control': 'no-cache',
+        })
+        await response.prepare(request)
+        try:
+            async with contextlib.aclosing(broadcaster.subscribe_async()) as partes:
+                async for parte in partes:
+                    await response.write(parte) # Espera o socket do cliente (cliente lento pula frames)
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass # Cliente desconectou
+        return response
+
+    async def sensor(request):
+        return web.json_response(sensor_snapshot())
+
+    async def flask_bridge(request):
+        body = await request.read()
+        loop = asyncio.get_running_loop()
+        status, headers, conteudo = await loop.run_in_executor(
+            executor, _call_wsgi, wsgi_app, _environ(request, body, port))
+        codigo, _, motivo = status.partition(' ')
+        return web.Response(status=int(codigo), reason=motivo or None, body=conteudo,
+                            headers=[(k, v) for k, v in headers if k.lower() not in CABECALHOS_HOP])
+
+    async def encerrar(app):
+        broadcaster.close()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    app = web.Application()
+    app.router.add_get('/video_feed', video_feed)
+    app.router.add_get('/api/sensor', sensor)
+    app.router.add_route('*', '/{caminho:.*}', flask_bridge)
+    app.on_shutdown.append(encerrar)
+    return app
+
+
+def serve(wsgi_app, broadcaster, sensor_snapshot, host='0.0.0.0', port=8080, workers=8):
+    """Sobe o servidor de produção (bloqueia até Ctrl+C)."""
+    try:
+        from aiohttp import web
+    except ImportError:
+        raise SystemExit("O modo de produção precisa do aiohttp: pip install aiohttp")
+    app = create_web_app(wsgi_app, broadcaster, sensor_snapshot, workers, port)
+    web.run_app(app, host=host, port=port, print=None, access_log=None)
@@ -0,0 +1,203 @@
+import argparse
+import collections
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from protocolo_captura import CONTENT_TYPE_LOTE, encode_capture_batch
+
+# =================================================================
+# RPi SIMULADA (substituta local do app_rpi.py para testes de fan-in)
+# =================================================================
+# Cada instância escuta numa porta local e responde /api/captures e
+# /api/sensor no mesmo formato do app_rpi.py, gerando capturas sintéticas
+# numa taxa configurável. Permite testar o servidor_pc.py com dezenas de
+# RPis, incluindo nós lentos e fora do ar, sem hardware.
+
+HOST = '127.0.0.1'
+PORTA_INICIAL = 9000
+FILA_MAX = 256
+LONG_POLL_MAX_WAIT = 30
+
+
+class RPiSimulada:
+    """Uma RPi falsa: gera capturas a cada 1/taxa segundos e serve a API HTTP.
+
+    atraso: segundos extras antes de cada resposta (simula um nó lento).
+    """
+
+    def __init__(self, porta, taxa=1.0, atraso=0.0, shape=(128, 128, 3), host=HOST):
+        self.endereco = f"{host}:{porta}"
+        self.taxa = taxa
+        self.atraso = atraso
+        self.boot_id = int(time.time())
+        self.capture_id = 0
+        self.fila = collections.deque(maxlen=FILA_MAX)
+        self.cond = threading.Condition()
+        self._parar = threading.Event()
+
+        # Alguns frames pré-gerados, reaproveitados em ciclo (não gasta CPU do teste)
+        rng = np.random.default_rng(porta)
+        self._frames = rng.integers(0, 256, (4,) + tuple(shape), dtype=np.uint8)
+
+        self.server = ThreadingHTTPServer((host, porta), self._criar_handler())
+        self.server.daemon_threads = True
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        if self.taxa > 0:
+            threading.Thread(target=self._gerar_capturas, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._parar.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def capturar(self):
+        """Congela uma nova captura sintética (como o botão do app_rpi.py)."""
+        with self.cond:
+            self.capture_id += 1
+            self.fila.append({
+                "capture_id": self.capture_id,
+                "image_data": self._frames[self.capture_id % len(self._frames)],
+                "temperature": 25.0,
+                "humidity": 80.0,
+                "timestamp": time.time(),
+            })
+            self.cond.notify_all()
+
+    def _gerar_capturas(self):
+        while not self._parar.wait(1.0 / self.taxa):
+            self.capturar()
+
+    def _captures(self, params):
+        since = int(params.get("since", ["0"])[0])
+        if int(params.get("boot", [self.boot_id])[0]) != self.boot_id:
+            since = 0
+        wait = min(float(params.get("wait", ["0"])[0]), LONG_POLL_MAX_WAIT)
+        with self.cond:
+            if wait > 0:
+                self.cond.wait_for(lambda: self.capture_id > since or self._parar.is_set(), timeout=wait)
+            pending = [c for c in self.fila if c["capture_id"] > since]
+            missed = (pending[0]["capture_id"] - since - 1) if pending else 0
+            info = {"boot_id": self.boot_id, "last_id": self.capture_id, "missed": missed, "dropped_total": 0}
+        return encode_capture_batch(pending, **info)
+
+    def _criar_handler(self):
+        rpi = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # Mantém a conexão aberta (keep-alive)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = parse_qs(url.query)
+                if url.path == "/api/captures":
+                    corpo, tipo = rpi._captures(params), CONTENT_TYPE_LOTE
+                elif url.path == "/api/sensor":
+                    dados = {"temperature": 25.0, "humidity": 80.0, "timestamp": time.time()}
+                    corpo, tipo = json.dumps(dados).encode(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                if rpi.atraso:
+                    time.sleep(rpi.atraso)
+                self.send_response(200)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass # Sem log por requisição
+
+        return Handler
+
+
+def iniciar_simuladores(quantidade, taxa, lentos=0, atraso=2.0, porta_inicial=PORTA_INICIAL):
+    """Sobe `quantidade` RPis simuladas em portas consecutivas; as `lentos`
+    primeiras respondem com `atraso` segundos. Retorna a lista de instâncias."""
+    return [
+        RPiSimulada(porta_inicial + i, taxa=taxa, atraso=atraso if i < lentos else 0.0).start()
+        for i in range(quantidade)
+    ]
+
+
+def testar_fan_in(simuladores, mortos, duracao):
+    """Roda o servidor_pc.py contra as RPis simuladas (modelo stub) e mostra
+    quantas capturas cada nó processou e a latência captura -> resultado."""
+    import servidor_pc
+    from arquivamento import Archiver
+
+    # Modelo stub: média dos pixels (o teste mede o fan-in, não a CNN)
+    servidor_pc.use_model(lambda batch: batch.mean(axis=(1, 2, 3)) / 255.0)
+    # Histórico e imagens arquivadas numa pasta temporária, fora dos dados reais
+    pasta = tempfile.mkdtemp()
+    servidor_pc.HISTORICO_DB_PATH = os.path.join(pasta, 'historico_teste.db')
+    servidor_pc.archiver = Archiver(os.path.join(pasta, 'Imagens_RAW'), os.path.join(pasta, 'Analises_Concluidas'),
+                                    servidor_pc.ARCHIVE_WORKERS, servidor_pc.ARCHIVE_MAX_PENDING,
+                                    counters=servidor_pc.pipeline_counters)
+
+    # Nós "mortos" apontam para portas onde nada escuta
+    enderecos = [s.endereco for s in simuladores]
+    enderecos += [f"{HOST}:{PORTA_INICIAL + len(simuladores) + 100 + i}" for i in range(mortos)]
+    nodes = [servidor_pc.RPiNode(e) for e in enderecos]
+    servidor_pc.nodes[:] = nodes
+
+    parar = threading.Event()
+    servidor_pc.start_polling(nodes, parar)
+    time.sleep(duracao)
+    parar.set()
+
+    gerados = {s.endereco: s.capture_id for s in simuladores}
+    latencias = [lat for n in nodes for lat in n.latency_samples]
+    processados = sum(n.processed for n in nodes)
+    print(f"\nNós: {len(simuladores)} ativos ({sum(s.atraso > 0 for s in simuladores)} lentos), {mortos} fora do ar")
+    print(f"Capturas processadas: {processados} de {sum(gerados.values())} geradas "
+          f"({processados / duracao:.1f}/s)")
+    if latencias:
+        latencias.sort()
+        p = lambda q: latencias[min(len(latencias) - 1, int(q * len(latencias)))] * 1000
+        print(f"Latência captura -> resultado: p50 {p(0.5):.0f} ms | p95 {p(0.95):.0f} ms | "
+              f"p99 {p(0.99):.0f} ms | média {statistics.mean(latencias) * 1000:.0f} ms")
+    atrasados = [n.name for n in nodes if n.name in gerados and gerados[n.name] - n.processed > 2]
+    print(f"Nós ativos com atraso > 2 capturas: {len(atrasados)} {atrasados[:5]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RPis simuladas para testar o servidor_pc.py com vários nós.")
+    parser.add_argument('--nos', type=int, default=50, help="Quantidade de RPis simuladas")
+    parser.add_argument('--taxa', type=float, default=1.0, help="Capturas por segundo em cada RPi")
+    parser.add_argument('--lentos', type=int, default=0, help="Quantos nós respondem com atraso")
+    parser.add_argument('--atraso', type=float, default=2.0, help="Atraso (s) dos nós lentos")
+    parser.add_argument('--mortos', type=int, default=0, help="Nós fora do ar (só no --testar)")
+    parser.add_argument('--porta', type=int, default=PORTA_INICIAL, help="Primeira porta")
+    parser.add_argument('--testar', type=float, metavar='SEGUNDOS',
+                        help="Roda o servidor_pc.py contra os simuladores por N segundos e mostra o resultado")
+    args = parser.parse_args()
+
+    simuladores = iniciar_simuladores(args.nos, args.taxa, args.lentos, args.atraso, args.porta)
+    if args.testar:
+        testar_fan_in(simuladores, args.mortos, args.testar)
+        return
+
+    nos = ','.join(s.endereco for s in simuladores)
+    print(f"{len(simuladores)} RPis simuladas no ar. Para usar com a GUI:\n"
+          f"    FUNGOEYE_RPI_NODES={nos} python interface_grafica.py")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+from contadores import StageCounters, prometheus_text
+
+
+def test_prometheus_text_valores_exatos():
+    counters = StageCounters()
+    for _ in range(3):
+        counters.record('camera', 1, 0.002)
+    texto = prometheus_text(counters, 'fungoeye_rpi', {
+        'serial_bytes_total': 1234567,
+        'fila_lotes': 1000005,
+        'ocupacao': 0.123456789,
+        'conexoes': [({"no": "rpi-1"}, 2), ({"no": "rpi-2"}, None)],
+    })
+    linhas = texto.splitlines()
+    assert 'fungoeye_rpi_serial_bytes_total 1234567' in linhas
+    assert 'fungoeye_rpi_fila_lotes 1000005' in linhas
+    assert 'fungoeye_rpi_ocupacao 0.123456789' in linhas
+    assert 'fungoeye_rpi_conexoes{no="rpi-1"} 2' in linhas
+    assert not any('rpi-2' in linha for linha in linhas)
+    assert 'fungoeye_rpi_stage_items_total{stage="camera"} 3' in linhas
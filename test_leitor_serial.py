@@ -0,0 +1,147 @@
+import shutil
+import threading
+import time
+
+import pytest
+import serial
+
+from arduino_simulado import ArduinoSimulado
+from leitor_serial import SerialFrameParser, SerialReader, encode_binary_frame
+
+
+def esperar(condicao, timeout=5.0):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if condicao():
+            return True
+        time.sleep(0.01)
+    return condicao()
+
+
+@pytest.fixture
+def arduino():
+    """Arduino simulado numa pty (sem a thread de envio: os testes escrevem os quadros)."""
+    simulado = ArduinoSimulado()
+    yield simulado
+    simulado.stop()
+    shutil.rmtree(simulado._pasta, ignore_errors=True)
+
+
+class Leitor:
+    """SerialReader numa thread contra a pty, com as amostras recebidas em `amostras`."""
+
+    def __init__(self, port, on_samples=None, opener=serial.Serial):
+        self.amostras = []
+        self.reader = SerialReader(port, 115200, on_samples or self.amostras.extend, settle=0,
+                                   backoff_min=0.05, backoff_max=0.2, read_timeout=0.05, opener=opener)
+        self.parar = threading.Event()
+        self.thread = threading.Thread(target=self.reader.run, args=(self.parar,), daemon=True)
+        self.thread.start()
+        assert esperar(lambda: self.reader.stats()["connected"])
+
+    def close(self):
+        self.parar.set()
+        self.thread.join(timeout=2)
+
+
+@pytest.fixture
+def leitor(arduino):
+    leitor = Leitor(arduino.port)
+    yield leitor
+    leitor.close()
+
+
+def test_linhas_de_texto(arduino, leitor):
+    arduino.write(b"Temp:25.30,Hum:61.00\nmensagem de depuracao\nTemp:nan,Hum:nan\nTemp:26.00,Hum:62.50\n")
+    assert esperar(lambda: len(leitor.amostras) == 2)
+    assert [(t, h) for _, t, h in leitor.amostras] == [(25.3, 61.0), (26.0, 62.5)]
+    stats = leitor.reader.stats()
+    assert stats["text_frames"] == 2
+    assert stats["ignored_lines"] == 1
+    assert stats["parse_errors"] == 1
+
+
+def test_quadros_binarios(arduino, leitor):
+    arduino.write(encode_binary_frame(0, [(24.5, 55.0, 300), (24.75, 55.25, 0)]))
+    arduino.write(encode_binary_frame(2, [(-3.5, 99.99, 0)]))
+    assert esperar(lambda: len(leitor.amostras) == 3)
+    assert [(t, h) for _, t, h in leitor.amostras] == [(24.5, 55.0), (24.75, 55.25), (-3.5, 99.99)]
+    timestamps = [t for t, _, _ in leitor.amostras]
+    assert timestamps == sorted(timestamps)
+    stats = leitor.reader.stats()
+    assert stats["binary_frames"] == 2
+    assert stats["parse_errors"] == 0
+    assert stats["dropped_samples"] == 0
+
+
+def test_crc_errado_conta_erro_e_ressincroniza(arduino, leitor):
+    corrompido = bytearray(encode_binary_frame(0, [(25.0, 60.0, 0)]))
+    corrompido[-1] ^= 0xFF
+    arduino.write(bytes(corrompido) + encode_binary_frame(1, [(26.0, 61.0, 0)]))
+    assert esperar(lambda: len(leitor.amostras) == 1)
+    assert leitor.amostras[0][1:] == (26.0, 61.0)
+    assert leitor.reader.stats()["parse_errors"] == 1
+
+
+def test_salto_na_sequencia_conta_amostras_perdidas(arduino, leitor):
+    arduino.write(encode_binary_frame(10, [(25.0, 60.0, 0), (25.0, 60.0, 0)]))
+    arduino.write(encode_binary_frame(15, [(25.0, 60.0, 0)])) # Esperado 12: 3 perdidas
+    assert esperar(lambda: len(leitor.amostras) == 3)
+    assert leitor.reader.stats()["dropped_samples"] == 3
+
+
+def test_erro_no_consumidor_nao_derruba_a_leitura(arduino):
+    recebidas = []
+
+    def on_samples(amostras):
+        if not recebidas:
+            recebidas.append(None)
+            raise ValueError("amostra inválida")
+        recebidas.extend(amostras)
+
+    leitor = Leitor(arduino.port, on_samples)
+    try:
+        arduino.write(b"Temp:25.00,Hum:60.00\n")
+        assert esperar(lambda: leitor.reader.stats()["callback_errors"] == 1)
+        arduino.write(b"Temp:26.00,Hum:61.00\n")
+        assert esperar(lambda: len(recebidas) == 2)
+        assert leitor.thread.is_alive()
+    finally:
+        leitor.close()
+
+
+def test_reconexao_com_backoff(arduino):
+    tentativas = []
+
+    def opener(*args, **kwargs):
+        tentativas.append(time.monotonic())
+        return serial.Serial(*args, **kwargs)
+
+    leitor = Leitor(arduino.port, opener=opener)
+    try:
+        arduino.disconnect()
+        assert esperar(lambda: leitor.reader.stats()["reconnects"] == 1)
+        assert esperar(lambda: len(tentativas) >= 4) # Abertura inicial + tentativas com a porta fora
+        stats = leitor.reader.stats()
+        assert not stats["connected"]
+        assert stats["last_error"]
+        intervalos = [b - a for a, b in zip(tentativas[1:], tentativas[2:])]
+        assert all(i >= 0.04 for i in intervalos) # Espera backoff_min (ou mais) entre tentativas
+
+        arduino.reconnect()
+        assert esperar(lambda: leitor.reader.stats()["connected"])
+        arduino.write(b"Temp:27.00,Hum:63.00\n")
+        assert esperar(lambda: len(leitor.amostras) == 1)
+        assert leitor.reader.stats()["reconnects"] == 1
+    finally:
+        leitor.close()
+
+
+def test_parser_quadro_partido_entre_leituras():
+    parser = SerialFrameParser()
+    quadro = b"Temp:25.00,Hum:60.00\n" + encode_binary_frame(0, [(25.5, 60.5, 0)])
+    amostras = []
+    for i in range(len(quadro)):
+        amostras += parser.feed(quadro[i:i + 1], now=100.0 + i)
+    assert [(t, h) for _, t, h in amostras] == [(25.0, 60.0), (25.5, 60.5)]
+    assert parser.stats["parse_errors"] == 0
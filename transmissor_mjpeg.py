@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import cv2
+
+# =================================================================
+# TRANSMISSOR MJPEG (codifica uma vez, entrega a todos os clientes)
+# =================================================================
+# A thread da câmera publica cada frame novo aqui. Ele é codificado em
+# JPEG uma única vez (e só se houver alguém assistindo) e o mesmo objeto
+# bytes é entregue a todos os inscritos. Os clientes esperam numa
+# Condition em vez de fazer polling com sleep; um cliente lento
+# simplesmente pula frames e recebe sempre o mais recente.
+# Servidores assíncronos (servidor_producao.py) usam subscribe_async():
+# cada frame acorda o event loop uma única vez, não uma thread por cliente.
+
+BOUNDARY = b'frame'
+_CABECALHO_PARTE = b'--' + BOUNDARY + b'\r\nContent-Type: image/jpeg\r\n\r\n'
+
+
+class MJPEGBroadcaster:
+    """Distribui frames JPEG para vários clientes do /video_feed."""
+
+    def __init__(self, jpeg_quality=95, keepalive=5.0):
+        self.jpeg_quality = jpeg_quality
+        self.keepalive = keepalive  # Intervalo máximo (s) sem frame antes de reenviar o último
+        self._cond = threading.Condition()
+        self._chunk = None          # Parte multipart pronta (cabeçalho + JPEG)
+        self._seq = 0
+        self._subscribers = 0
+        self._closed = False
+        self._loops = {}            # event loop -> asyncio.Event dos clientes assíncronos
+
+    @property
+    def subscriber_count(self):
+        return self._subscribers
+
+    def publish(self, frame):
+        """Codifica e distribui um frame. Sem inscritos não faz nada.
+        Retorna True se o frame foi codificado."""
+        if self._subscribers == 0:
+            return False
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return False
+        chunk = b''.join((_CABECALHO_PARTE, jpeg.data, b'\r\n'))
+        with self._cond:
+            self._chunk = chunk
+            self._seq += 1
+            self._cond.notify_all()
+            self._wake_loops()
+        return True
+
+    def close(self):
+        """Encerra todos os geradores de clientes."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            self._wake_loops()
+
+    def _wake_loops(self):
+        # Chamado com self._cond travado: uma chamada por event loop, não por cliente
+        for loop in list(self._loops):
+            try:
+                loop.call_soon_threadsafe(self._wake, loop)
+            except RuntimeError:
+                del self._loops[loop] # Event loop já encerrado
+
+    def _wake(self, loop):
+        """Roda no event loop: libera os clientes que esperam e arma um novo Event."""
+        with self._cond:
+            event = self._loops.get(loop)
+            if event is None:
+                return
+            self._loops[loop] = asyncio.Event()
+        event.set()
+
+    def subscribe(self):
+        """Gerador com as partes multipart para um cliente (use no Response do Flask)."""
+        with self._cond:
+            self._subscribers += 1
+        last_seq = 0
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._seq != last_seq or self._closed, timeout=self.keepalive)
+                    if self._closed:
+                        return
+                    chunk = self._chunk
+                    last_seq = self._seq
+                if chunk is not None:
+                    yield chunk
+        finally:
+            with self._cond:
+                self._subscribers -= 1
+                if self._subscribers == 0:
+                    # Sem espectadores: descarta o último frame para o próximo
+                    # cliente não receber uma imagem velha
+                    self._chunk = None
+
+    async def subscribe_async(self):
+        """Gerador assíncrono com as partes multipart para um cliente (mesma
+        semântica de subscribe(), sem ocupar uma thread por cliente)."""
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            self._subscribers += 1
+            self._loops.setdefault(loop, asyncio.Event())
+        last_seq = 0
+        try:
+            while True:
+                with self._cond:
+                    if self._closed:
+                        return
+                    novo = self._seq != last_seq
+                    chunk, last_seq = self._chunk, self._seq
+                    event = self._loops[loop]
+                if not novo:
+                    try:
+                        await asyncio.wait_for(event.wait(), self.keepalive)
+                        continue
+                    except asyncio.TimeoutError:
+                        pass # Sem frame novo: reenvia o último (mantém a conexão viva)
+                if chunk is not None:
+                    yield chunk
+        finally:
+            with self._cond:
+                self._subscribers -= 1
+                if self._subscribers == 0:
+                    self._chunk = None
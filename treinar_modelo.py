@@ -1,17 +1,26 @@
 import os
-import numpy as np 
-from tensorflow.keras.models import Sequential  # type: ignore
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import tensorflow as tf
+from registro_modelos import next_version_path
+from tensorflow.keras.models import Sequential, load_model  # type: ignore
+from tensorflow.keras.optimizers import Adam  # type: ignore
 from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout  # type: ignore
 from tensorflow.keras.preprocessing.image import ImageDataGenerator  # type: ignore
 from tensorflow.keras.callbacks import EarlyStopping # type: ignore
+from tensorflow.keras.utils import load_img # type: ignore
 # Não precisamos mais do scikit-learn, pois a ponderação é manual e extrema
-import logging 
+import logging
 
 # Desabilita logs irritantes do TensorFlow
 logging.getLogger("tensorflow").setLevel(logging.ERROR)
 
 # =================================================================
-# CONFIGURAÇÕES DE TREINAMENTO 
+# CONFIGURAÇÕES DE TREINAMENTO
 # =================================================================
 
 IMAGE_WIDTH, IMAGE_HEIGHT = 128, 128
@@ -19,63 +28,238 @@ CHANNELS = 3
 BATCH_SIZE = 8
 EPOCHS = 50
 INPUT_SHAPE = (IMAGE_WIDTH, IMAGE_HEIGHT, CHANNELS)
-DATA_DIR = 'data/treino'
+DATA_DIR = 'Data/treino'
+MODELO_FILENAME = 'modelo_fungo.h5'
+# Cada modelo salvo também vira uma versão nova nesta pasta (modelo_fungo_v<N>.h5),
+# que o servidor_pc.py ativa sem reiniciar e permite voltar à anterior
+MODELOS_DIR = 'modelos'
+# Imagens já decodificadas e redimensionadas (uint8 128x128x3, .npy mapeado
+# em memória). Refeito automaticamente quando algum arquivo de DATA_DIR muda.
+CACHE_DIR = 'Data/cache_treino'
+DECODE_WORKERS = 8             # Threads decodificando imagens ao montar o cache
+
+# Treinamento incremental (--incremental): parte do modelo atual e ajusta
+# com as capturas novas já rotuladas pelo operador (subpastas por classe,
+# como em DATA_DIR). O modelo só é substituído se melhorar na validação,
+# que sai só das capturas novas: o modelo atual foi treinado com todo o
+# DATA_DIR, então imagens de lá não medem nada que ele ainda não viu. A
+# separação de cada imagem fica gravada no manifesto e nunca muda.
+NOVAS_DIR = 'Analises_Concluidas/rotuladas'
+MANIFESTO_PATH = 'manifesto_treino.json'  # Hash do conteúdo de cada imagem já vista
+FINE_TUNE_EPOCHS = 5
+FINE_TUNE_LEARNING_RATE = 1e-4
+VALIDACAO_PERCENT = 20         # % das capturas novas (escolhidas pelo hash, sempre as mesmas) só para validação
+
+# =================================================================
+# LEITURA DAS IMAGENS (sem augmentation)
+# =================================================================
+
+def listar_classes(data_dir=DATA_DIR):
+    """Classes na ordem alfabética das pastas (0 = fungo, 1 = saudavel)."""
+    return sorted(d for d in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, d)))
+
+def listar_imagens(data_dir=DATA_DIR, classes=None):
+    """Caminhos e rótulos das imagens de data_dir/<classe>/. Com classes=None
+    elas vêm das próprias pastas de data_dir; passe a lista de DATA_DIR para
+    outra pasta que pode não ter todas as classes."""
+    classes = listar_classes(data_dir) if classes is None else classes
+    caminhos, rotulos = [], []
+    for rotulo, classe in enumerate(classes):
+        pasta = os.path.join(data_dir, classe)
+        if not os.path.isdir(pasta):
+            continue
+        for nome in sorted(os.listdir(pasta)):
+            caminhos.append(os.path.join(pasta, nome))
+            rotulos.append(rotulo)
+    return caminhos, np.array(rotulos)
+
+def ler_imagem(caminho):
+    """Decodifica uma imagem como uint8 RGB 128x128, com o mesmo decodificador
+    (PIL) e o mesmo redimensionamento ('nearest') do flow_from_directory."""
+    imagem = load_img(caminho, target_size=(IMAGE_HEIGHT, IMAGE_WIDTH), interpolation='nearest')
+    return np.asarray(imagem, dtype=np.uint8)
+
+def carregar_imagens(data_dir=DATA_DIR):
+    """Lê as imagens de data_dir/<classe>/ como uint8 RGB 128x128.
+    Retorna (imagens, rotulos, caminhos)."""
+    caminhos, rotulos = listar_imagens(data_dir)
+    return np.stack([ler_imagem(c) for c in caminhos]), rotulos, caminhos
+
+# =================================================================
+# CACHE DAS IMAGENS DECODIFICADAS (.npy mapeado em memória)
+# =================================================================
+
+def _indice_cache(caminhos, rotulos):
+    """Descrição dos arquivos de origem; se mudar, o cache é refeito."""
+    arquivos = []
+    for caminho, rotulo in zip(caminhos, rotulos):
+        info = os.stat(caminho)
+        arquivos.append([caminho, int(rotulo), info.st_size, info.st_mtime_ns])
+    return {"shape": [IMAGE_HEIGHT, IMAGE_WIDTH, CHANNELS], "arquivos": arquivos}
+
+def carregar_cache(data_dir=DATA_DIR, cache_dir=CACHE_DIR, classes=None):
+    """Imagens de data_dir decodificadas uma única vez em cache_dir.
+
+    Na primeira chamada (ou se algum arquivo mudou) as imagens são
+    decodificadas em paralelo direto num .npy no disco; nas seguintes o
+    arquivo só é mapeado em memória (np.load com mmap_mode), sem decodificar
+    nada. O índice é gravado por último, então um cache interrompido no meio
+    é refeito. Retorna (imagens, rotulos, caminhos).
+    """
+    caminhos, rotulos = listar_imagens(data_dir, classes)
+    if not caminhos:
+        return np.zeros((0, IMAGE_HEIGHT, IMAGE_WIDTH, CHANNELS), dtype=np.uint8), rotulos, caminhos
+    indice = _indice_cache(caminhos, rotulos)
+    path_imagens = os.path.join(cache_dir, 'imagens.npy')
+    path_indice = os.path.join(cache_dir, 'indice.json')
+
+    try:
+        with open(path_indice, encoding='utf-8') as f:
+            valido = json.load(f) == indice
+    except (OSError, ValueError):
+        valido = False
+
+    if not valido:
+        print(f"Montando cache de {len(caminhos)} imagens em {cache_dir}...")
+        os.makedirs(cache_dir, exist_ok=True)
+        if os.path.exists(path_indice):
+            os.remove(path_indice)
+        temporario = path_imagens + '.tmp.npy'
+        imagens = np.lib.format.open_memmap(temporario, mode='w+', dtype=np.uint8,
+                                            shape=(len(caminhos), IMAGE_HEIGHT, IMAGE_WIDTH, CHANNELS))
+        with ThreadPoolExecutor(DECODE_WORKERS) as pool:
+            for i, imagem in enumerate(pool.map(ler_imagem, caminhos)):
+                imagens[i] = imagem
+        imagens.flush()
+        del imagens
+        os.replace(temporario, path_imagens)
+        with open(path_indice, 'w', encoding='utf-8') as f:
+            json.dump(indice, f)
+
+    return np.load(path_imagens, mmap_mode='r'), rotulos, caminhos
 
 # =================================================================
 # 1. DATA AUGMENTATION (Geração de Dados) - MANTIDO NO MÁXIMO
 # =================================================================
 
-print("Configurando Data Augmentation...")
+def criar_gerador_treino():
+    """Cria o gerador de imagens com Data Augmentation a partir de DATA_DIR.
+
+    Pipeline legado (decodifica e redimensiona cada JPEG em Python puro a
+    cada época). Mantido para comparação em benchmark_treino.py; o
+    treinamento usa criar_dataset_treino().
+    """
+    print("Configurando Data Augmentation...")
+
+    datagen = ImageDataGenerator(
+        rescale=1./255,
+        shear_range=0.4,
+        zoom_range=0.4,
+        horizontal_flip=True,
+        rotation_range=40,
+        width_shift_range=0.2,
+        height_shift_range=0.2
+    )
+
+    return datagen.flow_from_directory(
+        DATA_DIR,
+        target_size=(IMAGE_WIDTH, IMAGE_HEIGHT),
+        batch_size=BATCH_SIZE,
+        class_mode='binary',
+        shuffle=True
+    )
+
+def aumentar_lote(imagens):
+    """Mesmo Data Augmentation do gerador legado (rotação ±40°, zoom 0.6-1.4,
+    deslocamento ±20%, espelhamento horizontal), como UMA transformação afim
+    por imagem, aplicada no grafo do tf.data direto sobre o lote uint8.
+    (O shear_range=0.4 do ImageDataGenerator é em graus, praticamente sem
+    efeito, e não foi reproduzido.)"""
+    n = tf.shape(imagens)[0]
+    altura, largura = float(IMAGE_HEIGHT), float(IMAGE_WIDTH)
+    cx, cy = (largura - 1) / 2, (altura - 1) / 2
+
+    angulo = tf.random.uniform([n], -40.0, 40.0) * (np.pi / 180)
+    zoom_x = tf.random.uniform([n], 0.6, 1.4)
+    zoom_y = tf.random.uniform([n], 0.6, 1.4)
+    desloc_x = tf.random.uniform([n], -0.2, 0.2) * largura
+    desloc_y = tf.random.uniform([n], -0.2, 0.2) * altura
+    espelho = tf.where(tf.random.uniform([n]) < 0.5, -1.0, 1.0)
+
+    # Matriz saída -> entrada: centro + Rotação·Zoom·(espelho(p) - centro) + deslocamento
+    cos, sin = tf.cos(angulo), tf.sin(angulo)
+    a0, a1 = cos * zoom_x * espelho, -sin * zoom_y
+    b0, b1 = sin * zoom_x * espelho, cos * zoom_y
+    a2 = cx - a0 * cx - a1 * cy + desloc_x
+    b2 = cy - b0 * cx - b1 * cy + desloc_y
+    zeros = tf.zeros([n])
+    transformacoes = tf.stack([a0, a1, a2, b0, b1, b2, zeros, zeros], axis=1)
+
+    return tf.raw_ops.ImageProjectiveTransformV3(
+        images=imagens, transforms=transformacoes, output_shape=[IMAGE_HEIGHT, IMAGE_WIDTH],
+        fill_value=0.0, interpolation="BILINEAR", fill_mode="NEAREST"
+    )
+
+def criar_dataset_treino(imagens, rotulos, batch_size=BATCH_SIZE, seed=None):
+    """Pipeline tf.data sobre as imagens em cache (uint8, possivelmente mmap).
+
+    A cada época os índices são embaralhados; cada lote é lido do cache de
+    uma vez (índices ordenados, leitura sequencial no .npy), normalizado
+    para [0, 1] e aumentado em paralelo, com prefetch do próximo lote
+    enquanto o modelo treina no atual.
+    """
+    autotune = tf.data.AUTOTUNE
+    rotulos = np.asarray(rotulos, dtype=np.float32)
+
+    def ler_lote(indices):
+        indices = np.sort(indices)
+        return np.asarray(imagens[indices]), rotulos[indices]
+
+    def ler_lote_tf(indices):
+        x, y = tf.numpy_function(ler_lote, [indices], (tf.uint8, tf.float32))
+        x.set_shape([None, IMAGE_HEIGHT, IMAGE_WIDTH, CHANNELS])
+        y.set_shape([None])
+        return x, y
 
-datagen = ImageDataGenerator(
-    rescale=1./255, 
-    shear_range=0.4, 
-    zoom_range=0.4, 
-    horizontal_flip=True,
-    rotation_range=40, 
-    width_shift_range=0.2, 
-    height_shift_range=0.2
-)
+    def aumentar(x, y):
+        return tf.cast(aumentar_lote(x), tf.float32) / 255.0, y
 
-train_generator = datagen.flow_from_directory(
-    DATA_DIR,
-    target_size=(IMAGE_WIDTH, IMAGE_HEIGHT),
-    batch_size=BATCH_SIZE,
-    class_mode='binary', 
-    shuffle=True
-)
+    n = len(rotulos)
+    return (
+        tf.data.Dataset.range(n)
+        .shuffle(n, seed=seed, reshuffle_each_iteration=True)
+        .batch(batch_size)
+        .map(ler_lote_tf, num_parallel_calls=autotune)
+        .map(aumentar, num_parallel_calls=autotune)
+        .prefetch(autotune)
+    )
 
 # =================================================================
 # 2. CONSTRUÇÃO DO MODELO CNN
 # =================================================================
 
-print("Construindo o modelo CNN...")
-modelo = Sequential([
-    Conv2D(32, (3, 3), activation='relu', input_shape=INPUT_SHAPE),
-    MaxPooling2D(pool_size=(2, 2)),
-    
-    Conv2D(64, (3, 3), activation='relu'),
-    MaxPooling2D(pool_size=(2, 2)),
-    Dropout(0.25),
-    
-    Flatten(),
-    Dropout(0.5), 
-    Dense(64, activation='relu'),
-    Dense(1, activation='sigmoid') 
-])
+def construir_modelo():
+    """Cria a arquitetura CNN (sem pesos treinados)."""
+    print("Construindo o modelo CNN...")
+    return Sequential([
+        Conv2D(32, (3, 3), activation='relu', input_shape=INPUT_SHAPE),
+        MaxPooling2D(pool_size=(2, 2)),
+
+        Conv2D(64, (3, 3), activation='relu'),
+        MaxPooling2D(pool_size=(2, 2)),
+        Dropout(0.25),
+
+        Flatten(),
+        Dropout(0.5),
+        Dense(64, activation='relu'),
+        Dense(1, activation='sigmoid')
+    ])
 
 # =================================================================
 # 3. COMPILAÇÃO E TREINAMENTO (Com Ponderação MANUAL, EXTREMA e CORRETA)
 # =================================================================
 
-print("Compilando o modelo...")
-modelo.compile(
-    loss='binary_crossentropy',
-    optimizer='adam',
-    metrics=['accuracy']
-)
-
-# PONDERAÇÃO INVERTIDA E EXTREMA: 
+# PONDERAÇÃO INVERTIDA E EXTREMA:
 # {0: Saudável, 1: Fungo} é a ordem correta para seus dados.
 # Penalizamos a classe 1 (Fungo) 20 vezes mais.
 # PONDERAÇÃO FINAL CORRETA: O índice 0 é a classe Fungo (a que está em falta).
@@ -84,34 +268,217 @@ modelo.compile(
 #lass_weights_final = {0: 50.0, 1: 1.0}
 class_weights_final = {0: 20.0, 1: 1.0}
 
-print(f"\n--- ATENÇÃO: PONDERAÇÃO FINAL CORRETA {class_weights_final} ATIVA ---")
+def treinar(modelo, train_data, epochs=EPOCHS, extra_callbacks=(), learning_rate=None, validation_data=None):
+    """Compila e treina o modelo com um tf.data.Dataset (ou o gerador
+    legado). Retorna o histórico do Keras."""
+    print("Compilando o modelo...")
+    modelo.compile(
+        loss='binary_crossentropy',
+        optimizer='adam' if learning_rate is None else Adam(learning_rate),
+        metrics=['accuracy']
+    )
 
+    print(f"\n--- ATENÇÃO: PONDERAÇÃO FINAL CORRETA {class_weights_final} ATIVA ---")
 
-# EarlyStopping e Treinamento
-callbacks = [
-    EarlyStopping(monitor='loss', patience=20, verbose=1, mode='min') # Paciência 20 para evitar parada precoce
-]
+    # EarlyStopping e Treinamento
+    callbacks = [
+        EarlyStopping(monitor='loss', patience=20, verbose=1, mode='min'), # Paciência 20 para evitar parada precoce
+        *extra_callbacks
+    ]
 
-print(f"\nIniciando treinamento por {EPOCHS} épocas...")
+    print(f"\nIniciando treinamento por {epochs} épocas...")
 
-history = modelo.fit(
-    train_generator,
-    steps_per_epoch=train_generator.samples // BATCH_SIZE,
-    epochs=EPOCHS,
-    callbacks=callbacks,
-    class_weight=class_weights_final, # Ponderação Extrema CORRETA
-    verbose=1
-)
+    # Uma época = uma passada completa (o Dataset termina sozinho e o gerador
+    # legado informa len()); um steps_per_epoch menor que len() faz o Keras 3
+    # alternar épocas completas com épocas interrompidas
+    return modelo.fit(
+        train_data,
+        epochs=epochs,
+        validation_data=validation_data,
+        callbacks=callbacks,
+        class_weight=class_weights_final, # Ponderação Extrema CORRETA
+        verbose=1
+    )
 
 # =================================================================
 # 4. SALVAMENTO
 # =================================================================
 
-MODELO_FILENAME = 'modelo_fungo.h5'
-print(f"\nTreinamento concluído. Salvando modelo em {MODELO_FILENAME}...")
+def salvar_modelo(modelo, path=MODELO_FILENAME):
+    """Salva o modelo treinado em path.
+
+    Grava num arquivo temporário e troca com os.replace (atômico): quem
+    estiver lendo path (o servidor_pc.py recarrega o modelo quando o arquivo
+    muda) nunca vê um arquivo pela metade. Retorna True se salvou.
+    """
+    print(f"\nTreinamento concluído. Salvando modelo em {path}...")
+
+    base, ext = os.path.splitext(path)
+    temporario = f"{base}.tmp{ext}"
+    try:
+        modelo.save(temporario)
+        os.replace(temporario, path)
+        print("Modelo salvo com sucesso!")
+        return True
+    except Exception as e:
+        print(f"Erro ao salvar o modelo: {e}")
+        return False
+
+def publicar_versao(modelo, diretorio=MODELOS_DIR):
+    """Salva o modelo como a próxima versão em diretorio. Retorna o caminho (ou None)."""
+    path = next_version_path(diretorio, os.path.splitext(os.path.basename(MODELO_FILENAME))[0], '.h5')
+    return path if salvar_modelo(modelo, path) else None
+
+# =================================================================
+# 5. TREINAMENTO INCREMENTAL (a partir do modelo atual)
+# =================================================================
+
+def hash_arquivo(caminho):
+    """SHA-256 do conteúdo do arquivo (identifica a imagem mesmo se renomeada)."""
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+def em_validacao(hash_hex):
+    """Separação fixa treino/validação: depende só do conteúdo da imagem."""
+    return int(hash_hex[:8], 16) % 100 < VALIDACAO_PERCENT
+
+def separacao(hash_hex, da_base, manifesto):
+    """'treino' ou 'validacao' de uma imagem. A gravada no manifesto vale
+    sempre; senão, as imagens de DATA_DIR (já vistas pelo modelo base) são de
+    treino e as capturas novas vão para a validação por em_validacao."""
+    entrada = manifesto.get(hash_hex)
+    if entrada is not None and 'split' in entrada:
+        return entrada['split']
+    return 'validacao' if not da_base and em_validacao(hash_hex) else 'treino'
+
+def carregar_manifesto(path=MANIFESTO_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def salvar_manifesto(manifesto, path=MANIFESTO_PATH):
+    temporario = path + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=1)
+    os.replace(temporario, path)
+
+def acuracia_balanceada(modelo, imagens, rotulos):
+    """Média da acurácia de cada classe (as classes são bem desbalanceadas)."""
+    probs = modelo.predict(np.asarray(imagens, dtype=np.float32) / 255.0, verbose=0)[:, 0]
+    previstos = (probs >= 0.5).astype(int)
+    return float(np.mean([np.mean(previstos[rotulos == c] == c) for c in np.unique(rotulos)]))
+
+def treinar_incremental(novas_dir=NOVAS_DIR, cache_dir=CACHE_DIR, manifesto_path=MANIFESTO_PATH,
+                        epochs=FINE_TUNE_EPOCHS, modelo_path=MODELO_FILENAME):
+    """Ajusta o modelo atual com as imagens rotuladas ainda não vistas.
+
+    As imagens de DATA_DIR e de novas_dir são identificadas pelo hash do
+    conteúdo; se nenhuma for nova, nada é treinado. O modelo atual é
+    treinado por poucas épocas (taxa de aprendizado baixa) com todo o
+    conjunto de treino, e só substitui modelo_path se a acurácia balanceada
+    na validação for MAIOR que a do atual. A validação é uma parte fixa das
+    capturas de novas_dir (escolhida pelo hash e gravada no manifesto), que
+    nenhum dos dois modelos viu no treino.
+    Retorna True se um modelo novo foi promovido.
+    """
+    inicio = time.perf_counter()
+    classes = listar_classes(DATA_DIR)
+    imagens_base, rotulos_base, caminhos_base = carregar_cache(DATA_DIR, cache_dir, classes)
+    if os.path.isdir(novas_dir):
+        imagens_novas, rotulos_novas, caminhos_novas = carregar_cache(novas_dir, os.path.join(cache_dir, 'novas'), classes)
+    else:
+        imagens_novas, rotulos_novas, caminhos_novas = imagens_base[:0], rotulos_base[:0], []
+
+    caminhos = caminhos_base + caminhos_novas
+    rotulos = np.concatenate([rotulos_base, rotulos_novas])
+    hashes = [hash_arquivo(c) for c in caminhos]
+
+    manifesto = carregar_manifesto(manifesto_path)
+    novos = [h for h in hashes if h not in manifesto]
+    if not novos:
+        print("Nenhuma imagem nova desde o último treinamento.")
+        return False
+    print(f"{len(novos)} imagem(ns) nova(s) de {len(hashes)} no total.")
+
+    hashes_base = set(hashes[:len(caminhos_base)])
+    splits = [separacao(h, h in hashes_base, manifesto) for h in hashes]
+    validacao = np.array([s == 'validacao' for s in splits], dtype=bool)
+    # Lê de cada cache só as linhas selecionadas
+    def selecionar(mascara):
+        base, novas = mascara[:len(caminhos_base)], mascara[len(caminhos_base):]
+        return np.concatenate([imagens_base[np.flatnonzero(base)], imagens_novas[np.flatnonzero(novas)]])
+
+    x_treino, y_treino = selecionar(~validacao), rotulos[~validacao]
+    x_val, y_val = selecionar(validacao), rotulos[validacao]
+    if len(y_val) == 0 or len(y_treino) == 0:
+        # Sem validação a acurácia seria NaN e o modelo nunca seria promovido
+        # sem explicação; o manifesto não é atualizado, então as imagens
+        # voltam a ser consideradas quando houver mais dados
+        vazio = "validação" if len(y_val) == 0 else "treino"
+        print(f"Treinamento incremental recusado: a separação de {vazio} ficou vazia "
+              f"({len(caminhos_novas)} captura(s) nova(s) em '{novas_dir}', {VALIDACAO_PERCENT}% delas "
+              f"para validação). O modelo atual foi mantido.")
+        return False
+    if len(np.unique(y_val)) < len(classes):
+        print("Aviso: a validação não tem exemplos de todas as classes; o resultado é menos confiável.")
+
+    modelo_atual = load_model(modelo_path)
+    score_atual = acuracia_balanceada(modelo_atual, x_val, y_val)
+
+    modelo = load_model(modelo_path) # Ponto de partida: pesos do modelo atual
+    parada = EarlyStopping(monitor='val_loss', patience=2, restore_best_weights=True)
+    treinar(modelo, criar_dataset_treino(x_treino, y_treino), epochs, extra_callbacks=[parada],
+            learning_rate=FINE_TUNE_LEARNING_RATE,
+            validation_data=(x_val.astype(np.float32) / 255.0, y_val.astype(np.float32)))
+    score_novo = acuracia_balanceada(modelo, x_val, y_val)
+
+    print(f"\nAcurácia balanceada na validação ({len(y_val)} imagens): "
+          f"atual {score_atual:.3f} | ajustado {score_novo:.3f}")
+    promovido = score_novo > score_atual
+    if promovido:
+        # A versão anterior continua na pasta de versões (rollback no servidor_pc.py)
+        promovido = salvar_modelo(modelo, modelo_path) and publicar_versao(modelo) is not None
+    else:
+        print("Modelo ajustado não é melhor: o modelo atual foi mantido.")
+
+    # As imagens entram no manifesto mesmo sem promoção (só reexecuta com dados novos)
+    agora = time.time()
+    for caminho, h, rotulo, split in zip(caminhos, hashes, rotulos, splits):
+        manifesto.setdefault(h, {"path": caminho, "label": classes[rotulo], "added": agora})["split"] = split
+    salvar_manifesto(manifesto, manifesto_path)
+    print(f"Treinamento incremental concluído em {time.perf_counter() - inicio:.0f} s.")
+    return promovido
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Treina a CNN de detecção de fungos.")
+    parser.add_argument('--cache', default=CACHE_DIR, metavar='PASTA',
+                        help=f"Pasta do cache de imagens decodificadas (padrão: {CACHE_DIR})")
+    parser.add_argument('--epocas', type=int,
+                        help=f"Épocas (padrão: {EPOCHS}; {FINE_TUNE_EPOCHS} no --incremental)")
+    parser.add_argument('--legado', action='store_true',
+                        help="Usa o ImageDataGenerator antigo em vez do tf.data")
+    parser.add_argument('--incremental', action='store_true',
+                        help=f"Ajusta o {MODELO_FILENAME} atual com as imagens novas de --novas")
+    parser.add_argument('--novas', default=NOVAS_DIR, metavar='PASTA',
+                        help=f"Capturas rotuladas (<pasta>/<classe>/) para o --incremental (padrão: {NOVAS_DIR})")
+    args = parser.parse_args()
+
+    if args.incremental:
+        treinar_incremental(args.novas, args.cache, epochs=args.epocas or FINE_TUNE_EPOCHS)
+        raise SystemExit(0)
 
-try:
-    modelo.save(MODELO_FILENAME)
-    print("Modelo salvo com sucesso!")
-except Exception as e:
-    print(f"Erro ao salvar o modelo: {e}")
\ No newline at end of file
+    if args.legado:
+        train_data = criar_gerador_treino()
+    else:
+        imagens, rotulos, _ = carregar_cache(DATA_DIR, args.cache)
+        train_data = criar_dataset_treino(imagens, rotulos)
+    modelo = construir_modelo()
+    history = treinar(modelo, train_data, args.epocas or EPOCHS)
+    salvar_modelo(modelo)
+    publicar_versao(modelo)
@@ -0,0 +1,213 @@
+import argparse
+import glob
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# =================================================================
+# TRIAGEM NA BORDA (RPi): QUAIS CAPTURAS VALEM A CNN DO PC
+# =================================================================
+# Na inspeção automática, quase todas as capturas de uma sala saudável
+# mostram bananas saudáveis, e cada uma custa ~49 KB de rede e uma
+# inferência no PC. A triagem roda na thread da câmera sobre o frame no
+# tamanho do modelo (já calculado para a captura) e dá uma pontuação de
+# "cara de fungo" em ~0,3 ms:
+#   - HSV (padrão): fração da fruta coberta por lesões, isto é, pixels
+#     escuros ou marrons sobre pixels escuros/marrons + amarelos/verdes;
+#   - opcionalmente, 1 - P(Saudável) de um modelo .tflite minúsculo
+#     (exportar_tflite.py, int8), se a RPi tiver o tflite-runtime.
+# Abaixo de healthy_max a captura é claramente saudável e não é enviada;
+# acima de suspect_min é suspeita; entre os dois, ambígua. Suspeitas e
+# ambíguas seguem para o PC com a pontuação no manifesto do lote.
+# Os limiares saem de `python triagem.py --calibrar Data/treino`, que
+# mede quantas imagens de cada classe seriam enviadas.
+
+VEREDITOS = ('saudavel', 'ambigua', 'suspeita')
+# Faixas HSV do OpenCV (H 0-179, S e V 0-255)
+MATIZ_AMARELO = (18, 35)
+MATIZ_VERDE = (36, 85)
+MATIZ_MARROM_MAX = 17
+V_ESCURO = 70          # Abaixo disso o pixel conta como lesão escura
+V_MARROM_MAX = 160
+S_COR_MIN = 60         # Saturação mínima de fruta/lesão colorida
+
+
+def lesion_ratio(frame):
+    """Fração dos pixels de fruta que são lesão (escuros ou marrons), 0-1.
+
+    frame: uint8 BGR (a ordem da câmera), qualquer tamanho; a RPi usa o
+    frame no tamanho do modelo.
+    """
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+    colorido = s >= S_COR_MIN
+    amarelo = colorido & (h >= MATIZ_AMARELO[0]) & (h <= MATIZ_AMARELO[1]) & (v >= 120)
+    verde = colorido & (h >= MATIZ_VERDE[0]) & (h <= MATIZ_VERDE[1]) & (v >= 60)
+    lesao = (v < V_ESCURO) | (colorido & (h <= MATIZ_MARROM_MAX) & (v < V_MARROM_MAX))
+    n_lesao = int(np.count_nonzero(lesao))
+    fruta = n_lesao + int(np.count_nonzero(amarelo | verde))
+    return n_lesao / fruta if fruta else 1.0 # Sem fruta reconhecível: deixa o PC decidir
+
+
+class EdgeScreener:
+    """Triagem das capturas na RPi. Seguro entre threads (a thread da câmera
+    e as requisições de /capture; o TFLiteModel serializa as inferências).
+
+    healthy_max: pontuação abaixo da qual a captura é descartada (saudável).
+    suspect_min: pontuação a partir da qual a captura é marcada como suspeita.
+    model_path: .tflite opcional; a pontuação passa a ser 1 - P(Saudável).
+    """
+
+    def __init__(self, healthy_max, suspect_min, model_path=None, counters=None):
+        if healthy_max > suspect_min:
+            raise ValueError("healthy_max deve ser <= suspect_min")
+        self.healthy_max = healthy_max
+        self.suspect_min = suspect_min
+        self.model_path = model_path
+        self.counters = counters
+        self._model = None
+        if model_path:
+            from modelo_tflite import TFLiteModel
+            self._model = TFLiteModel(model_path, num_threads=1)
+        self._lock = threading.Lock()
+        self._stats = {veredito: 0 for veredito in VEREDITOS}
+        self._ultima = None
+
+    @property
+    def method(self):
+        return 'tflite' if self._model is not None else 'hsv'
+
+    def score(self, frame):
+        """Pontuação de fungo do frame (0 = saudável, 1 = fungo)."""
+        if self._model is not None:
+            # O modelo recebe RGB (ordem do treinamento); a câmera entrega BGR
+            rgb = cv2.cvtColor(cv2.resize(frame, (128, 128), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+            return 1.0 - float(self._model.predict(rgb[np.newaxis])[0])
+        return lesion_ratio(frame)
+
+    def verdict(self, score):
+        if score < self.healthy_max:
+            return 'saudavel'
+        return 'suspeita' if score >= self.suspect_min else 'ambigua'
+
+    def evaluate(self, frame):
+        """(pontuação, veredito) sem contabilizar (ex.: capturas manuais)."""
+        score = self.score(frame)
+        return score, self.verdict(score)
+
+    def screen(self, frame):
+        """Triagem de uma captura automática. Retorna (enviar ao PC?, pontuação, veredito)."""
+        inicio = time.perf_counter()
+        score, veredito = self.evaluate(frame)
+        if self.counters is not None:
+            self.counters.record('triagem', 1, time.perf_counter() - inicio)
+        with self._lock:
+            self._stats[veredito] += 1
+            self._ultima = score
+        return veredito != 'saudavel', score, veredito
+
+    def stats(self):
+        with self._lock:
+            avaliadas = sum(self._stats.values())
+            return {
+                "method": self.method,
+                "healthy_max": self.healthy_max,
+                "suspect_min": self.suspect_min,
+                **self._stats,
+                "avaliadas": avaliadas,
+                "enviadas": avaliadas - self._stats['saudavel'],
+                "fracao_enviada": (avaliadas - self._stats['saudavel']) / avaliadas if avaliadas else None,
+                "ultima_pontuacao": self._ultima,
+            }
+
+
+# =================================================================
+# CALIBRAÇÃO DOS LIMIARES (Data/treino)
+# =================================================================
+
+def carregar_pontuacoes(pasta, screener):
+    """{classe: array de pontuações} das imagens em pasta/<classe>/ (no tamanho do modelo)."""
+    pontuacoes = {}
+    for classe in ('saudavel', 'fungo'):
+        valores = []
+        for arquivo in sorted(glob.glob(os.path.join(pasta, classe, '*'))):
+            imagem = cv2.imread(arquivo)
+            if imagem is not None:
+                valores.append(screener.score(cv2.resize(imagem, (128, 128), interpolation=cv2.INTER_AREA)))
+        pontuacoes[classe] = np.array(valores)
+    return pontuacoes
+
+
+def calibrar(pontuacoes, recall=1.0, precisao_suspeita=1.0):
+    """Limiares a partir das pontuações de cada classe.
+
+    healthy_max: o maior limiar que ainda envia `recall` das imagens com
+    fungo (com recall=1.0, logo abaixo da menor pontuação de fungo).
+    suspect_min: o menor limiar acima do qual no máximo 1 - precisao_suspeita
+    das imagens saudáveis seriam marcadas como suspeitas.
+    """
+    fungo, saudavel = np.sort(pontuacoes['fungo']), np.sort(pontuacoes['saudavel'])
+    perdidas = int(np.floor((1.0 - recall) * len(fungo)))
+    healthy_max = float(fungo[perdidas]) # Pontuações < healthy_max são descartadas
+    falsas = int(np.floor((1.0 - precisao_suspeita) * len(saudavel)))
+    suspect_min = float(np.nextafter(saudavel[len(saudavel) - 1 - falsas], np.inf))
+    return healthy_max, max(healthy_max, suspect_min)
+
+
+def relatorio(pontuacoes, healthy_max, suspect_min, fracao_saudavel=0.95):
+    """Mostra os vereditos por classe e a fração das capturas que uma RPi
+    enviaria numa sala com fracao_saudavel de bananas saudáveis."""
+    screener = EdgeScreener(healthy_max, suspect_min)
+    enviadas = {}
+    for classe in ('saudavel', 'fungo'):
+        vereditos = [screener.verdict(s) for s in pontuacoes[classe]]
+        n = len(vereditos)
+        contagem = {v: vereditos.count(v) for v in VEREDITOS}
+        enviadas[classe] = (n - contagem['saudavel']) / n
+        print(f"{classe:>9} ({n:>3}): enviadas {100 * enviadas[classe]:5.1f}% | "
+              + " | ".join(f"{v} {contagem[v]}" for v in VEREDITOS))
+    fracao = fracao_saudavel * enviadas['saudavel'] + (1 - fracao_saudavel) * enviadas['fungo']
+    print(f"Sala com {100 * fracao_saudavel:.0f}% saudáveis: a RPi envia {100 * fracao:.1f}% das capturas automáticas ao PC")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibra e valida os limiares da triagem na borda com Data/treino.")
+    parser.add_argument('--calibrar', metavar='PASTA', default=os.path.join('Data', 'treino'),
+                        help="Pasta com subpastas saudavel/ e fungo/")
+    parser.add_argument('--recall', type=float, default=1.0,
+                        help="Fração das imagens com fungo que precisa chegar ao PC")
+    parser.add_argument('--precisao-suspeita', type=float, default=1.0,
+                        help="Fração das saudáveis que NÃO pode ser marcada como suspeita")
+    parser.add_argument('--modelo', help="Modelo .tflite da triagem (padrão: estatísticas HSV)")
+    parser.add_argument('--fracao-saudavel', type=float, default=0.95,
+                        help="Fração de capturas saudáveis na sala, para estimar o tráfego enviado")
+    parser.add_argument('--saudavel', type=float, help="Valida este healthy_max em vez de calibrar")
+    parser.add_argument('--suspeita', type=float, help="Valida este suspect_min em vez de calibrar")
+    args = parser.parse_args()
+
+    screener = EdgeScreener(0.0, 1.0, model_path=args.modelo)
+    inicio = time.perf_counter()
+    pontuacoes = carregar_pontuacoes(args.calibrar, screener)
+    total = sum(len(p) for p in pontuacoes.values())
+    if not total or not all(len(p) for p in pontuacoes.values()):
+        raise SystemExit(f"'{args.calibrar}' precisa ter imagens em saudavel/ e fungo/")
+    print(f"{total} imagens de '{args.calibrar}' | triagem {screener.method}: "
+          f"{(time.perf_counter() - inicio) * 1000 / total:.2f} ms/imagem (com leitura do arquivo)")
+
+    healthy_max, suspect_min = calibrar(pontuacoes, args.recall, args.precisao_suspeita)
+    if args.saudavel is not None:
+        healthy_max = args.saudavel
+    if args.suspeita is not None:
+        suspect_min = max(healthy_max, args.suspeita)
+    print(f"healthy_max = {healthy_max:.4f} | suspect_min = {suspect_min:.4f}")
+    relatorio(pontuacoes, healthy_max, suspect_min, args.fracao_saudavel)
+    print(f"\nNa RPi: FUNGOEYE_TRIAGEM=1 FUNGOEYE_TRIAGEM_SAUDAVEL={healthy_max:.4f} "
+          f"FUNGOEYE_TRIAGEM_SUSPEITA={suspect_min:.4f}"
+          + (f" FUNGOEYE_TRIAGEM_MODELO={args.modelo}" if args.modelo else ""))
+
+
+if __name__ == '__main__':
+    main()